@@ -0,0 +1,189 @@
+"""
+Detecção de picos de defeitos por produto.
+
+Para cada codigo_produto o detector guarda só um estado pequeno e fixo: o
+dia em andamento, quantos defeitos o produto teve nele e a média/variância
+móveis (EWMA) das quantidades diárias anteriores. Cada defeito registrado
+atualiza esse estado em O(1); quando a quantidade do dia passa do limite
+absoluto ou fica muitos desvios acima da média (z-score), gera um alerta
+(ex.: um lote de produção com problema).
+
+O histórico da tabela defeitos é reprocessado em uma única passada em
+fluxo (reconstruir), só para formar as médias; os alertas vêm dos
+defeitos novos, que chegam por registrar().
+"""
+
+import math
+import threading
+from collections import deque, namedtuple
+from datetime import date
+
+import banco
+import metricas
+
+ALFA = 0.1  # peso do dia mais recente na média móvel (~20 dias de memória)
+Z_LIMITE = 3.0  # desvios acima da média que disparam o alerta
+LIMITE_DIARIO = 10  # defeitos do mesmo produto no dia que sempre alertam
+MINIMO_ALERTA = 3  # abaixo disso nunca alerta (evita ruído de produtos raros)
+MINIMO_DIAS = 7  # dias de histórico antes de usar o z-score
+DESVIO_MINIMO = 0.5  # piso do desvio, para produtos quase sem variação
+MAX_DIAS_VAZIOS = 60  # dias sem defeito aplicados à média (depois disso ela já é ~0)
+MAX_ALERTAS = 20  # alertas mais recentes mantidos para a barra lateral
+
+Alerta = namedtuple("Alerta", "codigo_produto dia quantidade media z")
+
+
+class EstadoProduto:
+    """Estatísticas móveis das quantidades diárias de defeitos de um produto."""
+
+    __slots__ = ("dia", "quantidade", "media", "variancia", "dias", "alertado")
+
+    def __init__(self, dia):
+        self.dia = dia
+        self.quantidade = 0
+        self.media = 0.0
+        self.variancia = 0.0
+        self.dias = 0
+        self.alertado = False
+
+    def _acumular(self, valor):
+        """Inclui a quantidade de um dia encerrado na média e variância (EWMA)"""
+        diferenca = valor - self.media
+        incremento = ALFA * diferenca
+        self.media += incremento
+        self.variancia = (1 - ALFA) * (self.variancia + diferenca * incremento)
+        self.dias += 1
+
+    def avancar(self, dia):
+        """Encerra o dia em andamento (e os dias sem defeito) e começa o novo"""
+        vazios = (date.fromisoformat(dia) - date.fromisoformat(self.dia)).days - 1
+        self._acumular(self.quantidade)
+        for _ in range(min(vazios, MAX_DIAS_VAZIOS)):
+            self._acumular(0)
+        self.dias += max(vazios - MAX_DIAS_VAZIOS, 0)
+        self.dia = dia
+        self.quantidade = 0
+        self.alertado = False
+
+    def z(self):
+        """Desvios da quantidade do dia em relação à média móvel"""
+        desvio = max(math.sqrt(self.variancia), DESVIO_MINIMO)
+        return (self.quantidade - self.media) / desvio
+
+
+class DetectorAnomalias:
+    """Acompanha os defeitos por produto e guarda os alertas mais recentes."""
+
+    def __init__(self):
+        self.estados = {}
+        self.alertas = deque(maxlen=MAX_ALERTAS)
+        self.pronto = False
+        self._ultimo_id = 0
+        self._pendentes = []
+        self._lock = threading.Lock()
+        # Só uma reconstrução por vez, mesmo com várias janelas abertas
+        self._reconstrucao = threading.Lock()
+
+    def _processar(self, codigo_produto, dia, alertar=True):
+        """
+        Atualiza o estado do produto com um defeito e retorna o Alerta, se houver.
+
+        alertar=False só acumula as estatísticas (reprocessamento do histórico).
+        """
+        if not codigo_produto or not dia:
+            return None
+
+        estado = self.estados.get(codigo_produto)
+        if estado is None:
+            estado = self.estados[codigo_produto] = EstadoProduto(dia)
+        elif dia > estado.dia:
+            estado.avancar(dia)
+        elif dia < estado.dia:
+            return None  # lançamento retroativo: não altera o dia em andamento
+
+        estado.quantidade += 1
+        if not alertar or estado.alertado or estado.quantidade < MINIMO_ALERTA:
+            return None
+
+        z = estado.z()
+        if estado.quantidade >= LIMITE_DIARIO or (estado.dias >= MINIMO_DIAS and z >= Z_LIMITE):
+            estado.alertado = True
+            alerta = Alerta(codigo_produto, dia, estado.quantidade, estado.media, z)
+            self.alertas.append(alerta)
+            return alerta
+        return None
+
+    def registrar(self, defeito_id, codigo_produto, dia):
+        """
+        Alimenta o detector com um defeito recém-gravado.
+
+        Antes de o histórico ser reprocessado o defeito fica pendente e é
+        aplicado ao final (se a passada pelo histórico ainda não o tiver lido).
+        """
+        with self._lock:
+            if not self.pronto:
+                self._pendentes.append((defeito_id, codigo_produto, dia))
+                return None
+            return self._processar(codigo_produto, dia[:10])
+
+    @metricas.medido
+    def reconstruir(self, tarefa=None):
+        """
+        Reprocessa todo o histórico em uma única passada, em ordem de data.
+
+        As estatísticas são montadas à parte e trocadas de uma vez; o
+        histórico não gera alertas, só os defeitos registrados depois. Se
+        outra reconstrução terminar enquanto esta espera, não refaz.
+        """
+        while not self._reconstrucao.acquire(timeout=0.2):
+            if tarefa is not None:
+                tarefa.verificar()
+        try:
+            if self.pronto:
+                return 0
+
+            novo = DetectorAnomalias()
+            processados = 0
+            with banco.conexao() as conn:
+                cursor = conn.execute('''
+                    SELECT id, codigo_produto, substr(data_defeito, 1, 10)
+                    FROM defeitos
+                    ORDER BY data_defeito, id
+                ''')
+                for defeito_id, codigo_produto, dia in cursor:
+                    novo._processar(codigo_produto, dia, alertar=False)
+                    novo._ultimo_id = max(novo._ultimo_id, defeito_id)
+                    processados += 1
+                    if tarefa is not None and processados % 10000 == 0:
+                        tarefa.verificar()
+
+            with self._lock:
+                self.estados = novo.estados
+                self._ultimo_id = novo._ultimo_id
+                # Defeitos gravados durante a passada e que ela não leu
+                for defeito_id, codigo_produto, dia in self._pendentes:
+                    if defeito_id > self._ultimo_id:
+                        self._processar(codigo_produto, dia[:10])
+                self._pendentes.clear()
+                self.pronto = True
+            return processados
+        finally:
+            self._reconstrucao.release()
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def obter_detector():
+    """Retorna o detector compartilhado pelas janelas de defeitos"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = DetectorAnomalias()
+        return _detector
+
+
+def reconstruir(tarefa):
+    """Reconstrói o detector compartilhado (executada fora da thread da interface)"""
+    return obter_detector().reconstruir(tarefa)
@@ -4,28 +4,41 @@ Sistema Austral - Ferramentas de Gestão
 Refatorado para melhor modularidade e clareza.
 """
 
+import importlib
+import threading
 import customtkinter as ctk
-from tkinter import messagebox
-from datetime import datetime
+from tkinter import messagebox, ttk
 
-# Importações de módulos de aplicação
-from oms import PedidoSinOMSApp
-from defeitos import DefectManagerApp
-from fechamento import EmailFechamentoApp
-from etiquetas import SistemaEtiquetas
-from inventario import InventoryApp
-from fundo_fixo import GestorFundoFixo
+import janelas
+import metricas
+
+# Com HOSPEDAR, as ferramentas abrem em janelas (CTkToplevel) da raiz do
+# launcher em vez de criarem outra raiz Tk com seu próprio mainloop.
+HOSPEDAR = True
+
+# Os módulos das ferramentas só são importados quando o botão é clicado.
+# Depois que a janela aparece, as dependências pesadas podem ser carregadas
+# em segundo plano para que a primeira abertura também seja rápida.
+PRE_CARREGAR = True
+PRE_CARREGAMENTO_ATRASO_MS = 500
+DEPENDENCIAS_PESADAS = ("openpyxl", "requests", "PIL.Image", "PIL.ImageDraw", "PIL.ImageFont")
 
 
 class SistemaAustral(ctk.CTk):
     """Classe principal do Sistema Austral."""
 
-    def __init__(self):
+    def __init__(self, pre_carregar=PRE_CARREGAR, hospedar=HOSPEDAR):
         super().__init__()
         self.app_mapping = self._mapear_aplicacoes()  # Defina o mapeamento primeiro
+        self.hospedar = hospedar
+        self._fabricas_carregadas = {}
+        self._janelas_abertas = {}  # nome do botão -> janela hospedada (em cache)
         self._configurar_janela()
         self._criar_componentes()
 
+        if pre_carregar:
+            self.after(PRE_CARREGAMENTO_ATRASO_MS, self._pre_carregar)
+
     def _configurar_janela(self):
         """Configurações da janela principal."""
         self.title("SISTEMA AUSTRAL - FERRAMENTAS")
@@ -42,16 +55,61 @@ class SistemaAustral(ctk.CTk):
         self.geometry(f"{largura}x{altura}+{x}+{y}")
 
     def _mapear_aplicacoes(self):
-        """Mapeia botões às respectivas aplicações."""
+        """Mapeia botões aos módulos das aplicações (cada um expõe create_app)."""
         return {
-            "CONTROLE PEDIDOS OMS": PedidoSinOMSApp,
-            "PLANILHA DEFEITOS": DefectManagerApp,
-            "E-MAIL FECHAMENTO": EmailFechamentoApp,
-            "GERADOR DE ETIQUETAS": SistemaEtiquetas,
-            "INVENTÁRIO": InventoryApp,
-            "CONTROLE FUNDO CAIXA": GestorFundoFixo,
+            "CONTROLE PEDIDOS OMS": "oms",
+            "PLANILHA DEFEITOS": "defeitos",
+            "E-MAIL FECHAMENTO": "fechamento",
+            "GERADOR DE ETIQUETAS": "etiquetas",
+            "INVENTÁRIO": "inventario",
+            "CONTROLE FUNDO CAIXA": "fundo_fixo",
         }
 
+    def _carregar_fabrica(self, nome_botao):
+        """Importa o módulo da aplicação no primeiro uso e retorna seu create_app."""
+        if nome_botao not in self._fabricas_carregadas:
+            modulo = importlib.import_module(self.app_mapping[nome_botao])
+            self._fabricas_carregadas[nome_botao] = modulo.create_app
+        return self._fabricas_carregadas[nome_botao]
+
+    def _pre_carregar(self):
+        """Importa as dependências pesadas em segundo plano após a janela aparecer."""
+        self._dependencias_prontas = threading.Event()
+        threading.Thread(
+            target=self._importar_dependencias,
+            name="austral-pre-carregamento",
+            daemon=True
+        ).start()
+        self.after(100, self._aguardar_dependencias)
+
+    def _importar_dependencias(self):
+        """Corpo da thread de pré-carregamento (não toca na interface)."""
+        for nome in DEPENDENCIAS_PESADAS:
+            try:
+                importlib.import_module(nome)
+            except Exception:
+                pass  # o erro reaparece ao abrir a ferramenta que precisa dele
+        self._dependencias_prontas.set()
+
+    def _aguardar_dependencias(self):
+        """Quando as dependências estiverem prontas, importa as ferramentas uma a uma."""
+        if not self._dependencias_prontas.is_set():
+            self.after(100, self._aguardar_dependencias)
+            return
+        # Os módulos das ferramentas configuram o customtkinter ao serem
+        # importados, então são carregados na thread da interface, um por vez
+        self._pre_carregar_ferramentas(list(self.app_mapping))
+
+    def _pre_carregar_ferramentas(self, pendentes):
+        """Importa a próxima ferramenta pendente e agenda a seguinte."""
+        if not pendentes:
+            return
+        try:
+            self._carregar_fabrica(pendentes.pop(0))
+        except Exception:
+            pass  # o erro é exibido quando o botão for clicado
+        self.after_idle(lambda: self._pre_carregar_ferramentas(pendentes))
+
     def _criar_componentes(self):
         """Cria os componentes principais da interface."""
         self.main_frame = ctk.CTkFrame(self, corner_radius=15, fg_color="black")
@@ -61,7 +119,10 @@ class SistemaAustral(ctk.CTk):
         self._criar_header()
         self._criar_area_principal()
         self._criar_footer()
-        self._atualizar_data_hora()
+        janelas.registrar_relogio(
+            self.status_label,
+            lambda agora: f"Online | {agora.strftime('%d/%m/%Y %H:%M:%S')}"
+        )
 
     def _criar_header(self):
         """Cria o cabeçalho com título e subtítulo."""
@@ -112,6 +173,14 @@ class SistemaAustral(ctk.CTk):
             fg_color="red"
         ).pack(side="right", padx=10)
 
+        ctk.CTkButton(
+            footer,
+            text="DESEMPENHO",
+            width=100,
+            command=self._mostrar_desempenho,
+            fg_color="#2A2D2E"
+        ).pack(side="right", padx=10)
+
         ctk.CTkLabel(
             footer,
             text="© 2025 Shigi - GitHub @brunoshigi",
@@ -120,20 +189,41 @@ class SistemaAustral(ctk.CTk):
 
     def _acao_botao(self, nome_botao):
         """Executa a ação associada ao botão."""
-        app_cls = self.app_mapping.get(nome_botao)
-        if app_cls:
-            self._iniciar_aplicacao(app_cls, nome_botao)
-        else:
+        if nome_botao not in self.app_mapping:
             self._notificar_em_desenvolvimento(nome_botao)
+            return
 
-    def _iniciar_aplicacao(self, app_cls, nome_botao):
+        # Ferramenta já aberta antes: apenas reexibe a janela em cache
+        janela = self._janelas_abertas.get(nome_botao)
+        if janela is not None and janela.winfo_exists():
+            janelas.mostrar(janela)
+            return
+
+        try:
+            create_app = self._carregar_fabrica(nome_botao)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao carregar {nome_botao}:\n{e}")
+            return
+        self._iniciar_aplicacao(create_app, nome_botao)
+
+    def _iniciar_aplicacao(self, create_app, nome_botao):
         """Inicializa a aplicação correspondente ao botão."""
         try:
-            app = app_cls()
+            app = create_app(self) if self.hospedar else create_app()
+            janela = getattr(app, "root", app)
+
+            if self.hospedar:
+                # Fechar pelo "X" esconde a janela para reabrir instantaneamente
+                janela.protocol("WM_DELETE_WINDOW", lambda: janelas.fechar(janela))
+                self._janelas_abertas[nome_botao] = janela
+                # Ferramentas em que a janela é app.root: recarga ao reexibir
+                if app is not janela and hasattr(app, "ao_reexibir"):
+                    janela.ao_reexibir = app.ao_reexibir
+
             if hasattr(app, 'run'):
                 app.run()
             else:
-                app.mainloop()
+                janelas.executar(janela)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao abrir {nome_botao}:\n{e}")
 
@@ -144,17 +234,53 @@ class SistemaAustral(ctk.CTk):
             f"O módulo '{nome_botao}' está em desenvolvimento.\nEm breve estará disponível!"
         )
 
+    def _mostrar_desempenho(self):
+        """Mostra as operações mais lentas medidas nesta sessão (p50/p95/p99)."""
+        janela = ctk.CTkToplevel(self)
+        janela.title("DESEMPENHO - OPERAÇÕES MAIS LENTAS")
+        janela.geometry("760x480")
+        janela.transient(self)
+
+        colunas = ("operacao", "qtd", "p50", "p95", "p99", "max")
+        tree = ttk.Treeview(janela, columns=colunas, show="headings")
+        for coluna, titulo, largura in zip(
+            colunas,
+            ("OPERAÇÃO", "QTD", "P50 (ms)", "P95 (ms)", "P99 (ms)", "MÁX (ms)"),
+            (320, 60, 85, 85, 85, 85)
+        ):
+            tree.heading(coluna, text=titulo)
+            tree.column(coluna, width=largura, anchor="w" if coluna == "operacao" else "e")
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def atualizar():
+            tree.delete(*tree.get_children())
+            for item in metricas.estatisticas():
+                tree.insert("", "end", values=(
+                    item["nome"],
+                    item["quantidade"],
+                    f"{item['p50']:.1f}",
+                    f"{item['p95']:.1f}",
+                    f"{item['p99']:.1f}",
+                    f"{item['max']:.1f}"
+                ))
+
+        def gravar_log():
+            metricas.descarregar()
+            messagebox.showinfo("Desempenho", f"Medições gravadas em:\n{metricas.LOG_PATH}", parent=janela)
+
+        botoes = ctk.CTkFrame(janela, fg_color="transparent")
+        botoes.pack(fill="x", padx=10, pady=(0, 10))
+        ctk.CTkButton(botoes, text="ATUALIZAR", command=atualizar).pack(side="left", padx=5)
+        ctk.CTkButton(botoes, text="GRAVAR LOG", command=gravar_log).pack(side="left", padx=5)
+        ctk.CTkButton(botoes, text="FECHAR", command=janela.destroy, fg_color="red").pack(side="right", padx=5)
+
+        atualizar()
+
     def _sair_sistema(self):
         """Confirmação para fechar o sistema."""
         if messagebox.askyesno("Confirmação", "Deseja realmente sair do sistema?"):
             self.destroy()
 
-    def _atualizar_data_hora(self):
-        """Atualiza o horário no rodapé."""
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        self.status_label.configure(text=f"Online | {agora}")
-        self.after(1000, self._atualizar_data_hora)
-
 
 if __name__ == "__main__":
     app = SistemaAustral()
@@ -0,0 +1,222 @@
+"""
+Camada de acesso a dados compartilhada pelas ferramentas do Sistema Austral.
+
+Todas as ferramentas que usam o assets/austral.db passam por aqui: um pequeno
+pool de conexões reaproveitadas (modo WAL, busy timeout e cache de comandos
+preparados) e transações explícitas com nova tentativa em caso de
+"database is locked".
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import metricas
+import migracoes
+
+# Caminhos padrão
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+DB_PATH = os.path.join(ASSETS_DIR, "austral.db")
+
+# Parâmetros do pool
+TAMANHO_POOL = 4
+BUSY_TIMEOUT_MS = 5000
+CACHE_COMANDOS = 256
+TENTATIVAS_BLOQUEIO = 5
+ESPERA_BLOQUEIO = 0.05  # segundos, dobra a cada nova tentativa
+
+
+def _banco_bloqueado(erro):
+    """Indica se o erro do SQLite é de banco bloqueado/ocupado"""
+    mensagem = str(erro).lower()
+    return "locked" in mensagem or "busy" in mensagem
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite reutilizáveis entre janelas e threads."""
+
+    def __init__(self, caminho=DB_PATH, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+    def _nova_conexao(self):
+        """Abre e configura uma nova conexão com o banco"""
+        pasta = os.path.dirname(self.caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+        # isolation_level=None: o controle de transação é feito por transacao()
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=CACHE_COMANDOS
+        )
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def obter(self):
+        """Retira uma conexão do pool, criando uma nova se houver espaço"""
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            pode_criar = self._criadas < self.tamanho
+            if pode_criar:
+                self._criadas += 1
+
+        if pode_criar:
+            try:
+                return self._nova_conexao()
+            except sqlite3.Error:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+
+        # Pool cheio: aguarda uma conexão ser devolvida
+        return self._livres.get()
+
+    def devolver(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações esquecidas"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put(conn)
+
+    def fechar(self):
+        """Fecha todas as conexões livres do pool"""
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._criadas -= 1
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool durante o bloco with"""
+        conn = self.obter()
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool compartilhado, criando-o (e migrando o banco) no primeiro uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = PoolConexoes(DB_PATH)
+            with pool.conexao() as conn:
+                migracoes.aplicar_migracoes(conn)
+            _pool = pool
+        return _pool
+
+
+def inicializar():
+    """Garante que o banco existe e está na versão mais recente do schema"""
+    obter_pool()
+
+
+def definir_caminho(caminho):
+    """Aponta o pool compartilhado para outro arquivo de banco"""
+    global DB_PATH, _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+        DB_PATH = caminho
+        _pool = None
+
+
+@lru_cache(maxsize=512)
+def rotulo_sql(sql):
+    """Nome curto de um comando para as métricas, ex.: 'sql.SELECT pedidos'"""
+    palavras = sql.replace("(", " ").split()
+    if not palavras:
+        return "sql"
+    verbo = palavras[0].upper()
+    for i, palavra in enumerate(palavras[:-1]):
+        if palavra.upper() in ("FROM", "INTO", "UPDATE"):
+            return f"sql.{verbo} {palavras[i + 1]}"
+    return f"sql.{verbo}"
+
+
+@contextmanager
+def conexao():
+    """Empresta uma conexão do pool compartilhado (modo autocommit)"""
+    with obter_pool().conexao() as conn:
+        yield conn
+
+
+def _iniciar_transacao(conn):
+    """Executa BEGIN IMMEDIATE, tentando novamente se o banco estiver bloqueado"""
+    espera = ESPERA_BLOQUEIO
+    for tentativa in range(TENTATIVAS_BLOQUEIO):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if not _banco_bloqueado(e) or tentativa == TENTATIVAS_BLOQUEIO - 1:
+                raise
+            time.sleep(espera)
+            espera *= 2
+
+
+@contextmanager
+def transacao():
+    """
+    Abre uma transação explícita de escrita.
+
+    Faz COMMIT ao final do bloco with ou ROLLBACK se ocorrer uma exceção.
+    """
+    with conexao() as conn, metricas.medir("banco.transacao"):
+        _iniciar_transacao(conn)
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+
+def consultar(sql, params=()):
+    """Executa uma consulta e retorna todas as linhas"""
+    with conexao() as conn, metricas.medir(rotulo_sql(sql)):
+        return conn.execute(sql, params).fetchall()
+
+
+def consultar_um(sql, params=()):
+    """Executa uma consulta e retorna apenas a primeira linha"""
+    with conexao() as conn, metricas.medir(rotulo_sql(sql)):
+        return conn.execute(sql, params).fetchone()
+
+
+def executar(sql, params=()):
+    """Executa um comando de escrita em sua própria transação"""
+    with transacao() as conn, metricas.medir(rotulo_sql(sql)):
+        return conn.execute(sql, params)
+
+
+def executar_varios(sql, seq_params):
+    """Executa o mesmo comando para vários parâmetros em uma única transação"""
+    with transacao() as conn, metricas.medir(rotulo_sql(sql)):
+        return conn.executemany(sql, seq_params)
@@ -0,0 +1,403 @@
+"""
+Benchmark dos caminhos mais usados das ferramentas, sem interface gráfica.
+
+Gera uma base sintética (com semente fixa) para as seis lojas ao longo de
+vários anos — pedidos, defeitos, movimentações do fundo fixo e arquivos
+vendas_*.json — e mede as consultas e cálculos por trás das telas. O
+resultado sai em JSON para comparar uma execução com a outra.
+
+Uso:
+    python benchmark.py
+    python benchmark.py --anos 5 --repeticoes 10 --saida resultado.json
+    python benchmark.py --banco /tmp/austral_grande.db --manter
+
+Por padrão a base é criada em uma pasta temporária; o assets/austral.db
+só é usado se for passado explicitamente em --banco.
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import banco
+import datas
+import defeitos
+import fundo_fixo
+import metricas
+import oms
+import sistema_jessica
+from lojas import lojas
+from tabela_virtual import TAMANHO_PAGINA
+from tarefas import Tarefa
+
+LOJAS = [loja["loja"] for loja in lojas]
+RESPONSAVEIS = ["ANA", "BRUNO", "CARLA", "DIEGO", "JESSICA", "MARCOS"]
+TIPOS_DEFEITO = ["GARANTIA", "CLIENTE"]
+TAMANHOS = ["P", "M", "G", "GG"]
+DESCRICOES_DEFEITO = [
+    "COSTURA ABERTA", "MANCHA NO TECIDO", "ZIPER QUEBRADO", "BOTAO SOLTO",
+    "FURO NA PECA", "DESBOTADO APOS LAVAGEM", "ETIQUETA ERRADA", "FIO PUXADO"
+]
+DESCRICOES_FUNDO = [
+    "TROCO", "CAFE", "MATERIAL DE LIMPEZA", "CORREIOS", "ESTACIONAMENTO",
+    "REPOSICAO DO FUNDO", "MOTOBOY", "MATERIAL DE ESCRITORIO"
+]
+PAGAMENTOS = [
+    ("Dinheiro", "", ""), ("PIX", "", ""), ("Troca", "", ""),
+    ("Visa - Crédito", "POS Rede", "Visa"), ("Visa - Débito", "POS Rede", "Visa"),
+    ("Mastercard - Crédito", "PDV", "Mastercard"), ("Elo - Débito", "PDV", "Elo"),
+    ("American Express - Crédito", "Link Rede", "American Express")
+]
+
+# Volumes médios por dia
+PEDIDOS_POR_DIA = 30
+DEFEITOS_POR_LOJA_DIA = 2
+MOVIMENTACOES_POR_DIA = 6
+VENDAS_POR_LOJA_DIA = 40
+CATALOGO_PRODUTOS = 3000
+
+
+def _datas_do_periodo(anos, hoje):
+    """Lista os dias do período, do mais antigo até hoje"""
+    inicio = hoje - timedelta(days=365 * anos)
+    return [inicio + timedelta(days=i) for i in range((hoje - inicio).days + 1)]
+
+
+def gerar_pedidos(rnd, dias, hoje):
+    """Gera as linhas da tabela pedidos"""
+    linhas = []
+    numero = 100000
+    for dia in dias:
+        for _ in range(rnd.randint(PEDIDOS_POR_DIA // 2, PEDIDOS_POR_DIA * 3 // 2)):
+            numero += 1
+            enviado = (hoje - dia).days > 2 or rnd.random() < 0.3
+            envio = dia + timedelta(days=rnd.randint(0, 2))
+            linhas.append((
+                dia.strftime(datas.FORMATO_ISO),
+                rnd.choice(RESPONSAVEIS),
+                str(numero),
+                "Enviado" if enviado else "Faturado",
+                envio.strftime(datas.FORMATO_ISO) if enviado else None,
+                rnd.choice(RESPONSAVEIS) if enviado else None
+            ))
+    return linhas
+
+
+def gerar_defeitos(rnd, dias, hoje):
+    """Gera as linhas da tabela defeitos"""
+    linhas = []
+    for dia in dias:
+        resolvido_chance = 0.9 if (hoje - dia).days > 30 else 0.2
+        for loja in LOJAS:
+            for _ in range(rnd.randint(0, DEFEITOS_POR_LOJA_DIA * 2)):
+                linhas.append((
+                    dia.strftime(datas.FORMATO_ISO),
+                    rnd.choice(TIPOS_DEFEITO),
+                    f"AU{rnd.randint(1, CATALOGO_PRODUTOS):05d}",
+                    rnd.choice(TAMANHOS),
+                    rnd.choice(RESPONSAVEIS),
+                    rnd.choice(DESCRICOES_DEFEITO),
+                    "",
+                    loja,
+                    "Resolvido" if rnd.random() < resolvido_chance else "Pendente"
+                ))
+    return linhas
+
+
+def gerar_movimentacoes(rnd, dias, valor_fundo):
+    """Gera as movimentações do fundo fixo com os saldos já calculados"""
+    estado = {
+        "valor_fundo": valor_fundo,
+        "saldo_atual": valor_fundo,
+        "depositos_pendentes": 0.0,
+        "reposicoes_pendentes": 0.0
+    }
+    linhas = []
+    for dia in dias:
+        quantidade = rnd.randint(1, MOVIMENTACOES_POR_DIA * 2 - 1)
+        for minuto in sorted(rnd.sample(range(9 * 60, 22 * 60), quantidade)):
+            entrada = rnd.random() < 0.4
+            valor = round(rnd.uniform(5, 300 if entrada else 120), 2)
+            if entrada:
+                fundo_fixo.aplicar_entrada(estado, valor)
+            else:
+                fundo_fixo.aplicar_saida(estado, valor)
+            momento = dia.replace(hour=minuto // 60, minute=minuto % 60)
+            linhas.append((
+                momento.strftime(datas.FORMATO_ISO_HORA),
+                "Entrada" if entrada else "Saída",
+                valor,
+                rnd.choice(RESPONSAVEIS),
+                rnd.choice(DESCRICOES_FUNDO),
+                estado["saldo_atual"]
+            ))
+    return linhas
+
+
+def gerar_vendas(rnd, pasta, dias):
+    """
+    Grava um vendas_YYYYMMDD.json por dia, como o SistemaCaixa faz.
+
+    Retorna (arquivos gravados, total de vendas).
+    """
+    arquivos = []
+    boleta = 0
+    for dia in dias:
+        vendas = []
+        for _ in LOJAS:
+            for _ in range(rnd.randint(VENDAS_POR_LOJA_DIA // 2, VENDAS_POR_LOJA_DIA * 3 // 2)):
+                boleta += 1
+                tipo, detalhes, bandeira = rnd.choice(PAGAMENTOS)
+                vendas.append(sistema_jessica.Venda(
+                    vendedor=rnd.choice(sistema_jessica.SistemaCaixa.VENDEDORES),
+                    tipo_pagamento=tipo,
+                    detalhes_pagamento=detalhes,
+                    bandeira=bandeira,
+                    valor=round(rnd.uniform(50, 2500), 2),
+                    numero_boleta=str(boleta),
+                    troca=tipo == "Troca",
+                    data=dia.strftime("%d/%m/%Y %H:%M:%S")
+                ).to_dict())
+        caminho = os.path.join(pasta, f"vendas_{dia.strftime('%Y%m%d')}.json")
+        with open(caminho, 'w', encoding='utf-8') as file:
+            json.dump(vendas, file, ensure_ascii=False, indent=2)
+        arquivos.append(caminho)
+    return arquivos, boleta
+
+
+def gerar_base(caminho_banco, pasta_vendas, anos, semente, dias_vendas):
+    """Cria a base sintética e retorna o volume de cada tabela"""
+    rnd = random.Random(semente)
+    hoje = datetime(2025, 1, 31)  # data fixa: a mesma semente gera sempre a mesma base
+    dias = _datas_do_periodo(anos, hoje)
+    valor_fundo = 1000.00
+
+    banco.definir_caminho(caminho_banco)
+    banco.inicializar()
+
+    pedidos = gerar_pedidos(rnd, dias, hoje)
+    lista_defeitos = gerar_defeitos(rnd, dias, hoje)
+    movimentacoes = gerar_movimentacoes(rnd, dias, valor_fundo)
+
+    with banco.transacao() as conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO pedidos (data_faturamento, responsavel_faturamento,
+                                           numero_pedido, status, data_envio, responsavel_envio)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', pedidos)
+        conn.executemany('''
+            INSERT INTO defeitos (data_defeito, tipo_defeito, codigo_produto, tamanho,
+                                  nome_vendedor, descricao_defeito, observacoes, loja, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', lista_defeitos)
+        conn.executemany('''
+            INSERT INTO movimentacoes (data, tipo, valor, responsavel, descricao, saldo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', movimentacoes)
+        conn.execute('''
+            INSERT INTO config_fundo (valor_fundo, depositos_pendentes, reposicoes_pendentes)
+            VALUES (?, 0, 0)
+        ''', (valor_fundo,))
+
+    with banco.conexao() as conn:
+        conn.execute("ANALYZE")
+
+    arquivos, boletas = gerar_vendas(rnd, pasta_vendas, dias[-dias_vendas:])
+
+    return {
+        "pedidos": len(pedidos),
+        "defeitos": len(lista_defeitos),
+        "movimentacoes": len(movimentacoes),
+        "arquivos_vendas": len(arquivos),
+        "vendas": boletas
+    }, arquivos
+
+
+def medir(funcao, repeticoes):
+    """Executa a função várias vezes e retorna as estatísticas em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "repeticoes": repeticoes,
+        "min_ms": round(min(tempos), 3),
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "media_ms": round(statistics.fmean(tempos), 3),
+        "max_ms": round(max(tempos), 3)
+    }
+
+
+def _percorrer(fonte, paginas):
+    """Lê as primeiras páginas de uma fonte, como a rolagem da tabela faz"""
+    for _ in range(paginas):
+        if not fonte.proxima_pagina(TAMANHO_PAGINA):
+            break
+    return fonte
+
+
+def _pesquisa_defeitos(termo, status_filtro, loja_filtro):
+    """Primeira página da pesquisa de defeitos com os filtros informados"""
+    fonte = defeitos.fonte_pesquisa(termo, status_filtro, loja_filtro)
+    return fonte.proxima_pagina(TAMANHO_PAGINA)
+
+
+def executar_benchmarks(pasta, arquivos_vendas, repeticoes, repeticoes_exportacao):
+    """Mede os caminhos críticos e retorna {nome: estatísticas}"""
+    resultados = {}
+    ano_atual = "01/01/2025", "31/01/2025"
+    ano_inteiro = "01/02/2024", "31/01/2025"
+
+    # OMS: listagem de pedidos
+    resultados["oms.carregar_dados"] = medir(
+        lambda: oms.fonte_pedidos().proxima_pagina(TAMANHO_PAGINA), repeticoes
+    )
+    resultados["oms.carregar_dados.rolagem_10_paginas"] = medir(
+        lambda: _percorrer(oms.fonte_pedidos(), 10), repeticoes
+    )
+
+    # Defeitos: pesquisa e estatísticas
+    filtros = {
+        "sem_filtro": ("", "Todos", "Todas"),
+        "status": ("", "Pendentes", "Todas"),
+        "loja_status": ("", "Pendentes", LOJAS[0]),
+        "termo": ("AU0012", "Todos", "Todas"),
+    }
+    for nome, filtro in filtros.items():
+        resultados[f"defeitos.pesquisar.{nome}"] = medir(
+            lambda filtro=filtro: _pesquisa_defeitos(*filtro), repeticoes
+        )
+    resultados["defeitos.atualizar_estatisticas"] = medir(defeitos.contar_defeitos, repeticoes)
+
+    # Fundo fixo: carga, recálculo e resumo do período
+    resultados["fundo_fixo.carregar_historico"] = medir(
+        lambda: fundo_fixo.fonte_movimentacoes().proxima_pagina(TAMANHO_PAGINA), repeticoes
+    )
+    dados = {"valor_fundo": 1000.00}
+    resultados["fundo_fixo.recalcular_saldos"] = medir(
+        lambda: fundo_fixo.recalcular(dados), repeticoes
+    )
+    resultados["fundo_fixo.carregar_saldos"] = medir(
+        lambda: fundo_fixo.carregar_saldos(dados), repeticoes
+    )
+    # Correção recente: parte do checkpoint anterior às últimas 100 movimentações
+    recente = banco.consultar_um("SELECT id FROM movimentacoes ORDER BY id DESC LIMIT 1 OFFSET 99")
+    recente = recente[0] if recente else None
+    resultados["fundo_fixo.recalcular_saldos.recente"] = medir(
+        lambda: fundo_fixo.recalcular(dados, recente), repeticoes
+    )
+    resultados["fundo_fixo.gerar_resumo_periodo.mes"] = medir(
+        lambda: fundo_fixo.consultar_periodo(*ano_atual), repeticoes
+    )
+    resultados["fundo_fixo.gerar_resumo_periodo.ano"] = medir(
+        lambda: fundo_fixo.consultar_periodo(*ano_inteiro), repeticoes
+    )
+
+    # Sistema de caixa: resumo do dia (leitura do JSON + agregação)
+    if arquivos_vendas:
+        arquivo_dia = arquivos_vendas[-1]
+        vendas_dia = sistema_jessica.ler_vendas(arquivo_dia)
+        resultados["sistema_caixa.carregar_vendas"] = medir(
+            lambda: sistema_jessica.ler_vendas(arquivo_dia), repeticoes
+        )
+        resultados["sistema_caixa.atualizar_resumo"] = medir(
+            lambda: sistema_jessica.resumir_vendas(vendas_dia), repeticoes
+        )
+
+    # Exportações para Excel
+    resultados["oms.exportar_excel"] = medir(
+        lambda: oms.exportar_pedidos(
+            Tarefa(queue.Queue()), os.path.join(pasta, "pedidos.xlsx")
+        ),
+        repeticoes_exportacao
+    )
+    resultados["defeitos.exportar_excel"] = medir(
+        lambda: defeitos.exportar_defeitos(
+            Tarefa(queue.Queue()), os.path.join(pasta, "defeitos.xlsx")
+        ),
+        repeticoes_exportacao
+    )
+
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das ferramentas do Sistema Austral")
+    parser.add_argument("--anos", type=int, default=3, help="anos de histórico gerados (padrão: 3)")
+    parser.add_argument("--semente", type=int, default=42, help="semente do gerador (padrão: 42)")
+    parser.add_argument("--dias-vendas", type=int, default=30,
+                        help="dias de arquivos vendas_*.json gerados (padrão: 30)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições por medição (padrão: 5)")
+    parser.add_argument("--repeticoes-exportacao", type=int, default=1,
+                        help="repetições das exportações para Excel (padrão: 1)")
+    parser.add_argument("--banco", help="arquivo do banco gerado (padrão: pasta temporária)")
+    parser.add_argument("--saida", help="grava o JSON neste arquivo em vez de imprimir")
+    parser.add_argument("--manter", action="store_true", help="não apaga a pasta temporária")
+    args = parser.parse_args(argv)
+
+    caminho_original = banco.DB_PATH
+    pasta = tempfile.mkdtemp(prefix="austral_bench_")
+    caminho_banco = args.banco or os.path.join(pasta, "austral.db")
+    # As medições do próprio benchmark não devem ir para o log da loja
+    metricas.LOG_PATH = os.path.join(pasta, "metricas.log")
+    if os.path.exists(caminho_banco):
+        shutil.rmtree(pasta, ignore_errors=True)
+        parser.error(f"o banco {caminho_banco} já existe; informe um arquivo novo")
+
+    try:
+        inicio = time.perf_counter()
+        volumes, arquivos_vendas = gerar_base(
+            caminho_banco, pasta, args.anos, args.semente, args.dias_vendas
+        )
+        tempo_geracao = time.perf_counter() - inicio
+
+        resultados = executar_benchmarks(
+            pasta, arquivos_vendas, args.repeticoes, args.repeticoes_exportacao
+        )
+    finally:
+        banco.definir_caminho(caminho_original)
+        metricas.descarregar()
+        if not args.manter:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    relatorio = {
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform()
+        },
+        "parametros": {
+            "anos": args.anos,
+            "semente": args.semente,
+            "dias_vendas": args.dias_vendas,
+            "repeticoes": args.repeticoes,
+            "repeticoes_exportacao": args.repeticoes_exportacao,
+            "banco": args.banco
+        },
+        "volumes": volumes,
+        "geracao_s": round(tempo_geracao, 3),
+        "resultados": resultados
+    }
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as file:
+            file.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Conversão de datas entre o formato gravado no banco e o exibido na tela.
+
+As datas são gravadas em ISO-8601 ('YYYY-MM-DD' ou 'YYYY-MM-DD HH:MM'), que
+ordena corretamente como texto e permite consultas por intervalo usando
+índices. O formato brasileiro ('dd/mm/YYYY') é usado apenas na exibição.
+"""
+
+from datetime import datetime, timedelta
+
+FORMATO_BR = "%d/%m/%Y"
+FORMATO_ISO = "%Y-%m-%d"
+FORMATO_ISO_HORA = "%Y-%m-%d %H:%M"
+
+
+def hoje_iso():
+    """Data atual no formato gravado no banco"""
+    return datetime.now().strftime(FORMATO_ISO)
+
+
+def agora_iso():
+    """Data e hora atual (até minutos) no formato gravado no banco"""
+    return datetime.now().strftime(FORMATO_ISO_HORA)
+
+
+def para_br(valor):
+    """
+    Formata uma data ISO do banco para exibição (dd/mm/YYYY [HH:MM]).
+
+    Valores vazios ou que não estão em ISO são devolvidos sem alteração.
+    """
+    if not valor or len(valor) < 10 or valor[4] != "-" or valor[7] != "-":
+        return valor or ""
+    return f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}{valor[10:]}"
+
+
+def intervalo_iso(data_ini_br, data_fim_br):
+    """
+    Converte um período digitado (dd/mm/YYYY) em limites ISO [início, fim).
+
+    O fim é exclusivo (dia seguinte à data final), para que a consulta
+    'coluna >= ? AND coluna < ?' inclua os horários do último dia.
+    Levanta ValueError se alguma data for inválida.
+    """
+    data_ini = datetime.strptime(data_ini_br, FORMATO_BR)
+    data_fim = datetime.strptime(data_fim_br, FORMATO_BR) + timedelta(days=1)
+    return data_ini.strftime(FORMATO_ISO), data_fim.strftime(FORMATO_ISO)
+
+
+def sql_converter_coluna(tabela, coluna):
+    """
+    Gera o UPDATE que converte, no próprio banco, 'dd/mm/YYYY[ resto]' em ISO.
+
+    Linhas que já estão em ISO (ou vazias) não casam com o GLOB e não são
+    tocadas, então o comando pode ser repetido com segurança.
+    """
+    return f"""
+        UPDATE {tabela}
+        SET {coluna} = substr({coluna}, 7, 4) || '-' || substr({coluna}, 4, 2)
+                       || '-' || substr({coluna}, 1, 2) || substr({coluna}, 11)
+        WHERE {coluna} GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+    """
@@ -1,10 +1,19 @@
-import os
+import json
 import sqlite3
+from collections import OrderedDict
 from datetime import datetime
-import pandas as pd
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 
+import anomalias
+import banco
+import datas
+import exportacao
+import janelas
+import metricas
+from tabela_virtual import FonteConsulta, TabelaVirtual, ler_pagina
+from tarefas import ExecutorTarefas
+
 # Configurações globais
 COLORS = {
     "background": "#0F0F0F",
@@ -25,17 +34,300 @@ FONTS = {
     "small": ("Helvetica", 12)
 }
 
+# Valores do filtro de status -> valor gravado na coluna status
+STATUS_FILTRO = {
+    "Pendentes": "Pendente",
+    "Resolvidos": "Resolvido"
+}
+
+PERFIL_EXPORTACAO = "defeitos"  # marca da exportação de alterações
+ATRASO_PESQUISA_MS = 150  # espera após a última tecla antes de pesquisar
+CAPACIDADE_CACHE = 128  # registros completos mantidos para a edição
+ALERTAS_EXIBIDOS = 5  # alertas de picos mostrados na barra lateral
+
+# Colunas do registro completo usado pelo formulário
+COLUNAS_REGISTRO = (
+    "id", "data_defeito", "tipo_defeito", "codigo_produto", "tamanho",
+    "nome_vendedor", "descricao_defeito", "observacoes", "loja", "status"
+)
+
+
+def expressao_busca(termo):
+    """
+    Converte o texto digitado em uma consulta FTS5 por prefixo.
+
+    Cada palavra vira uma frase entre aspas com '*' (todas precisam casar),
+    então 'ABC-12 jo' encontra 'ABC-123' vendido por 'JOÃO'.
+    """
+    palavras = [p.replace('"', '""') for p in termo.split()]
+    return " ".join(f'"{p}"*' for p in palavras if any(c.isalnum() for c in p))
+
+
+def fonte_pesquisa(termo, status_filtro="Todos", loja_filtro="Todas"):
+    """
+    Fonte paginada da listagem de defeitos a partir dos filtros.
+
+    Sem termo, lista dos mais recentes para os mais antigos; com termo, busca
+    no índice defeitos_fts e ordena pela relevância (bm25, com mais peso para
+    código e vendedor).
+    """
+    expressao = expressao_busca(termo) if termo else ""
+    params = []
+    if expressao:
+        query = """
+            SELECT d.id, d.data_defeito, d.tipo_defeito, d.codigo_produto,
+                   d.tamanho, d.nome_vendedor, d.loja, d.status,
+                   bm25(defeitos_fts, 10.0, 5.0, 2.0, 1.0) AS relevancia
+            FROM defeitos_fts
+            JOIN defeitos d ON d.id = defeitos_fts.rowid
+            WHERE defeitos_fts MATCH ?
+        """
+        params.append(expressao)
+    else:
+        query = """
+            SELECT d.id, d.data_defeito, d.tipo_defeito, d.codigo_produto,
+                   d.tamanho, d.nome_vendedor, d.loja, d.status
+            FROM defeitos d
+            WHERE 1=1
+        """
+
+    # Comparações de igualdade com o valor gravado usam os índices
+    if status_filtro != "Todos":
+        query += " AND d.status = ?"
+        params.append(STATUS_FILTRO.get(status_filtro, status_filtro))
+
+    if loja_filtro != "Todas":
+        query += " AND d.loja = ?"
+        params.append(loja_filtro.upper())
+
+    if expressao:
+        # bm25: quanto menor, mais relevante
+        return FonteConsulta(query, params, chave=("relevancia", "id"), decrescente=False)
+    return FonteConsulta(query, params, chave=("data_defeito", "id"))
+
+
+def atendem_filtro(filtro, ids):
+    """Ids (dentre os informados) dos defeitos que atendem ao filtro (termo, status, loja)"""
+    fonte = fonte_pesquisa(*filtro)
+    linhas = banco.consultar(
+        f"SELECT id FROM ({fonte.sql}) WHERE id IN (SELECT value FROM json_each(?))",
+        fonte.params + (json.dumps([int(i) for i in ids]),)
+    )
+    return {linha[0] for linha in linhas}
+
+
+@metricas.medido
+def buscar_defeito(defeito_id):
+    """Retorna o registro completo (dict) do defeito pelo id, ou None"""
+    row = banco.consultar_um(
+        f"SELECT {', '.join(COLUNAS_REGISTRO)} FROM defeitos WHERE id = ?",
+        (defeito_id,)
+    )
+    return dict(zip(COLUNAS_REGISTRO, row)) if row else None
+
+
+class CacheRegistros:
+    """Cache LRU dos registros completos de defeitos, por id."""
+
+    def __init__(self, capacidade=CAPACIDADE_CACHE):
+        self.capacidade = capacidade
+        self._registros = OrderedDict()
+
+    def obter(self, defeito_id):
+        """Retorna o registro do cache ou o busca no banco pela chave primária"""
+        defeito_id = int(defeito_id)
+        registro = self._registros.get(defeito_id)
+        if registro is not None:
+            self._registros.move_to_end(defeito_id)
+            return registro
+
+        registro = buscar_defeito(defeito_id)
+        if registro is not None:
+            self._registros[defeito_id] = registro
+            if len(self._registros) > self.capacidade:
+                self._registros.popitem(last=False)
+        return registro
+
+    def descartar(self, ids):
+        """Remove do cache os registros alterados ou excluídos"""
+        for defeito_id in ids:
+            self._registros.pop(int(defeito_id), None)
+
+
+@metricas.medido
+def resolver_defeitos(ids):
+    """Marca vários defeitos como resolvidos em um único UPDATE"""
+    with banco.transacao() as conn:
+        return conn.execute('''
+            UPDATE defeitos
+            SET status = 'Resolvido'
+            WHERE id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps([int(i) for i in ids]),)).rowcount
+
+
+@metricas.medido
+def excluir_defeitos(ids):
+    """Exclui vários defeitos em um único DELETE"""
+    with banco.transacao() as conn:
+        return conn.execute(
+            'DELETE FROM defeitos WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps([int(i) for i in ids]),)
+        ).rowcount
+
+
+@metricas.medido
+def contagem_por_loja():
+    """Retorna {loja: {status: quantidade}} dos contadores mantidos por triggers"""
+    contagem = {}
+    for loja, status, quantidade in banco.consultar(
+        "SELECT loja, status, quantidade FROM defeitos_contagem WHERE quantidade > 0"
+    ):
+        contagem.setdefault(loja, {})[status] = quantidade
+    return contagem
+
+
+def totalizar(contagem):
+    """Retorna (total, pendentes, resolvidos) de uma contagem por loja"""
+    total = pendentes = resolvidos = 0
+    for por_status in contagem.values():
+        total += sum(por_status.values())
+        pendentes += por_status.get("Pendente", 0)
+        resolvidos += por_status.get("Resolvido", 0)
+    return total, pendentes, resolvidos
+
+
+def total_filtrado(contagem, status_filtro="Todos", loja_filtro="Todas"):
+    """Quantidade de defeitos que atendem aos filtros de status e loja"""
+    status = STATUS_FILTRO.get(status_filtro, status_filtro)
+    loja = loja_filtro.upper()
+    return sum(
+        quantidade
+        for loja_contada, por_status in contagem.items()
+        if loja_filtro == "Todas" or loja_contada == loja
+        for status_contado, quantidade in por_status.items()
+        if status_filtro == "Todos" or status_contado == status
+    )
+
+
+# Agrupamentos da análise de Pareto: rótulo -> coluna de defeitos_diario
+DIMENSOES_ANALISE = {
+    "Produto": "codigo_produto",
+    "Defeito": "descricao_defeito",
+    "Tipo": "tipo_defeito",
+    "Loja": "loja"
+}
+
+
+@metricas.medido
+def ranking_defeitos(dimensao, inicio=None, fim=None, loja_filtro="Todas",
+                     status_filtro="Todos", limite=10):
+    """
+    Top-N da dimensão no período (limites ISO, fim exclusivo), lido do resumo
+    diário. Retorna (total, [(valor, quantidade, %, % acumulado)]).
+    """
+    coluna = DIMENSOES_ANALISE[dimensao]
+    condicoes, params = ["quantidade > 0"], []
+    if inicio:
+        condicoes.append("dia >= ?")
+        params.append(inicio)
+    if fim:
+        condicoes.append("dia < ?")
+        params.append(fim)
+    if loja_filtro != "Todas":
+        condicoes.append("loja = ?")
+        params.append(loja_filtro.upper())
+    if status_filtro != "Todos":
+        condicoes.append("status = ?")
+        params.append(STATUS_FILTRO.get(status_filtro, status_filtro))
+    where = " AND ".join(condicoes)
+
+    total = banco.consultar_um(
+        f"SELECT COALESCE(SUM(quantidade), 0) FROM defeitos_diario WHERE {where}", params
+    )[0]
+    linhas = banco.consultar(f'''
+        SELECT {coluna}, SUM(quantidade) AS quantidade
+        FROM defeitos_diario
+        WHERE {where}
+        GROUP BY {coluna}
+        ORDER BY quantidade DESC, {coluna}
+        LIMIT ?
+    ''', params + [limite])
+
+    ranking, acumulado = [], 0
+    for valor, quantidade in linhas:
+        acumulado += quantidade
+        ranking.append((valor, quantidade, quantidade * 100 / total, acumulado * 100 / total))
+    return total, ranking
+
+
+def contar_defeitos():
+    """Retorna (total, pendentes, resolvidos)"""
+    return totalizar(contagem_por_loja())
+
+
+def exportar_defeitos(tarefa, caminho, inicio=None, fim=None, alteracoes=False, por_loja=False):
+    """
+    Exporta os defeitos do período (limites ISO), com uma aba por loja se pedido.
+
+    Com alteracoes=True, só os inseridos ou alterados desde a última exportação.
+    """
+    desde = exportacao.ler_marca(PERFIL_EXPORTACAO) if alteracoes else None
+    where, params = exportacao.montar_filtro("data_defeito", inicio, fim, desde)
+    sql = f'''
+        SELECT
+            strftime('%d/%m/%Y', data_defeito) as "Data",
+            tipo_defeito as "Tipo",
+            codigo_produto as "Código",
+            tamanho as "Tamanho",
+            nome_vendedor as "Vendedor",
+            descricao_defeito as "Descrição",
+            observacoes as "Observações",
+            loja as "Loja",
+            status as "Status"
+        FROM defeitos{where}
+        ORDER BY data_defeito DESC, id DESC
+    '''
+    # Só uma exportação sem período cobre tudo até agora e pode avançar a marca
+    return exportacao.exportar(
+        tarefa, caminho, sql, params,
+        coluna_aba="Loja" if por_loja else None,
+        perfil=None if inicio or fim else PERFIL_EXPORTACAO,
+        sql_marca=f"SELECT atualizado_em, id FROM defeitos{where} "
+                  "ORDER BY atualizado_em DESC, id DESC LIMIT 1"
+    )
+
+
 class DefectManagerApp:
-    def __init__(self):
-        self.setup_main_window()
+    def __init__(self, master=None):
+        self.setup_main_window(master)
+        # Trabalhos demorados (exportação, pesquisa) rodam fora da thread da interface
+        self.tarefas = ExecutorTarefas(self.root)
+        self.tarefa_exportacao = None
+        self.tarefa_pesquisa = None
+        self.pesquisa_agendada = None
+        # Filtro da listagem exibida e quantos registros o atendem (contadores)
+        self.filtro_exibido = ("", "Todos", "Todas")
+        self.total_exibivel = None
         self.setup_database()
         self.init_ui()
         self.selected_id = None
         self.selected_item = None
-        
-    def setup_main_window(self):
+        self.registros = CacheRegistros()
+
+        # Detector de picos: reprocessa o histórico uma vez, em segundo plano
+        self.detector = anomalias.obter_detector()
+        if self.detector.pronto:
+            self.atualizar_alertas()
+        else:
+            self.tarefas.executar(
+                anomalias.reconstruir,
+                ao_concluir=lambda processados: self.atualizar_alertas(),
+                descricao="alertas"
+            )
+
+    def setup_main_window(self, master=None):
         """Configura a janela principal"""
-        self.root = ctk.CTk()
+        self.root = janelas.criar_janela(master)
         self.root.title("SISTEMA AUSTRAL - GESTÃO DE DEFEITOS")
         self.root.configure(fg_color="#0F0F0F")
         
@@ -97,6 +389,34 @@ class DefectManagerApp:
             )
             label.pack(pady=5)
             self.stats_labels[stat.lower()] = label
+
+        # Pendentes/total por loja, dos mesmos contadores
+        self.stats_lojas_label = ctk.CTkLabel(
+            stats_frame,
+            text="",
+            font=FONTS["small"],
+            justify="left"
+        )
+        self.stats_lojas_label.pack(pady=(5, 10))
+
+        # Alertas de picos de defeitos por produto
+        alertas_frame = ctk.CTkFrame(sidebar, fg_color=COLORS["secondary"])
+        alertas_frame.pack(fill="x", padx=10, pady=10)
+
+        ctk.CTkLabel(
+            alertas_frame,
+            text="Alertas",
+            font=FONTS["text"],
+            text_color=COLORS["warning"]
+        ).pack(pady=(5, 0))
+
+        self.alertas_label = ctk.CTkLabel(
+            alertas_frame,
+            text="Analisando histórico...",
+            font=FONTS["small"],
+            justify="left"
+        )
+        self.alertas_label.pack(pady=(0, 10), padx=10)
             
         # Ações rápidas
         actions_frame = ctk.CTkFrame(sidebar, fg_color=COLORS["secondary"])
@@ -111,13 +431,23 @@ class DefectManagerApp:
             hover_color="#0099CC"
         ).pack(pady=10, padx=10, fill="x")
         
-        ctk.CTkButton(
+        self.btn_exportar = ctk.CTkButton(
             actions_frame,
             text="Exportar Relatório",
             command=self.exportar_excel,
             font=FONTS["button"],
             fg_color=COLORS["success"],
             hover_color="#45a049"
+        )
+        self.btn_exportar.pack(pady=10, padx=10, fill="x")
+
+        ctk.CTkButton(
+            actions_frame,
+            text="Análise (Pareto)",
+            command=self.abrir_analise,
+            font=FONTS["button"],
+            fg_color=COLORS["primary"],
+            hover_color="#0099CC"
         ).pack(pady=10, padx=10, fill="x")
 
         # Versão e créditos no final da sidebar
@@ -176,6 +506,9 @@ class DefectManagerApp:
             font=FONTS["text"]
         )
         self.search_entry.pack(side="left", padx=(0, 10))
+        # Pesquisa enquanto digita, esperando uma pausa na digitação
+        self.search_entry.bind("<KeyRelease>", lambda e: self.agendar_pesquisa())
+        self.search_entry.bind("<Return>", lambda e: self.pesquisar())
         
         ctk.CTkButton(
             search_frame,
@@ -193,7 +526,8 @@ class DefectManagerApp:
             filter_options,
             values=["Todos", "Pendentes", "Resolvidos"],
             font=FONTS["text"],
-            width=150
+            width=150,
+            command=lambda valor: self.pesquisar()
         )
         self.filtro_status.pack(side="left", padx=5)
         
@@ -201,7 +535,8 @@ class DefectManagerApp:
             filter_options,
             values=["Todas", "Matriz", "Filial 1", "Filial 2"],
             font=FONTS["text"],
-            width=150
+            width=150,
+            command=lambda valor: self.pesquisar()
         )
         self.filtro_loja.pack(side="left", padx=5)
 
@@ -316,6 +651,25 @@ class DefectManagerApp:
             text="Registros",
             font=FONTS["subtitle"]
         ).pack(side="left")
+
+        # Quantos registros estão exibidos e quantos atendem ao filtro
+        self.contador_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=FONTS["small"],
+            fg_color=COLORS["secondary"],
+            corner_radius=8
+        )
+        self.contador_label.pack(side="left", padx=10)
+
+        self.btn_carregar_mais = ctk.CTkButton(
+            header_frame,
+            text="Carregar mais",
+            command=self.carregar_mais,
+            font=FONTS["small"],
+            width=110
+        )
+        self.btn_carregar_mais.pack(side="left")
         
         actions_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
         actions_frame.pack(side="right")
@@ -388,7 +742,18 @@ class DefectManagerApp:
         # Scrollbar
         scrollbar = ctk.CTkScrollbar(table_frame, command=self.tree.yview)
         scrollbar.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Tabela virtual: carrega as linhas por página conforme a rolagem
+        # iid de cada linha = defeitos.id: seleção e edições pela chave primária
+        self.tabela = TabelaVirtual(
+            self.tree,
+            scrollbar,
+            formatar=self.formatar_linha,
+            iid=lambda row: row["id"],
+            ao_carregar=self.atualizar_contador,
+            # Páginas seguintes (rolagem, "carregar mais") também fora da thread do Tk
+            tarefas=self.tarefas
+        )
         
         # Eventos da tabela
         self.tree.bind("<<TreeviewSelect>>", self.on_select)
@@ -410,40 +775,14 @@ class DefectManagerApp:
             font=FONTS["small"]
         )
         self.time_label.pack(side="right", padx=10)
-        self.update_clock()
-
-    def update_clock(self):
-        """Atualiza o relógio na barra de status"""
-        self.time_label.configure(
-            text=datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        janelas.registrar_relogio(
+            self.time_label,
+            lambda agora: agora.strftime("%d/%m/%Y %H:%M:%S")
         )
-        self.root.after(1000, self.update_clock)
 
     def setup_database(self):
         """Configura o banco de dados SQLite"""
-        self.assets_path = os.path.join(os.path.dirname(__file__), "assets")
-        if not os.path.exists(self.assets_path):
-            os.makedirs(self.assets_path)
-        self.db_path = os.path.join(self.assets_path, "austral.db")
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS defeitos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data_defeito TEXT,
-                tipo_defeito TEXT,
-                codigo_produto TEXT,
-                tamanho TEXT,
-                nome_vendedor TEXT,
-                descricao_defeito TEXT,
-                observacoes TEXT,
-                loja TEXT,
-                status TEXT DEFAULT 'Pendente'
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        banco.inicializar()
 
     def novo_registro(self):
         """Limpa os campos para um novo registro"""
@@ -454,81 +793,104 @@ class DefectManagerApp:
     def atualizar_estatisticas(self):
         """Atualiza as estatísticas na sidebar"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Total de registros
-            cursor.execute("SELECT COUNT(*) FROM defeitos")
-            total = cursor.fetchone()[0]
+            contagem = contagem_por_loja()
+            termo, status_filtro, loja_filtro = self.filtro_exibido
+            # Com termo de busca o total só é conhecido ao fim da rolagem
+            self.total_exibivel = None if termo else total_filtrado(contagem, status_filtro, loja_filtro)
+            self.atualizar_contador()
+
+            total, pendentes, resolvidos = totalizar(contagem)
             self.stats_labels["total"].configure(text=f"Total: {total}")
-            
-            # Registros pendentes
-            cursor.execute("SELECT COUNT(*) FROM defeitos WHERE status = 'Pendente'")
-            pendentes = cursor.fetchone()[0]
             self.stats_labels["pendentes"].configure(text=f"Pendentes: {pendentes}")
-            
-            # Registros resolvidos
-            cursor.execute("SELECT COUNT(*) FROM defeitos WHERE status = 'Resolvido'")
-            resolvidos = cursor.fetchone()[0]
             self.stats_labels["resolvidos"].configure(text=f"Resolvidos: {resolvidos}")
+            self.stats_lojas_label.configure(text="\n".join(
+                f"{loja or 'SEM LOJA'}: {por_status.get('Pendente', 0)} pend. / "
+                f"{sum(por_status.values())}"
+                for loja, por_status in sorted(contagem.items())
+            ))
             
         except sqlite3.Error as e:
             print(f"Erro ao atualizar estatísticas: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+    def atualizar_alertas(self):
+        """Mostra na barra lateral os alertas mais recentes do detector"""
+        recentes = list(self.detector.alertas)[-ALERTAS_EXIBIDOS:]
+        if not recentes:
+            self.alertas_label.configure(text="Nenhum pico detectado")
+            return
+        self.alertas_label.configure(text="\n".join(
+            f"{datas.para_br(a.dia)} {a.codigo_produto}: {a.quantidade} (média {a.media:.1f})"
+            for a in reversed(recentes)
+        ))
+
+    def atualizar_contador(self):
+        """Atualiza o selo 'exibindo X de Y' e o botão de carregar mais"""
+        exibidas = self.tabela.exibidas
+        if self.tabela.completa:
+            texto = f"{exibidas} registro(s)"
+        elif self.total_exibivel is not None:
+            texto = f"Exibindo {exibidas} de {self.total_exibivel}"
+        else:
+            texto = f"Exibindo {exibidas}+"
+        self.contador_label.configure(text=f"  {texto}  ")
+        self.btn_carregar_mais.configure(state="disabled" if self.tabela.completa else "normal")
+
+    def carregar_mais(self):
+        """Busca a próxima página sem precisar rolar até o fim"""
+        self.tabela.carregar_mais()
+
+    def agendar_pesquisa(self):
+        """Reinicia a espera da pesquisa a cada tecla (debounce)"""
+        if self.pesquisa_agendada is not None:
+            self.root.after_cancel(self.pesquisa_agendada)
+        self.pesquisa_agendada = self.root.after(ATRASO_PESQUISA_MS, self.pesquisar)
 
     def pesquisar(self):
-        """Realiza a pesquisa com base nos filtros"""
-        search_term = self.search_entry.get().strip().upper()
-        status_filtro = self.filtro_status.get()
-        loja_filtro = self.filtro_loja.get()
-        
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT data_defeito, tipo_defeito, codigo_produto, 
-                       tamanho, nome_vendedor, loja, status
-                FROM defeitos
-                WHERE 1=1
-            """
-            params = []
-            
-            if search_term:
-                query += """ AND (
-                    codigo_produto LIKE ? OR 
-                    nome_vendedor LIKE ? OR 
-                    descricao_defeito LIKE ?
-                )"""
-                params.extend([f"%{search_term}%"] * 3)
-            
-            if status_filtro != "Todos":
-                query += " AND status = ?"
-                params.append(status_filtro)
-                
-            if loja_filtro != "Todas":
-                query += " AND loja = ?"
-                params.append(loja_filtro)
-                
-            query += " ORDER BY data_defeito DESC"
-            
-            cursor.execute(query, params)
-            
-            # Limpa a tabela atual
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-                
-            # Preenche com os resultados
-            for row in cursor.fetchall():
-                self.tree.insert("", "end", values=row)
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("ERRO", f"Erro na pesquisa: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        """Realiza a pesquisa com base nos filtros, em segundo plano"""
+        if self.pesquisa_agendada is not None:
+            self.root.after_cancel(self.pesquisa_agendada)
+            self.pesquisa_agendada = None
+
+        # Uma pesquisa mais nova torna a anterior inútil: interrompe a consulta
+        # e a página da pesquisa exibida que ainda estiver sendo lida
+        if self.tarefa_pesquisa is not None:
+            self.tarefa_pesquisa.cancelar()
+        self.tabela.cancelar_carga()
+
+        filtro = (
+            self.search_entry.get().strip().upper(),
+            self.filtro_status.get(),
+            self.filtro_loja.get()
+        )
+
+        # Exibe os resultados por página: por relevância quando há termo,
+        # senão dos mais recentes para os mais antigos
+        fonte = fonte_pesquisa(*filtro)
+        tarefa = self.tarefas.executar(
+            ler_pagina,
+            fonte,
+            self.tabela.tamanho_pagina,
+            ao_concluir=lambda linhas: self.exibir_pesquisa(tarefa, fonte, linhas, filtro),
+            ao_erro=lambda erro: self.pesquisa_falhou(tarefa, erro),
+            descricao="pesquisa"
+        )
+        self.tarefa_pesquisa = tarefa
+
+    def exibir_pesquisa(self, tarefa, fonte, linhas, filtro):
+        """Mostra a primeira página da pesquisa, se ela ainda for a mais recente"""
+        if tarefa is not self.tarefa_pesquisa:
+            return
+        self.tarefa_pesquisa = None
+        self.filtro_exibido = filtro
+        self.tabela.exibir(fonte, linhas)
+        self.atualizar_estatisticas()
+
+    def pesquisa_falhou(self, tarefa, erro):
+        """Informa o erro da pesquisa mais recente"""
+        if tarefa is not self.tarefa_pesquisa:
+            return
+        self.tarefa_pesquisa = None
+        messagebox.showerror("ERRO", f"Erro na pesquisa: {str(erro)}")
 
     def validar_campos(self):
         """Valida os campos obrigatórios"""
@@ -557,64 +919,80 @@ class DefectManagerApp:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            data_atual = datetime.now().strftime('%d/%m/%Y')
-            
-            if self.selected_id:  # Atualização
-                cursor.execute('''
-                    UPDATE defeitos SET
-                        tipo_defeito = ?,
-                        codigo_produto = ?,
-                        tamanho = ?,
-                        nome_vendedor = ?,
-                        descricao_defeito = ?,
-                        observacoes = ?,
-                        loja = ?
-                    WHERE id = ?
-                ''', (
-                    self.tipo_defeito_entry.get(),
-                    self.codigo_produto_entry.get().strip().upper(),
-                    self.tamanho_entry.get(),
-                    self.nome_vendedor_entry.get().strip().upper(),
-                    self.descricao_defeito_entry.get(),
-                    self.observacoes_entry.get("1.0", "end-1c").strip(),
-                    self.loja_entry.get(),
-                    self.selected_id
-                ))
-                mensagem = "Registro atualizado com sucesso!"
-            else:  # Novo registro
-                cursor.execute('''
-                    INSERT INTO defeitos (
-                        data_defeito, tipo_defeito, codigo_produto,
-                        tamanho, nome_vendedor, descricao_defeito,
-                        observacoes, loja, status
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    data_atual,
-                    self.tipo_defeito_entry.get(),
-                    self.codigo_produto_entry.get().strip().upper(),
-                    self.tamanho_entry.get(),
-                    self.nome_vendedor_entry.get().strip().upper(),
-                    self.descricao_defeito_entry.get(),
-                    self.observacoes_entry.get("1.0", "end-1c").strip(),
-                    self.loja_entry.get(),
-                    "Pendente"
-                ))
-                mensagem = "Defeito registrado com sucesso!"
+            data_atual = datas.hoje_iso()
             
-            conn.commit()
+            # Mede só a gravação e a tabela, sem o tempo do usuário nos diálogos
+            with metricas.medir("defeitos.DefectManagerApp.adicionar_defeito"):
+                if self.selected_id:  # Atualização
+                    defeito_id = self.selected_id
+                    banco.executar('''
+                        UPDATE defeitos SET
+                            tipo_defeito = ?,
+                            codigo_produto = ?,
+                            tamanho = ?,
+                            nome_vendedor = ?,
+                            descricao_defeito = ?,
+                            observacoes = ?,
+                            loja = ?
+                        WHERE id = ?
+                    ''', (
+                        self.tipo_defeito_entry.get(),
+                        self.codigo_produto_entry.get().strip().upper(),
+                        self.tamanho_entry.get(),
+                        self.nome_vendedor_entry.get().strip().upper(),
+                        self.descricao_defeito_entry.get(),
+                        self.observacoes_entry.get("1.0", "end-1c").strip(),
+                        self.loja_entry.get(),
+                        defeito_id
+                    ))
+                    self.registros.descartar([defeito_id])
+                    # A edição pode tirar o registro do filtro exibido
+                    if defeito_id in atendem_filtro(self.filtro_exibido, [defeito_id]):
+                        self.tabela.substituir(self.registros.obter(defeito_id))
+                    else:
+                        self.tabela.remover([str(defeito_id)])
+                    mensagem = "Registro atualizado com sucesso!"
+                else:  # Novo registro
+                    cursor = banco.executar('''
+                        INSERT INTO defeitos (
+                            data_defeito, tipo_defeito, codigo_produto,
+                            tamanho, nome_vendedor, descricao_defeito,
+                            observacoes, loja, status
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        data_atual,
+                        self.tipo_defeito_entry.get(),
+                        self.codigo_produto_entry.get().strip().upper(),
+                        self.tamanho_entry.get(),
+                        self.nome_vendedor_entry.get().strip().upper(),
+                        self.descricao_defeito_entry.get(),
+                        self.observacoes_entry.get("1.0", "end-1c").strip(),
+                        self.loja_entry.get(),
+                        "Pendente"
+                    ))
+                    # O registro novo é o mais recente: entra no topo, sem recarregar,
+                    # se atender ao filtro exibido
+                    registro = self.registros.obter(cursor.lastrowid)
+                    if atendem_filtro(self.filtro_exibido, [registro["id"]]):
+                        self.tabela.inserir(registro)
+                    mensagem = "Defeito registrado com sucesso!"
+
+                    alerta = self.detector.registrar(
+                        registro["id"], registro["codigo_produto"], registro["data_defeito"]
+                    )
+                    if alerta:
+                        self.atualizar_alertas()
+                        mensagem += (
+                            f"\n\nATENÇÃO: {alerta.quantidade} defeitos hoje no produto "
+                            f"{alerta.codigo_produto} (média {alerta.media:.1f}/dia)."
+                        )
+
             messagebox.showinfo("SUCESSO", mensagem)
             self.limpar_campos()
-            self.carregar_dados()
             self.atualizar_estatisticas()
-            
+
         except sqlite3.Error as e:
             messagebox.showerror("ERRO", f"Erro ao salvar registro: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def marcar_como_resolvido(self):
         """Marca os registros selecionados como resolvidos"""
@@ -628,33 +1006,23 @@ class DefectManagerApp:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for item in selected_items:
-                valores = self.tree.item(item)['values']
-                codigo_produto = valores[2]  # Índice do código do produto
-                
-                cursor.execute('''
-                    UPDATE defeitos
-                    SET status = 'Resolvido'
-                    WHERE codigo_produto = ?
-                ''', (codigo_produto,))
-            
-            conn.commit()
+            with metricas.medir("defeitos.DefectManagerApp.marcar_como_resolvido"):
+                resolver_defeitos(selected_items)
+                self.registros.descartar(selected_items)
+                # Atualiza só a coluna de status; sai da tabela o que deixou de atender ao filtro
+                atendem = {str(i) for i in atendem_filtro(self.filtro_exibido, selected_items)}
+                self.tabela.remover([iid for iid in selected_items if iid not in atendem])
+                self.tabela.atualizar_linhas(atendem, {"STATUS": "Resolvido"})
+                self.atualizar_estatisticas()
+
             messagebox.showinfo(
                 "SUCESSO",
                 "Status atualizado com sucesso!",
                 parent=self.root
             )
-            self.carregar_dados()
-            self.atualizar_estatisticas()
             
         except sqlite3.Error as e:
             messagebox.showerror("ERRO", f"Erro ao atualizar status: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def excluir_defeito(self):
         """Exclui os registros selecionados"""
@@ -675,111 +1043,213 @@ class DefectManagerApp:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for item in selected_items:
-                valores = self.tree.item(item)['values']
-                codigo_produto = valores[2]
-                cursor.execute(
-                    'DELETE FROM defeitos WHERE codigo_produto = ?',
-                    (codigo_produto,)
-                )
-            
-            conn.commit()
+            with metricas.medir("defeitos.DefectManagerApp.excluir_defeito"):
+                excluir_defeitos(selected_items)
+                self.registros.descartar(selected_items)
+                self.tabela.remover(selected_items)
+                self.limpar_campos()
+                self.atualizar_estatisticas()
+
             messagebox.showinfo(
                 "SUCESSO",
                 "Registro(s) excluído(s) com sucesso!",
                 parent=self.root
             )
-            self.carregar_dados()
-            self.atualizar_estatisticas()
             
         except sqlite3.Error as e:
             messagebox.showerror("ERRO", f"Erro ao excluir registro(s): {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def exportar_excel(self):
-        """Exporta os dados para um arquivo Excel"""
+        """Exporta os defeitos para Excel ou CSV, opcionalmente por período e loja"""
+        # Com uma exportação em andamento, o botão passa a cancelá-la
+        if self.tarefa_exportacao is not None:
+            self.tarefa_exportacao.cancelar()
+            return
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            query = '''
-                SELECT 
-                    data_defeito as "Data",
-                    tipo_defeito as "Tipo",
-                    codigo_produto as "Código",
-                    tamanho as "Tamanho",
-                    nome_vendedor as "Vendedor",
-                    descricao_defeito as "Descrição",
-                    observacoes as "Observações",
-                    loja as "Loja",
-                    status as "Status"
-                FROM defeitos
-                ORDER BY data_defeito DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn)
-            
-            if df.empty:
-                messagebox.showwarning(
-                    "ATENÇÃO",
-                    "Não há dados para exportar!",
-                    parent=self.root
-                )
-                return
-            
-            data_atual = datetime.now().strftime("%d%m%Y")
-            nome_arquivo = f"defeitos_{data_atual}.xlsx"
-            
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                initialfile=nome_arquivo,
-                title="Salvar arquivo Excel",
-                filetypes=[("Excel files", "*.xlsx")],
+            with banco.conexao() as conn:
+                total = conn.execute("SELECT COUNT(*) FROM defeitos").fetchone()[0]
+        except sqlite3.Error as e:
+            messagebox.showerror("ERRO", f"Erro ao exportar dados: {str(e)}")
+            return
+
+        if not total:
+            messagebox.showwarning(
+                "ATENÇÃO",
+                "Não há dados para exportar!",
                 parent=self.root
             )
-            
-            if file_path:
-                df.to_excel(file_path, index=False)
-                messagebox.showinfo(
-                    "SUCESSO",
-                    f"Dados exportados para {file_path}",
-                    parent=self.root
-                )
-                
-        except Exception as e:
-            messagebox.showerror("ERRO", f"Erro ao exportar dados: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+            return
 
-    def carregar_dados(self):
-        """Carrega os dados na tabela"""
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        opcoes = exportacao.pedir_opcoes(self.root, por_loja=True)
+        if opcoes is None:
+            return
+
+        data_atual = datetime.now().strftime("%d%m%Y")
+        nome_arquivo = f"defeitos_{data_atual}.xlsx"
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            initialfile=nome_arquivo,
+            title="Salvar exportação",
+            filetypes=exportacao.TIPOS_ARQUIVO,
+            parent=self.root
+        )
+
+        if file_path:
+            self.btn_exportar.configure(text="Cancelar Exportação")
+            self.tarefa_exportacao = self.tarefas.executar(
+                exportar_defeitos,
+                file_path,
+                opcoes["inicio"],
+                opcoes["fim"],
+                opcoes["alteracoes"],
+                opcoes["por_loja"],
+                ao_concluir=self.exportacao_concluida,
+                ao_erro=self.exportacao_falhou,
+                ao_progresso=self.exportacao_progresso,
+                ao_cancelar=self.exportacao_cancelada
+            )
+
+    def exportacao_progresso(self, feito, total):
+        """Mostra o andamento da exportação no botão"""
+        if total:
+            self.btn_exportar.configure(text=f"Cancelar ({feito * 100 // total}%)")
+
+    def exportacao_concluida(self, file_path):
+        """Finaliza a exportação com sucesso"""
+        self.finalizar_exportacao()
+        messagebox.showinfo(
+            "SUCESSO",
+            f"Dados exportados para {file_path}",
+            parent=self.root
+        )
+
+    def exportacao_falhou(self, erro):
+        """Finaliza a exportação com erro"""
+        self.finalizar_exportacao()
+        messagebox.showerror("ERRO", f"Erro ao exportar dados: {str(erro)}")
+
+    def exportacao_cancelada(self):
+        """Finaliza a exportação cancelada pelo usuário"""
+        self.finalizar_exportacao()
+        messagebox.showinfo("EXPORTAÇÃO", "Exportação cancelada.", parent=self.root)
+
+    def finalizar_exportacao(self):
+        """Restaura o botão de exportação"""
+        self.tarefa_exportacao = None
+        self.btn_exportar.configure(text="Exportar Relatório")
+
+    def abrir_analise(self):
+        """Abre a análise de Pareto dos defeitos por período"""
+        janela = ctk.CTkToplevel(self.root)
+        janela.title("Análise de Defeitos (Pareto)")
+        janela.geometry("880x520")
+        janela.configure(fg_color=COLORS["background"])
+        janela.transient(self.root)
+
+        filtros = ctk.CTkFrame(janela, fg_color="black")
+        filtros.pack(fill="x", padx=10, pady=10)
+
+        hoje = datetime.now()
+        self.analise_inicio = ctk.CTkEntry(filtros, width=110, font=FONTS["text"])
+        self.analise_inicio.insert(0, hoje.replace(day=1).strftime(datas.FORMATO_BR))
+        self.analise_fim = ctk.CTkEntry(filtros, width=110, font=FONTS["text"])
+        self.analise_fim.insert(0, hoje.strftime(datas.FORMATO_BR))
+        self.analise_dimensao = ctk.CTkComboBox(
+            filtros, values=list(DIMENSOES_ANALISE), width=110, font=FONTS["text"]
+        )
+        self.analise_loja = ctk.CTkComboBox(
+            filtros, values=["Todas", "Matriz", "Filial 1", "Filial 2"], width=110, font=FONTS["text"]
+        )
+        self.analise_status = ctk.CTkComboBox(
+            filtros, values=["Todos", "Pendentes", "Resolvidos"], width=110, font=FONTS["text"]
+        )
+        self.analise_limite = ctk.CTkComboBox(
+            filtros, values=["10", "20", "50"], width=70, font=FONTS["text"]
+        )
+
+        for rotulo, widget in (
+            ("De", self.analise_inicio), ("Até", self.analise_fim),
+            ("Por", self.analise_dimensao), ("Loja", self.analise_loja),
+            ("Status", self.analise_status), ("Top", self.analise_limite)
+        ):
+            ctk.CTkLabel(filtros, text=rotulo, font=FONTS["small"]).pack(side="left", padx=(8, 2))
+            widget.pack(side="left", pady=8)
+
+        ctk.CTkButton(
+            filtros, text="Atualizar", width=90, font=FONTS["text"],
+            command=self.atualizar_analise
+        ).pack(side="right", padx=8)
+
+        self.analise_total = ctk.CTkLabel(janela, text="", font=FONTS["text"])
+        self.analise_total.pack(pady=(0, 5))
+
+        colunas = ("#", "ITEM", "QTD", "%", "% ACUM.")
+        self.analise_tree = ttk.Treeview(janela, columns=colunas, show="headings", style="Treeview")
+        for coluna, largura in zip(colunas, (40, 300, 80, 80, 90)):
+            self.analise_tree.column(coluna, width=largura, anchor="w" if coluna == "ITEM" else "center")
+            self.analise_tree.heading(coluna, text=coluna)
+        self.analise_tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.atualizar_analise()
+
+    def atualizar_analise(self):
+        """Recalcula o ranking a partir do resumo diário"""
+        try:
+            inicio, fim = datas.intervalo_iso(self.analise_inicio.get().strip(), self.analise_fim.get().strip())
+        except ValueError:
+            messagebox.showwarning("ATENÇÃO", "Use datas no formato dd/mm/aaaa.",
+                                   parent=self.analise_tree.winfo_toplevel())
+            return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT data_defeito, tipo_defeito, codigo_produto, tamanho,
-                       nome_vendedor, loja, status
-                FROM defeitos
-                ORDER BY data_defeito DESC
-            ''')
-
-            for row in cursor.fetchall():
-                self.tree.insert("", "end", values=row)
+            total, ranking = ranking_defeitos(
+                self.analise_dimensao.get(), inicio, fim,
+                loja_filtro=self.analise_loja.get(),
+                status_filtro=self.analise_status.get(),
+                limite=int(self.analise_limite.get() or 10)
+            )
+        except (sqlite3.Error, ValueError) as e:
+            messagebox.showerror("ERRO", f"Erro na análise: {str(e)}",
+                                 parent=self.analise_tree.winfo_toplevel())
+            return
 
+        self.analise_total.configure(text=f"{total} defeito(s) no período")
+        self.analise_tree.delete(*self.analise_tree.get_children())
+        for posicao, (valor, quantidade, percentual, acumulado) in enumerate(ranking, 1):
+            self.analise_tree.insert("", "end", values=(
+                posicao, valor or "(SEM VALOR)", quantidade,
+                f"{percentual:.1f}%", f"{acumulado:.1f}%"
+            ))
+
+    def ao_reexibir(self):
+        """Ao reabrir a janela hospedada, refaz a pesquisa atual e os contadores"""
+        self.pesquisar()
+        self.atualizar_alertas()
+
+    @metricas.medido
+    def carregar_dados(self):
+        """Carrega a primeira página dos dados na tabela"""
+        try:
+            self.filtro_exibido = ("", "Todos", "Todas")
+            self.tabela.carregar(fonte_pesquisa(*self.filtro_exibido))
             self.atualizar_estatisticas()
 
         except sqlite3.Error as e:
             messagebox.showerror("ERRO", f"Erro ao carregar dados: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+    def formatar_linha(self, row):
+        """Formata uma linha do banco para exibição na tabela"""
+        return (
+            datas.para_br(row["data_defeito"]),
+            row["tipo_defeito"],
+            row["codigo_produto"],
+            row["tamanho"],
+            row["nome_vendedor"],
+            row["loja"],
+            row["status"]
+        )
 
     def limpar_campos(self):
         """Limpa todos os campos do formulário"""
@@ -798,48 +1268,43 @@ class DefectManagerApp:
         selected_items = self.tree.selection()
         if selected_items:
             self.selected_item = selected_items[0]
-            valores = self.tree.item(self.selected_item)['values']
-            if valores:
-                # O código do produto está na posição 2 do valores
-                self.selected_id = valores[2]
+            self.selected_id = int(self.selected_item)  # iid = defeitos.id
 
+    @metricas.medido
     def preencher_campos(self, event=None):
         """Preenche os campos com os dados do item selecionado"""
         if not self.selected_item:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM defeitos
-                WHERE codigo_produto = ?
-            ''', (self.selected_id,))
-            
-            row = cursor.fetchone()
+            row = self.registros.obter(self.selected_id)
+
             if row:
-                # Limpa os campos antes de preencher
+                # Limpa os campos antes de preencher (limpar_campos zera a seleção)
+                selected_id, selected_item = self.selected_id, self.selected_item
                 self.limpar_campos()
-                
+                self.selected_id, self.selected_item = selected_id, selected_item
+
                 # Preenche os campos com os dados do banco
-                self.tipo_defeito_entry.set(row[2])  # tipo_defeito
-                self.codigo_produto_entry.insert(0, row[3])  # codigo_produto
-                self.tamanho_entry.set(row[4])  # tamanho
-                self.nome_vendedor_entry.insert(0, row[5])  # nome_vendedor
-                self.descricao_defeito_entry.set(row[6])  # descricao_defeito
-                self.observacoes_entry.insert("1.0", row[7] if row[7] else "")  # observacoes
-                self.loja_entry.set(row[8])  # loja
-                
+                self.tipo_defeito_entry.set(row["tipo_defeito"] or "SELECIONE")
+                self.codigo_produto_entry.insert(0, row["codigo_produto"] or "")
+                self.tamanho_entry.set(row["tamanho"] or "SELECIONE")
+                self.nome_vendedor_entry.insert(0, row["nome_vendedor"] or "")
+                self.descricao_defeito_entry.set(row["descricao_defeito"] or "SELECIONE")
+                self.observacoes_entry.insert("1.0", row["observacoes"] or "")
+                self.loja_entry.set(row["loja"] or "MATRIZ")
+
         except sqlite3.Error as e:
             messagebox.showerror("ERRO", f"Erro ao carregar dados: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     def run(self):
         """Inicia a aplicação"""
         self.carregar_dados()  # Carrega os dados iniciais
-        self.root.mainloop()
+        janelas.executar(self.root)
+
+
+def create_app(master=None):
+    return DefectManagerApp(master)
 
 if __name__ == "__main__":
     app = DefectManagerApp()
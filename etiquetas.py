@@ -6,6 +6,10 @@ from datetime import datetime
 import os
 import tempfile
 
+import janelas
+import metricas
+from tarefas import ExecutorTarefas
+
 # Configurações iniciais
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -20,9 +24,30 @@ LOJAS = [
     "AUSTRAL CATARINA OUTLET"
 ]
 
-class SistemaEtiquetas(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+
+@metricas.medido
+def buscar_cep(tarefa, cep):
+    """Consulta o CEP na API ViaCEP (executada fora da thread da interface)"""
+    # Configura timeout para a requisição
+    response = requests.get(
+        f'https://viacep.com.br/ws/{cep}/json/',
+        timeout=5  # 5 segundos de timeout
+    )
+    if response.status_code != 200:
+        raise Exception(f"Erro na API: {response.status_code}")
+    return response.json()
+
+
+@metricas.medido
+def salvar_imagem(tarefa, imagem, caminho):
+    """Grava a imagem da etiqueta em PNG (executada fora da thread da interface)"""
+    imagem.save(caminho, "PNG")
+    return caminho
+
+
+class SistemaEtiquetasBase(janelas.JanelaHospedavel):
+    def __init__(self, master=None):
+        super().__init__(master)
         self.configure(fg_color="#0F0F0F")
         
         # Verifica se as lojas foram carregadas corretamente
@@ -55,6 +80,10 @@ class SistemaEtiquetas(ctk.CTk):
         self.loja_var = None
         self.modo_atual = None
         self.endereco_completo = {}
+
+        # Consulta de CEP e gravação das etiquetas rodam fora da thread da interface
+        self.tarefas = ExecutorTarefas(self)
+        self.tarefa_cep = None
         
         # Setup da interface
         self.criar_interface()
@@ -172,16 +201,13 @@ class SistemaEtiquetas(ctk.CTk):
         self.btn_sair.pack(side="right", padx=10)
         
         # Inicia atualização do horário
-        self.atualizar_hora()
+        janelas.registrar_relogio(
+            self.status_label,
+            lambda agora: f"Online | {agora.strftime('%d/%m/%Y %H:%M:%S')}"
+        )
 
     def sair_sistema(self):
-        self.destroy()
-
-    def atualizar_hora(self):
-        """Atualiza o horário no rodapé com formato melhorado"""
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        self.status_label.configure(text=f"Online | {agora}")
-        self.after(1000, self.atualizar_hora)
+        janelas.fechar(self)
 
     def limpar_frame_conteudo(self):
         """Limpa o frame de conteúdo mantendo suas dimensões"""
@@ -404,56 +430,54 @@ class SistemaEtiquetas(ctk.CTk):
             self.grab_set()
             self.focus_force()
             return
-        
-        try:
-            # Configura timeout para a requisição
-            response = requests.get(
-                f'https://viacep.com.br/ws/{cep}/json/',
-                timeout=5  # 5 segundos de timeout
-            )
-            
-            if response.status_code == 200:
-                dados = response.json()
-                
-                # Verifica se o CEP existe
-                if 'erro' in dados:
-                    self.grab_release()
-                    messagebox.showerror("Erro", "CEP não encontrado na base de dados.")
-                    self.grab_set()
-                    self.focus_force()
-                    self.endereco_completo = {}
-                    return
-                
-                # Armazena os dados
-                self.endereco_completo = dados
-                
-                # Foca no campo número
-                self.entry_numero.focus()
-                return
-                
-            else:
-                raise Exception(f"Erro na API: {response.status_code}")
-                
-        except requests.exceptions.Timeout:
-            self.grab_release()
-            messagebox.showerror("Erro", "Tempo excedido na consulta.\nTente novamente.")
-            self.grab_set()
-            self.focus_force()
-            
-        except requests.exceptions.ConnectionError:
-            self.grab_release()
-            messagebox.showerror("Erro", "Sem conexão com a internet.\nVerifique sua conexão.")
-            self.grab_set()
-            self.focus_force()
-            
-        except Exception as e:
+
+        # Uma nova consulta substitui a anterior, que é descartada
+        if self.tarefa_cep is not None:
+            self.tarefa_cep.cancelar()
+        self.endereco_completo = {}
+
+        self.tarefa_cep = self.tarefas.executar(
+            buscar_cep,
+            cep,
+            ao_concluir=self.cep_consultado,
+            ao_erro=self.cep_falhou
+        )
+
+    def cep_consultado(self, dados):
+        """Recebe a resposta da ViaCEP e armazena o endereço"""
+        self.tarefa_cep = None
+
+        # Verifica se o CEP existe
+        if 'erro' in dados:
             self.grab_release()
-            messagebox.showerror("Erro", f"Erro ao consultar CEP: {str(e)}")
+            messagebox.showerror("Erro", "CEP não encontrado na base de dados.")
             self.grab_set()
             self.focus_force()
+            self.endereco_completo = {}
+            return
         
+        # Armazena os dados
+        self.endereco_completo = dados
+        
+        # Foca no campo número
+        self.entry_numero.focus()
+
+    def cep_falhou(self, erro):
+        """Informa a falha na consulta do CEP"""
+        self.tarefa_cep = None
         self.endereco_completo = {}
 
+        self.grab_release()
+        if isinstance(erro, requests.exceptions.Timeout):
+            messagebox.showerror("Erro", "Tempo excedido na consulta.\nTente novamente.")
+        elif isinstance(erro, requests.exceptions.ConnectionError):
+            messagebox.showerror("Erro", "Sem conexão com a internet.\nVerifique sua conexão.")
+        else:
+            messagebox.showerror("Erro", f"Erro ao consultar CEP: {str(erro)}")
+        self.grab_set()
+        self.focus_force()
+
+    @metricas.medido
     def criar_imagem_delivery(self):
         """Cria a imagem da etiqueta para entrega usando PIL"""
         try:
@@ -552,6 +576,7 @@ class SistemaEtiquetas(ctk.CTk):
             self.focus_force()
             return None
 
+    @metricas.medido
     def criar_imagem_reserve(self):
         """Cria a imagem da etiqueta de reserva usando PIL com melhor alinhamento"""
         try:
@@ -648,6 +673,7 @@ class SistemaEtiquetas(ctk.CTk):
             self.focus_force()
             return None
 
+    @metricas.medido
     def criar_imagem_transfer(self):
         """Cria a imagem para etiqueta de transferência"""
         try:
@@ -855,22 +881,9 @@ class SistemaEtiquetas(ctk.CTk):
         try:
             imagem = self.criar_imagem_delivery()
             if imagem:
-                temp_name = f"etiqueta_delivery_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                temp_path = os.path.join(tempfile.gettempdir(), temp_name)
-                imagem.save(temp_path, "PNG")
-                
-                self.grab_release()
-                
-                if not self.abrir_e_deletar_arquivo(temp_path):
-                    messagebox.showinfo("Sucesso", f"Etiqueta gerada em: {temp_path}")
-                
-                self.grab_set()
-                self.focus_force()
+                self.salvar_etiqueta(imagem, "etiqueta_delivery")
         except Exception as e:
-            self.grab_release()
-            messagebox.showerror("Erro", f"Erro ao gerar etiqueta: {str(e)}")
-            self.grab_set()
-            self.focus_force()
+            self.etiqueta_falhou(e)
 
     def gerar_etiqueta_transfer(self):
         """Gera etiqueta para transferência"""
@@ -880,22 +893,38 @@ class SistemaEtiquetas(ctk.CTk):
         try:
             imagem = self.criar_imagem_transfer()
             if imagem:
-                temp_name = f"etiqueta_transfer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                temp_path = os.path.join(tempfile.gettempdir(), temp_name)
-                imagem.save(temp_path, "PNG")
-                
-                self.grab_release()
-                
-                if not self.abrir_e_deletar_arquivo(temp_path):
-                    messagebox.showinfo("Sucesso", f"Etiqueta gerada em: {temp_path}")
-                
-                self.grab_set()
-                self.focus_force()
+                self.salvar_etiqueta(imagem, "etiqueta_transfer")
         except Exception as e:
-            self.grab_release()
-            messagebox.showerror("Erro", f"Erro ao gerar etiqueta: {str(e)}")
-            self.grab_set()
-            self.focus_force()
+            self.etiqueta_falhou(e)
+
+    def salvar_etiqueta(self, imagem, prefixo):
+        """Grava a etiqueta em segundo plano e a abre quando estiver pronta"""
+        temp_name = f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        temp_path = os.path.join(tempfile.gettempdir(), temp_name)
+        self.tarefas.executar(
+            salvar_imagem,
+            imagem,
+            temp_path,
+            ao_concluir=self.etiqueta_salva,
+            ao_erro=self.etiqueta_falhou
+        )
+
+    def etiqueta_salva(self, temp_path):
+        """Abre a etiqueta gravada"""
+        self.grab_release()
+        
+        if not self.abrir_e_deletar_arquivo(temp_path):
+            messagebox.showinfo("Sucesso", f"Etiqueta gerada em: {temp_path}")
+        
+        self.grab_set()
+        self.focus_force()
+
+    def etiqueta_falhou(self, erro):
+        """Informa a falha ao gerar a etiqueta"""
+        self.grab_release()
+        messagebox.showerror("Erro", f"Erro ao gerar etiqueta: {str(erro)}")
+        self.grab_set()
+        self.focus_force()
 
     def validar_campos_reserve(self):
         """Valida campos do modo reserve"""
@@ -958,22 +987,9 @@ class SistemaEtiquetas(ctk.CTk):
             imagem = self.criar_imagem_reserve()
             if imagem:
                 # Gera um nome único para cada arquivo
-                temp_name = f"etiqueta_reserva_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                temp_path = os.path.join(tempfile.gettempdir(), temp_name)
-                imagem.save(temp_path, "PNG")
-                
-                self.grab_release()
-                
-                if not self.abrir_e_deletar_arquivo(temp_path):
-                    messagebox.showinfo("Sucesso", f"Etiqueta gerada em: {temp_path}")
-                
-                self.grab_set()
-                self.focus_force()
+                self.salvar_etiqueta(imagem, "etiqueta_reserva")
         except Exception as e:
-            self.grab_release()
-            messagebox.showerror("Erro", f"Erro ao gerar etiqueta: {str(e)}")
-            self.grab_set()
-            self.focus_force()
+            self.etiqueta_falhou(e)
 
     def __del__(self):
         """Destrutor da classe para garantir limpeza adequada"""
@@ -983,6 +999,20 @@ class SistemaEtiquetas(ctk.CTk):
             pass
 
 
+class SistemaEtiquetas(SistemaEtiquetasBase, ctk.CTk):
+    """Etiquetas em janela própria."""
+
+
+class SistemaEtiquetasHospedado(SistemaEtiquetasBase, ctk.CTkToplevel):
+    """Etiquetas em uma janela do launcher."""
+
+
+def create_app(master=None):
+    if master is None:
+        return SistemaEtiquetas()
+    return SistemaEtiquetasHospedado(master)
+
+
 if __name__ == "__main__":
     app = SistemaEtiquetas()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Exportação em fluxo das tabelas do Sistema Austral.
+
+As linhas são lidas do cursor em lotes e escritas direto no arquivo, sem
+montar a tabela inteira em memória: o consumo de memória é constante e o
+tempo cresce só com o que foi filtrado. Formatos suportados, escolhidos
+pela extensão do arquivo:
+
+- .xlsx: openpyxl em modo write_only, opcionalmente com uma aba por valor
+  de uma coluna (ex.: uma aba por loja);
+- .csv e .csv.gz: separado por ';' em UTF-8 com BOM, que o Excel abre direto.
+
+Cada perfil de exportação (ex.: 'pedidos') guarda em marcas_exportacao a
+marca (atualizado_em, id) da última linha exportada; com ela, a exportação
+de alterações traz só as linhas inseridas ou alteradas desde então.
+
+As funções de exportação recebem a Tarefa do ExecutorTarefas como primeiro
+argumento, informam o progresso e podem ser canceladas; o arquivo só aparece
+no destino quando a exportação termina.
+"""
+
+import csv
+import gzip
+import os
+
+import customtkinter as ctk
+from tkinter import messagebox
+
+import banco
+import datas
+import metricas
+
+LINHAS_POR_LOTE = 5000  # linhas lidas do banco por vez
+TIPOS_ARQUIVO = [
+    ("Excel", "*.xlsx"),
+    ("CSV", "*.csv"),
+    ("CSV compactado", "*.csv.gz")
+]
+
+
+def formato_arquivo(caminho):
+    """Formato da exportação a partir da extensão: 'xlsx', 'csv' ou 'csv.gz'"""
+    nome = caminho.lower()
+    if nome.endswith(".csv.gz"):
+        return "csv.gz"
+    if nome.endswith(".csv"):
+        return "csv"
+    return "xlsx"
+
+
+def montar_filtro(coluna_data=None, inicio=None, fim=None, desde=None):
+    """
+    Monta o WHERE da exportação e retorna (where, params).
+
+    inicio/fim: limites ISO do período em coluna_data (fim exclusivo).
+    desde: marca (atualizado_em, id) da última exportação; só saem as linhas
+    inseridas ou alteradas depois dela.
+    """
+    condicoes, params = [], []
+    if inicio:
+        condicoes.append(f"{coluna_data} >= ?")
+        params.append(inicio)
+    if fim:
+        condicoes.append(f"{coluna_data} < ?")
+        params.append(fim)
+    if desde:
+        condicoes.append("(atualizado_em, id) > (?, ?)")
+        params.extend(desde)
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    return where, params
+
+
+def ler_marca(perfil):
+    """Marca (atualizado_em, id) da última exportação do perfil, ou None"""
+    linha = banco.consultar_um(
+        "SELECT atualizado_em, ultimo_id FROM marcas_exportacao WHERE perfil = ?",
+        (perfil,)
+    )
+    return tuple(linha) if linha else None
+
+
+def gravar_marca(perfil, marca):
+    """Avança a marca do perfil para a última linha exportada"""
+    banco.executar('''
+        INSERT INTO marcas_exportacao (perfil, atualizado_em, ultimo_id, exportado_em)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(perfil) DO UPDATE SET
+            atualizado_em = excluded.atualizado_em,
+            ultimo_id = excluded.ultimo_id,
+            exportado_em = excluded.exportado_em
+    ''', (perfil, marca[0], marca[1], datas.agora_iso()))
+
+
+def _ler_lotes(tarefa, sql, params, sql_marca=None, marca=None):
+    """
+    Gera as linhas da consulta em lotes, informando o progresso.
+
+    Tudo é lido em uma única transação de leitura, então a contagem, as
+    linhas e a nova marca (em marca[0], via sql_marca) vêm do mesmo instante.
+    """
+    with banco.conexao() as conn:
+        conn.execute("BEGIN")
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+            if sql_marca:
+                marca.append(conn.execute(sql_marca, params).fetchone())
+            cursor = conn.execute(sql, params)
+            colunas = [d[0] for d in cursor.description]
+            yield colunas
+            lidas = 0
+            while True:
+                lote = cursor.fetchmany(LINHAS_POR_LOTE)
+                if not lote:
+                    break
+                yield lote
+                lidas += len(lote)
+                tarefa.progresso(lidas, total)
+        finally:
+            conn.rollback()  # só leitura: encerra a transação
+
+
+def _gravar_xlsx(caminho, lotes, coluna_aba):
+    """Grava as linhas em um XLSX write_only, com uma aba por valor de coluna_aba"""
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    colunas = next(lotes)
+    indice_aba = colunas.index(coluna_aba) if coluna_aba else None
+    abas = {}
+
+    def aba(nome):
+        if nome not in abas:
+            # Nomes de aba do Excel: até 31 caracteres, sem []:*?/\
+            titulo = "".join(c for c in str(nome or "SEM VALOR") if c not in "[]:*?/\\")[:31]
+            abas[nome] = livro.create_sheet(titulo or "SEM VALOR")
+            abas[nome].append(colunas)
+        return abas[nome]
+
+    try:
+        for lote in lotes:
+            for linha in lote:
+                aba(linha[indice_aba] if indice_aba is not None else "Dados").append(linha)
+    except BaseException:
+        # Cancelada ou com erro: fecha as abas abertas antes de descartar o livro
+        for planilha in abas.values():
+            planilha.close()
+        raise
+    if not abas:
+        aba("Dados")
+    livro.save(caminho)
+
+
+def _gravar_csv(caminho, lotes, compactar):
+    """Grava as linhas em CSV (';'), opcionalmente compactado com gzip"""
+    abrir = gzip.open if compactar else open
+    with abrir(caminho, "wt", encoding="utf-8-sig", newline="") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow(next(lotes))
+        for lote in lotes:
+            escritor.writerows(lote)
+
+
+@metricas.medido
+def exportar(tarefa, caminho, sql, params=(), coluna_aba=None, perfil=None, sql_marca=None):
+    """
+    Exporta o resultado de um SELECT para caminho, lendo em lotes.
+
+    coluna_aba: nome de uma coluna do SELECT; no XLSX, gera uma aba por valor.
+    perfil/sql_marca: ao concluir, grava como marca do perfil a linha
+    (atualizado_em, id) devolvida por sql_marca (mesmos params do SELECT).
+    Retorna o caminho gravado.
+    """
+    formato = formato_arquivo(caminho)
+    parcial = caminho + ".parcial"
+    marca = []
+    lotes = _ler_lotes(tarefa, sql, list(params), sql_marca, marca)
+    try:
+        if formato == "xlsx":
+            _gravar_xlsx(parcial, lotes, coluna_aba)
+        else:
+            _gravar_csv(parcial, lotes, formato == "csv.gz")
+        tarefa.verificar()
+        os.replace(parcial, caminho)
+    finally:
+        lotes.close()
+        if os.path.exists(parcial):
+            os.remove(parcial)
+
+    # Sem linhas exportadas a marca anterior continua valendo
+    if perfil and marca and marca[0]:
+        gravar_marca(perfil, marca[0])
+    return caminho
+
+
+def pedir_opcoes(parent, por_loja=False):
+    """
+    Pergunta o período (dd/mm/aaaa, em branco = tudo), se devem sair só as
+    alterações desde a última exportação e, se por_loja, se o XLSX deve ter
+    uma aba por loja.
+
+    Retorna {'inicio', 'fim', 'alteracoes', 'por_loja'} com limites ISO, ou
+    None se cancelado.
+    """
+    janela = ctk.CTkToplevel(parent)
+    janela.title("Opções de exportação")
+    janela.geometry("380x300")
+    janela.transient(parent)
+    janela.grab_set()
+    janela.grid_columnconfigure(1, weight=1)
+
+    ctk.CTkLabel(janela, text="Data inicial:").grid(row=0, column=0, padx=10, pady=(20, 5), sticky="w")
+    inicio_entry = ctk.CTkEntry(janela, placeholder_text="dd/mm/aaaa")
+    inicio_entry.grid(row=0, column=1, padx=10, pady=(20, 5), sticky="ew")
+
+    ctk.CTkLabel(janela, text="Data final:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
+    fim_entry = ctk.CTkEntry(janela, placeholder_text="dd/mm/aaaa")
+    fim_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+
+    alteracoes_var = ctk.BooleanVar(value=False)
+    ctk.CTkCheckBox(
+        janela, text="Só alterações desde a última exportação", variable=alteracoes_var
+    ).grid(row=2, column=0, columnspan=2, padx=10, pady=(10, 5), sticky="w")
+
+    por_loja_var = ctk.BooleanVar(value=False)
+    if por_loja:
+        ctk.CTkCheckBox(
+            janela, text="Uma aba por loja (Excel)", variable=por_loja_var
+        ).grid(row=3, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+    opcoes = {}
+
+    def confirmar():
+        ini_br = inicio_entry.get().strip()
+        fim_br = fim_entry.get().strip()
+        try:
+            inicio = datas.intervalo_iso(ini_br, ini_br)[0] if ini_br else None
+            fim = datas.intervalo_iso(fim_br, fim_br)[1] if fim_br else None
+        except ValueError:
+            messagebox.showwarning("Atenção", "Use datas no formato dd/mm/aaaa.", parent=janela)
+            return
+        opcoes.update(
+            inicio=inicio, fim=fim,
+            alteracoes=alteracoes_var.get(), por_loja=por_loja_var.get()
+        )
+        janela.destroy()
+
+    ctk.CTkButton(janela, text="CONTINUAR", command=confirmar).grid(
+        row=4, column=0, columnspan=2, padx=10, pady=(10, 5), sticky="ew"
+    )
+    ctk.CTkButton(janela, text="CANCELAR", fg_color="red", command=janela.destroy).grid(
+        row=5, column=0, columnspan=2, padx=10, pady=5, sticky="ew"
+    )
+
+    janela.wait_window()
+    return opcoes or None
@@ -3,13 +3,15 @@ from tkinter import messagebox
 from datetime import datetime
 from lojas import lojas 
 
+import janelas
+
 # Configurações iniciais
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-class EmailFechamentoApp(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+class EmailFechamentoAppBase(janelas.JanelaHospedavel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         # Configurações da janela principal
         self.title("E-MAIL DE FECHAMENTO AUSTRAL")
@@ -97,7 +99,7 @@ class EmailFechamentoApp(ctk.CTk):
             height=28,
             corner_radius=6,
             font=ctk.CTkFont(size=11, weight="bold"),
-            command=self.destroy,
+            command=lambda: janelas.fechar(self),
             fg_color="red"
         )
         self.btn_sair.pack(side="right", padx=10)
@@ -170,8 +172,18 @@ class EmailFechamentoApp(ctk.CTk):
         self.clipboard_append(email_body)
         messagebox.showinfo("Sucesso", "E-mail copiado para a área de transferência!")
 
-def create_app():
-    return EmailFechamentoApp()
+class EmailFechamentoApp(EmailFechamentoAppBase, ctk.CTk):
+    """E-mail de fechamento em janela própria."""
+
+
+class EmailFechamentoAppHospedado(EmailFechamentoAppBase, ctk.CTkToplevel):
+    """E-mail de fechamento em uma janela do launcher."""
+
+
+def create_app(master=None):
+    if master is None:
+        return EmailFechamentoApp()
+    return EmailFechamentoAppHospedado(master)
 
 if __name__ == "__main__":
     app = create_app()
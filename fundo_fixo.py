@@ -1,23 +1,263 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
-import sqlite3
-import os
+
+import banco
+import datas
+import janelas
+import metricas
+from tabela_virtual import FonteConsulta, TabelaVirtual
 
 # Configurações iniciais
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-# Configuração dos caminhos
-ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
-if not os.path.exists(ASSETS_DIR):
-    os.makedirs(ASSETS_DIR)
-DB_PATH = os.path.join(ASSETS_DIR, "austral.db")
+INTERVALO_CHECKPOINT = 500  # movimentações entre dois checkpoints de saldo
+COLUNAS_MOVIMENTACAO = ("id", "data", "tipo", "valor", "responsavel", "descricao", "saldo")
+
+
+def aplicar_entrada(dados, valor):
+    """
+    Aplica a lógica de entrada de dinheiro mantendo o controle do saldo real.
+    """
+    # 1) Atualiza o saldo real primeiro
+    dados["saldo_atual"] += valor
+    
+    # 2) Se houver reposições pendentes, abate primeiro
+    if dados["reposicoes_pendentes"] > 0:
+        if dados["saldo_atual"] >= dados["valor_fundo"]:
+            # Se o saldo atual cobriu o valor do fundo, zera as reposições pendentes
+            dados["reposicoes_pendentes"] = 0.0
+        else:
+            # Caso contrário, reduz proporcionalmente as reposições pendentes
+            dados["reposicoes_pendentes"] = dados["valor_fundo"] - dados["saldo_atual"]
+    
+    # 3) Se o saldo ficou acima do valor do fundo, adiciona a diferença em depósitos pendentes
+    if dados["saldo_atual"] > dados["valor_fundo"]:
+        excesso = dados["saldo_atual"] - dados["valor_fundo"]
+        dados["depositos_pendentes"] += excesso
+
+
+def aplicar_saida(dados, valor):
+    """
+    Aplica a lógica de saída de dinheiro mantendo o fundo fixo constante.
+    """
+    # 1) Primeiro tenta abater de depósitos pendentes
+    if dados["depositos_pendentes"] > 0:
+        if valor <= dados["depositos_pendentes"]:
+            dados["depositos_pendentes"] -= valor
+            return  # Não afeta o saldo do fundo
+        else:
+            valor -= dados["depositos_pendentes"]
+            dados["depositos_pendentes"] = 0.0
+    
+    # 2) Se ainda há valor para saída, subtrai do saldo
+    dados["saldo_atual"] -= valor
+    
+    # 3) Atualiza reposições pendentes baseado no saldo atual
+    if dados["saldo_atual"] < dados["valor_fundo"]:
+        dados["reposicoes_pendentes"] = dados["valor_fundo"] - dados["saldo_atual"]
+
+
+def fonte_movimentacoes():
+    """Histórico paginado do fundo, da movimentação mais recente para a mais antiga"""
+    return FonteConsulta(f"SELECT {', '.join(COLUNAS_MOVIMENTACAO)} FROM movimentacoes")
+
+
+def buscar_movimentacao(mov_id):
+    """Retorna a movimentação (dict) pelo id, ou None"""
+    row = banco.consultar_um(
+        f"SELECT {', '.join(COLUNAS_MOVIMENTACAO)} FROM movimentacoes WHERE id = ?",
+        (mov_id,)
+    )
+    return dict(zip(COLUNAS_MOVIMENTACAO, row)) if row else None
+
+
+@metricas.medido
+def carregar_saldos(dados):
+    """
+    Completa dados com o saldo atual gravado na última movimentação, sem
+    percorrer o histórico.
+
+    Sem nenhum checkpoint (banco anterior a eles), os saldos gravados podem
+    estar desatualizados: recalcula uma vez, grava a configuração e um
+    checkpoint na última movimentação, e retorna True. As aberturas
+    seguintes só leem o saldo gravado.
+    """
+    ultima = banco.consultar_um("SELECT id, saldo FROM movimentacoes ORDER BY id DESC LIMIT 1")
+    if ultima is None:
+        dados["saldo_atual"] = dados["valor_fundo"]
+        return False
+    if banco.consultar_um("SELECT 1 FROM fundo_checkpoints LIMIT 1") is None:
+        novos = dict(dados)
+        with banco.transacao() as conn:
+            _reaplicar(conn, novos, None)
+            gravar_config(conn, novos)
+            _inserir_checkpoint(conn, novos, ultima[0])
+        dados.update(novos)
+        return True
+    dados["saldo_atual"] = ultima[1]
+    return False
+
+
+def gravar_checkpoint(conn, dados, movimentacao_id):
+    """
+    Grava o estado após movimentacao_id como checkpoint, se já houver
+    INTERVALO_CHECKPOINT movimentações desde o último.
+    """
+    desde_ultimo = conn.execute("""
+        SELECT COUNT(*) FROM movimentacoes
+        WHERE id > COALESCE((SELECT MAX(movimentacao_id) FROM fundo_checkpoints), 0)
+          AND id <= ?
+    """, (movimentacao_id,)).fetchone()[0]
+    if desde_ultimo >= INTERVALO_CHECKPOINT:
+        _inserir_checkpoint(conn, dados, movimentacao_id)
+
+
+def _inserir_checkpoint(conn, dados, movimentacao_id):
+    """Grava o estado de dados como checkpoint após movimentacao_id"""
+    conn.execute("""
+        INSERT OR REPLACE INTO fundo_checkpoints
+            (movimentacao_id, valor_fundo, saldo_atual, depositos_pendentes, reposicoes_pendentes)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        movimentacao_id, dados["valor_fundo"], dados["saldo_atual"],
+        dados["depositos_pendentes"], dados["reposicoes_pendentes"]
+    ))
+
+
+def _reaplicar(conn, dados, desde_id):
+    """
+    Recalcula dados em conn (dentro de uma transação), partindo do checkpoint
+    anterior a desde_id. Retorna {id: saldo} das movimentações recalculadas.
+    """
+    # Checkpoints a partir da linha alterada, ou de outro valor do fundo, não valem mais
+    conn.execute("""
+        DELETE FROM fundo_checkpoints
+        WHERE movimentacao_id >= ? OR valor_fundo <> ?
+    """, (desde_id or 0, dados["valor_fundo"]))
+    ponto = conn.execute("""
+        SELECT movimentacao_id, saldo_atual, depositos_pendentes, reposicoes_pendentes
+        FROM fundo_checkpoints
+        ORDER BY movimentacao_id DESC LIMIT 1
+    """).fetchone()
+
+    if ponto:
+        ultimo_id, dados["saldo_atual"], dados["depositos_pendentes"], \
+            dados["reposicoes_pendentes"] = ponto
+    else:
+        # Sem checkpoint: reinicia os valores para o padrão
+        ultimo_id = 0
+        dados["saldo_atual"] = dados["valor_fundo"]
+        dados["depositos_pendentes"] = 0.0
+        dados["reposicoes_pendentes"] = 0.0
+
+    # Reaplica só as movimentações posteriores ao checkpoint (faixa da chave primária)
+    movs = conn.execute("""
+        SELECT id, tipo, valor FROM movimentacoes
+        WHERE id > ?
+        ORDER BY id
+    """, (ultimo_id,))
+    saldos, pontos = {}, []
+    for n, (mov_id, tipo, valor) in enumerate(movs, 1):
+        if tipo == "Entrada":
+            aplicar_entrada(dados, valor)
+        else:  # "Saída"
+            aplicar_saida(dados, valor)
+
+        saldos[mov_id] = dados["saldo_atual"]
+        if n % INTERVALO_CHECKPOINT == 0:
+            pontos.append((
+                mov_id, dados["valor_fundo"], dados["saldo_atual"],
+                dados["depositos_pendentes"], dados["reposicoes_pendentes"]
+            ))
 
-class GestorFundoFixo(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+    conn.executemany(
+        "UPDATE movimentacoes SET saldo = ? WHERE id = ?",
+        [(saldo, mov_id) for mov_id, saldo in saldos.items()]
+    )
+    conn.executemany("""
+        INSERT INTO fundo_checkpoints
+            (movimentacao_id, valor_fundo, saldo_atual, depositos_pendentes, reposicoes_pendentes)
+        VALUES (?, ?, ?, ?, ?)
+    """, pontos)
+    return saldos
+
+
+def gravar_config(conn, dados):
+    """Grava o valor do fundo e as pendências na configuração atual"""
+    conn.execute("""
+        UPDATE config_fundo
+        SET valor_fundo = ?,
+            depositos_pendentes = ?,
+            reposicoes_pendentes = ?,
+            ultima_atualizacao = CURRENT_TIMESTAMP
+        WHERE id = (SELECT id FROM config_fundo ORDER BY id DESC LIMIT 1)
+    """, (dados["valor_fundo"], dados["depositos_pendentes"], dados["reposicoes_pendentes"]))
+
+
+@metricas.medido
+def recalcular(dados, desde_id=None, salvar=False):
+    """
+    Recalcula saldo e pendências a partir do valor do fundo e das movimentações.
+
+    desde_id: primeira movimentação alterada ou excluída. O recálculo parte do
+    checkpoint anterior a ela (ou do início, sem checkpoint) e regrava os
+    saldos e checkpoints só dali em diante. Com salvar, grava também a
+    configuração na mesma transação. Retorna {id: saldo} das movimentações
+    recalculadas; dados só muda se tudo for gravado.
+    """
+    novos = dict(dados)
+    with banco.transacao() as conn:
+        saldos = _reaplicar(conn, novos, desde_id)
+        if salvar:
+            gravar_config(conn, novos)
+    dados.update(novos)
+    return saldos
+
+
+@metricas.medido
+def excluir(dados, mov_id):
+    """
+    Exclui a movimentação e recalcula os saldos seguintes em uma única
+    transação: os saldos gravados nunca ficam desatualizados.
+    """
+    novos = dict(dados)
+    with banco.transacao() as conn:
+        conn.execute("DELETE FROM movimentacoes WHERE id = ?", (mov_id,))
+        saldos = _reaplicar(conn, novos, mov_id)
+        gravar_config(conn, novos)
+    dados.update(novos)
+    return saldos
+
+
+@metricas.medido
+def consultar_periodo(data_ini_str, data_fim_str):
+    """
+    Retorna (movimentações, total de entradas, total de saídas) do período.
+
+    Levanta ValueError se alguma data for inválida.
+    """
+    # Converte o período para limites ISO [início, fim)
+    data_ini, data_fim = datas.intervalo_iso(data_ini_str, data_fim_str)
+
+    # Busca só as movimentações do período (consulta pelo índice da data)
+    movs_periodo = banco.consultar("""
+        SELECT data, tipo, valor, responsavel, descricao
+        FROM movimentacoes
+        WHERE data >= ? AND data < ?
+        ORDER BY data, id
+    """, (data_ini, data_fim))
+
+    # Calcula totais
+    total_entrada = sum(m[2] for m in movs_periodo if m[1] == "Entrada")
+    total_saida = sum(m[2] for m in movs_periodo if m[1] == "Saída")
+    return movs_periodo, total_entrada, total_saida
+
+
+class GestorFundoFixoBase(janelas.JanelaHospedavel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         # Configurações da janela principal
         self.title("SISTEMA AUSTRAL - FUNDO FIXO")
@@ -31,8 +271,7 @@ class GestorFundoFixo(ctk.CTk):
             "valor_fundo": 1000.00,
             "saldo_atual": 1000.00,
             "depositos_pendentes": 0.00,
-            "reposicoes_pendentes": 0.00,
-            "movimentacoes": []
+            "reposicoes_pendentes": 0.00
         }
 
         # Conecta ao banco e cria interface
@@ -234,82 +473,52 @@ class GestorFundoFixo(ctk.CTk):
 
     def sair_sistema(self):
         """Fecha a aplicação"""
-        self.quit()
-        self.destroy()
+        janelas.fechar(self)
 
     def conectar_banco(self):
-        """Conecta ao banco e cria tabela se necessário."""
-        self.conn = sqlite3.connect(DB_PATH)
-        cursor = self.conn.cursor()
-        criar_tabelas(cursor)
-        self.conn.commit()
+        """Conecta ao banco e aplica as migrações pendentes."""
+        banco.inicializar()
+
+    def ao_reexibir(self):
+        """Ao reabrir a janela hospedada, relê os saldos e o histórico"""
+        self.carregar_dados()
 
     def carregar_dados(self):
         """Carrega dados do banco."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        cfg = banco.consultar_um("""
             SELECT valor_fundo, depositos_pendentes, reposicoes_pendentes 
             FROM config_fundo 
             ORDER BY id DESC LIMIT 1
         """)
-        cfg = cursor.fetchone()
         if cfg:
             self.dados = {
                 "valor_fundo": cfg[0],
                 "saldo_atual": cfg[0],  # Inicia com valor_fundo se não houver movimentações
                 "depositos_pendentes": cfg[1],
-                "reposicoes_pendentes": cfg[2],
-                "movimentacoes": []
+                "reposicoes_pendentes": cfg[2]
             }
         else:
             # Insere configuração padrão no banco se não existir
-            cursor.execute("""
+            banco.executar("""
                 INSERT INTO config_fundo (valor_fundo, depositos_pendentes, reposicoes_pendentes)
                 VALUES (?, ?, ?)
             """, (1000.00, 0.00, 0.00))
-            self.conn.commit()
             self.dados = {
                 "valor_fundo": 1000.00,
                 "saldo_atual": 1000.00,
                 "depositos_pendentes": 0.00,
-                "reposicoes_pendentes": 0.00,
-                "movimentacoes": []
+                "reposicoes_pendentes": 0.00
             }
         
-        # Carrega movimentações existentes
-        cursor.execute("""
-            SELECT data, tipo, valor, responsavel, descricao, saldo 
-            FROM movimentacoes 
-            ORDER BY id ASC
-        """)
-        movs = cursor.fetchall()
-        for row in movs:
-            self.dados["movimentacoes"].append({
-                "data": row[0],
-                "tipo": row[1],
-                "valor": row[2],
-                "responsavel": row[3],
-                "descricao": row[4],
-                "saldo": row[5]
-            })
+        # Saldo atual a partir do estado gravado; o histórico é lido por página na tabela
+        carregar_saldos(self.dados)
         self.after(100, self.atualizar_interface)
 
+    @metricas.medido
     def salvar_dados(self):
         """Salva dados atuais no banco."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE config_fundo
-            SET valor_fundo = ?,
-                depositos_pendentes = ?,
-                reposicoes_pendentes = ?,
-                ultima_atualizacao = CURRENT_TIMESTAMP
-            WHERE id = (SELECT id FROM config_fundo ORDER BY id DESC LIMIT 1)
-        """, (
-            self.dados["valor_fundo"],
-            self.dados["depositos_pendentes"],
-            self.dados["reposicoes_pendentes"]
-        ))
-        self.conn.commit()
+        with banco.transacao() as conn:
+            gravar_config(conn, self.dados)
 
     def criar_lista_movimentacoes(self):
         """Cria a área que mostra o histórico de movimentações"""
@@ -396,7 +605,12 @@ class GestorFundoFixo(ctk.CTk):
         # Scrollbars
         vsb = ttk.Scrollbar(tv_frame, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(tv_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
+
+        # Tabela virtual: exibe o histórico por página conforme a rolagem
+        self.tabela = TabelaVirtual(
+            self.tree, vsb, formatar=self.formatar_movimentacao, iid=lambda mov: mov["id"]
+        )
 
         # Grid da tabela e scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
@@ -487,42 +701,13 @@ class GestorFundoFixo(ctk.CTk):
         """
         Aplica a lógica de entrada de dinheiro mantendo o controle do saldo real.
         """
-        # 1) Atualiza o saldo real primeiro
-        self.dados["saldo_atual"] += valor
-        
-        # 2) Se houver reposições pendentes, abate primeiro
-        if self.dados["reposicoes_pendentes"] > 0:
-            if self.dados["saldo_atual"] >= self.dados["valor_fundo"]:
-                # Se o saldo atual cobriu o valor do fundo, zera as reposições pendentes
-                self.dados["reposicoes_pendentes"] = 0.0
-            else:
-                # Caso contrário, reduz proporcionalmente as reposições pendentes
-                self.dados["reposicoes_pendentes"] = self.dados["valor_fundo"] - self.dados["saldo_atual"]
-        
-        # 3) Se o saldo ficou acima do valor do fundo, adiciona a diferença em depósitos pendentes
-        if self.dados["saldo_atual"] > self.dados["valor_fundo"]:
-            excesso = self.dados["saldo_atual"] - self.dados["valor_fundo"]
-            self.dados["depositos_pendentes"] += excesso
+        aplicar_entrada(self.dados, valor)
 
     def logica_saida(self, valor):
         """
         Aplica a lógica de saída de dinheiro mantendo o fundo fixo constante.
         """
-        # 1) Primeiro tenta abater de depósitos pendentes
-        if self.dados["depositos_pendentes"] > 0:
-            if valor <= self.dados["depositos_pendentes"]:
-                self.dados["depositos_pendentes"] -= valor
-                return  # Não afeta o saldo do fundo
-            else:
-                valor -= self.dados["depositos_pendentes"]
-                self.dados["depositos_pendentes"] = 0.0
-        
-        # 2) Se ainda há valor para saída, subtrai do saldo
-        self.dados["saldo_atual"] -= valor
-        
-        # 3) Atualiza reposições pendentes baseado no saldo atual
-        if self.dados["saldo_atual"] < self.dados["valor_fundo"]:
-            self.dados["reposicoes_pendentes"] = self.dados["valor_fundo"] - self.dados["saldo_atual"]
+        aplicar_saida(self.dados, valor)
 
     def registrar_movimentacao(self):
         """
@@ -544,28 +729,30 @@ class GestorFundoFixo(ctk.CTk):
 
             # Registra a movimentação
             movimentacao = {
-                "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                "data": datas.agora_iso(),
                 "tipo": tipo,
                 "valor": valor,
                 "responsavel": responsavel,
                 "descricao": descricao,
                 "saldo": self.dados["saldo_atual"]
             }
-            self.dados["movimentacoes"].append(movimentacao)
-
-            # Salva a movimentação no banco de dados
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO movimentacoes(data, tipo, valor, responsavel, descricao, saldo)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                movimentacao["data"], tipo, valor, responsavel, descricao, self.dados["saldo_atual"]
-            ))
-            self.conn.commit()
 
-            # Salva os dados e atualiza a interface
-            self.salvar_dados()
-            self.atualizar_interface()
+            with metricas.medir("fundo_fixo.GestorFundoFixoBase.registrar_movimentacao"):
+                # Salva a movimentação (e, periodicamente, um checkpoint dos saldos)
+                with banco.transacao() as conn:
+                    cursor = conn.execute("""
+                        INSERT INTO movimentacoes(data, tipo, valor, responsavel, descricao, saldo)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (
+                        movimentacao["data"], tipo, valor, responsavel, descricao, self.dados["saldo_atual"]
+                    ))
+                    movimentacao["id"] = cursor.lastrowid
+                    gravar_checkpoint(conn, self.dados, movimentacao["id"])
+
+                # Salva os dados; a movimentação nova entra no topo, sem recarregar a lista
+                self.salvar_dados()
+                self.atualizar_saldos()
+                self.tabela.inserir(movimentacao)
             self.limpar_campos()
 
         except ValueError as e:
@@ -638,21 +825,9 @@ class GestorFundoFixo(ctk.CTk):
         Gera um relatório detalhado das movimentações no período especificado.
         """
         try:
-            # Converte as strings de data para objetos datetime
-            formato = "%d/%m/%Y"
-            data_ini = datetime.strptime(data_ini_str, formato).date()
-            data_fim = datetime.strptime(data_fim_str, formato).date()
-
-            # Filtra as movimentações do período
-            movs_periodo = []
-            for mov in self.dados["movimentacoes"]:
-                dt = datetime.strptime(mov["data"], "%d/%m/%Y %H:%M").date()
-                if data_ini <= dt <= data_fim:
-                    movs_periodo.append(mov)
-
-            # Calcula totais
-            total_entrada = sum(m["valor"] for m in movs_periodo if m["tipo"] == "Entrada")
-            total_saida = sum(m["valor"] for m in movs_periodo if m["tipo"] == "Saída")
+            movs_periodo, total_entrada, total_saida = consultar_periodo(
+                data_ini_str, data_fim_str
+            )
 
             # Cria uma nova janela para mostrar o resumo
             resumo_toplevel = ctk.CTkToplevel(parent_dialog)
@@ -675,11 +850,11 @@ class GestorFundoFixo(ctk.CTk):
             text_box.insert("end", f"Total Saídas:   R$ {total_saida:.2f}\n\n")
 
             text_box.insert("end", "MOVIMENTAÇÕES:\n\n")
-            for mov in movs_periodo:
+            for data, tipo, valor, responsavel, descricao in movs_periodo:
                 text_box.insert(
                     "end",
-                    f"- {mov['data']} | {mov['tipo']} | R${mov['valor']:.2f} | "
-                    f"{mov.get('responsavel','')} | {mov['descricao']}\n"
+                    f"- {datas.para_br(data)} | {tipo} | R${valor:.2f} | "
+                    f"{responsavel or ''} | {descricao}\n"
                 )
 
             # Desabilita a edição do texto
@@ -703,22 +878,15 @@ class GestorFundoFixo(ctk.CTk):
             "Confirmar",
             "Deseja realmente excluir esta movimentação?"
         ):
-            item = selecionado[0]
-            # O índice na lista é invertido em relação à exibição
-            idx = len(self.dados["movimentacoes"]) - self.tree.index(item) - 1
-            
-            self.dados["movimentacoes"].pop(idx)
-            # Exclui do banco (busca movimento pela ordem inserida)
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT id FROM movimentacoes ORDER BY id ASC")
-            all_ids = [x[0] for x in cursor.fetchall()]
-            if idx < len(all_ids):
-                registro_id = all_ids[idx]
-                cursor.execute("DELETE FROM movimentacoes WHERE id = ?", (registro_id,))
-                self.conn.commit()
-            self.recalcular_saldos()
-            self.salvar_dados()
-            self.atualizar_interface()
+            with metricas.medir("fundo_fixo.GestorFundoFixoBase.excluir_movimentacao"):
+                # O iid da linha é o id da movimentação
+                saldos = excluir(self.dados, int(selecionado[0]))
+
+                # Atualiza só a linha removida e os saldos recalculados já exibidos
+                self.tabela.remover([selecionado[0]])
+                for recalculada, saldo in saldos.items():
+                    self.tabela.atualizar_colunas(recalculada, {"saldo": f"R$ {saldo:.2f}"})
+                self.atualizar_saldos()
 
     def editar_descricao(self):
         """
@@ -729,8 +897,9 @@ class GestorFundoFixo(ctk.CTk):
             messagebox.showwarning("Atenção", "Selecione uma movimentação para editar!")
             return
 
-        item = selecionado[0]
-        idx = len(self.dados["movimentacoes"]) - self.tree.index(item) - 1
+        mov = buscar_movimentacao(int(selecionado[0]))
+        if mov is None:
+            return
 
         # Cria uma janela para edição
         dialog = ctk.CTkToplevel(self)  # Corrigido: self.root -> self
@@ -745,46 +914,40 @@ class GestorFundoFixo(ctk.CTk):
 
         ctk.CTkLabel(dialog, text="Nova descrição:").pack(pady=5)
 
-        nova_desc_var = tk.StringVar(
-            value=self.dados["movimentacoes"][idx]["descricao"]
-        )
+        nova_desc_var = tk.StringVar(value=mov["descricao"])
         entry_desc = ctk.CTkEntry(dialog, textvariable=nova_desc_var, width=300)
         entry_desc.pack(pady=5)
 
         def salvar():
-            self.dados["movimentacoes"][idx]["descricao"] = nova_desc_var.get().strip()
-            self.salvar_dados()
-            self.atualizar_interface()
+            # A descrição não altera saldos: grava só a linha editada
+            descricao = nova_desc_var.get().strip()
+            banco.executar(
+                "UPDATE movimentacoes SET descricao = ? WHERE id = ?",
+                (descricao, mov["id"])
+            )
+            self.tabela.atualizar_colunas(mov["id"], {"descricao": descricao})
             dialog.destroy()
 
         ctk.CTkButton(dialog, text="Salvar", command=salvar).pack(pady=5)
 
-    def recalcular_saldos(self):
+    def recalcular_saldos(self, desde_id=None):
         """
-        Recalcula todos os saldos e valores pendentes após modificações.
+        Recalcula os saldos e valores pendentes após modificações a partir
+        da movimentação desde_id (padrão: todo o histórico).
         """
-        # Reinicia os valores para o padrão
-        self.dados["saldo_atual"] = self.dados["valor_fundo"]
-        self.dados["depositos_pendentes"] = 0.0
-        self.dados["reposicoes_pendentes"] = 0.0
-
-        # Recalcula cada movimentação
-        for mov in self.dados["movimentacoes"]:
-            tipo = mov["tipo"]
-            valor = mov["valor"]
-            
-            if tipo == "Entrada":
-                self.logica_entrada(valor)
-            else:  # "Saída"
-                self.logica_saida(valor)
-
-            mov["saldo"] = self.dados["saldo_atual"]
+        return recalcular(self.dados, desde_id)
 
     def atualizar_interface(self):
         """
         Atualiza todos os elementos visuais da interface.
         """
-        # Atualiza os labels de informação
+        self.atualizar_saldos()
+        self.atualizar_lista_movimentacoes()
+
+    def atualizar_saldos(self):
+        """
+        Atualiza os labels de valor do fundo, saldo e pendências.
+        """
         self.label_valor_fundo.configure(
             text=f"Valor do Fundo: R$ {self.dados['valor_fundo']:.2f}"
         )
@@ -797,32 +960,27 @@ class GestorFundoFixo(ctk.CTk):
         self.label_reposicoes.configure(
             text=f"Reposições Pendentes: R$ {self.dados['reposicoes_pendentes']:.2f}"
         )
-        
-        # Atualiza a lista de movimentações
-        self.atualizar_lista_movimentacoes()
 
+    @metricas.medido
     def atualizar_lista_movimentacoes(self):
         """
         Atualiza a tabela de movimentações com os dados mais recentes.
         """
-        # Limpa a tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Insere as movimentações na ordem reversa (mais recente no topo)
-        for mov in reversed(self.dados["movimentacoes"]):
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    mov["data"],
-                    mov["tipo"],
-                    f"R$ {mov['valor']:.2f}",
-                    mov.get("responsavel", ""),
-                    mov["descricao"],
-                    f"R$ {mov['saldo']:.2f}"
-                )
-            )
+        # Mais recentes no topo; as antigas são lidas do banco conforme a rolagem
+        self.tabela.carregar(fonte_movimentacoes())
+
+    def formatar_movimentacao(self, mov):
+        """
+        Formata uma movimentação para exibição na tabela.
+        """
+        return (
+            datas.para_br(mov["data"]),
+            mov["tipo"],
+            f"R$ {mov['valor']:.2f}",
+            mov["responsavel"] or "",
+            mov["descricao"],
+            f"R$ {mov['saldo']:.2f}"
+        )
 
     def limpar_campos(self):
         """
@@ -834,30 +992,22 @@ class GestorFundoFixo(ctk.CTk):
         self.tipo_var.set("Entrada")
 
     def run(self):
-        self.mainloop()
-
-def criar_tabelas(cursor):
-    """Cria as tabelas necessárias se não existirem"""
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS config_fundo (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            valor_fundo REAL NOT NULL,
-            depositos_pendentes REAL NOT NULL,
-            reposicoes_pendentes REAL NOT NULL,
-            ultima_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS movimentacoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            valor REAL NOT NULL,
-            responsavel TEXT,
-            descricao TEXT,
-            saldo REAL NOT NULL
-        )
-    """)
+        janelas.executar(self)
+
+
+class GestorFundoFixo(GestorFundoFixoBase, ctk.CTk):
+    """Fundo fixo em janela própria."""
+
+
+class GestorFundoFixoHospedado(GestorFundoFixoBase, ctk.CTkToplevel):
+    """Fundo fixo em uma janela do launcher."""
+
+
+def create_app(master=None):
+    if master is None:
+        return GestorFundoFixo()
+    return GestorFundoFixoHospedado(master)
+
 
 if __name__ == "__main__":
     app = GestorFundoFixo()
@@ -4,6 +4,11 @@ from datetime import datetime
 import customtkinter as ctk
 from tkinter import ttk, filedialog, messagebox
 
+import janelas
+import metricas
+from tabela_virtual import FonteLista, TabelaVirtual
+from tarefas import ExecutorTarefas
+
 # Configuração do tema
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -13,9 +18,60 @@ FONT_TITLE = ("Arial Bold", 24)
 FONT_LABEL = ("Arial Bold", 14)
 FONT_ENTRY = ("Arial", 14)
 
+
+@metricas.medido
+def gravar_inventario(tarefa, inventario, diretorio, timestamp):
+    """Grava os arquivos CSV do inventário (executada fora da thread da interface)"""
+    # Arquivo detalhado
+    caminho_detalhado = os.path.join(
+        diretorio,
+        f'inventario_{timestamp}_detalhado.csv'
+    )
+    with open(caminho_detalhado, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Local', 'Código', 'Quantidade'])
+        for local in inventario:
+            for codigo, qtd in inventario[local].items():
+                writer.writerow([local.upper(), codigo, qtd])
+    tarefa.progresso(1, 3)
+
+    # Arquivo consolidado
+    caminho_consolidado = os.path.join(
+        diretorio,
+        f'inventario_{timestamp}_consolidado.csv'
+    )
+    with open(caminho_consolidado, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Código', 'Quantidade Total'])
+        
+        codigos_totais = {}
+        for local in inventario:
+            for codigo, qtd in inventario[local].items():
+                codigos_totais[codigo] = codigos_totais.get(codigo, 0) + qtd
+        
+        for codigo, qtd in sorted(codigos_totais.items()):
+            writer.writerow([codigo, qtd])
+    tarefa.progresso(2, 3)
+
+    # Lista completa
+    caminho_lista = os.path.join(
+        diretorio,
+        f'inventario_{timestamp}_lista_completa.csv'
+    )
+    with open(caminho_lista, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Código'])
+        for local in inventario:
+            for codigo, qtd in inventario[local].items():
+                writer.writerows([codigo] for _ in range(qtd))
+    tarefa.progresso(3, 3)
+
+    return caminho_detalhado, caminho_consolidado, caminho_lista
+
+
 class InventoryApp:
-    def __init__(self):
-        self.root = ctk.CTk()
+    def __init__(self, master=None):
+        self.root = janelas.criar_janela(master)
         self.root.title("SISTEMA AUSTRAL - CONTROLE DE INVENTÁRIO")
         self.root.geometry("1400x800")
         self.root.resizable(False, False)
@@ -39,6 +95,10 @@ class InventoryApp:
             font=("Helvetica", 20, "bold")
         ).grid(row=0, column=0, pady=(10, 20))
 
+        # Gravação dos arquivos roda fora da thread da interface
+        self.tarefas = ExecutorTarefas(self.root)
+        self.salvando = False
+
         # Setup
         self.setup_variables()
         self.setup_ui()
@@ -149,7 +209,9 @@ class InventoryApp:
 
         scrollbar = ctk.CTkScrollbar(table_frame, command=self.tree.yview)
         scrollbar.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Tabela virtual: exibe a contagem por página conforme a rolagem
+        self.tabela = TabelaVirtual(self.tree, scrollbar)
 
         # Frame de ações
         action_frame = ctk.CTkFrame(self.main_frame, corner_radius=10)
@@ -162,7 +224,7 @@ class InventoryApp:
         )
         self.totais_label.pack(side="left", padx=20)
 
-        ctk.CTkButton(
+        self.btn_finalizar = ctk.CTkButton(
             action_frame,
             text="FINALIZAR INVENTÁRIO",
             command=self.finalizar_inventario,
@@ -171,7 +233,8 @@ class InventoryApp:
             font=("Arial Bold", 14),
             fg_color="green",
             hover_color="#45a049"
-        ).pack(side="right", padx=20)
+        )
+        self.btn_finalizar.pack(side="right", padx=20)
 
         # Footer
         self.footer = ctk.CTkFrame(self.main_frame, fg_color="black")
@@ -185,7 +248,7 @@ class InventoryApp:
             height=28,
             corner_radius=6,
             font=ctk.CTkFont(size=11, weight="bold"),
-            command=self.root.destroy,
+            command=lambda: janelas.fechar(self.root),
             fg_color="red"
         )
         self.btn_sair.pack(side="right", padx=10)
@@ -212,6 +275,7 @@ class InventoryApp:
         }
         self.historico_codigos = []
 
+    @metricas.medido
     def registrar_codigo(self, event=None):
         """Registra um código no inventário"""
         codigo = self.codigo.get().strip()
@@ -246,14 +310,15 @@ class InventoryApp:
         self.atualizar_historico()
         self.atualizar_totais()
 
+    @metricas.medido
     def atualizar_historico(self):
         """Atualiza a visualização do histórico"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        for local in self.inventario:
-            for codigo, qtd in self.inventario[local].items():
-                self.tree.insert('', 'end', values=(local.upper(), codigo, qtd))
+        linhas = [
+            (local.upper(), codigo, qtd)
+            for local in self.inventario
+            for codigo, qtd in self.inventario[local].items()
+        ]
+        self.tabela.carregar(FonteLista(linhas))
 
     def atualizar_totais(self):
         """Atualiza o total de itens no label"""
@@ -274,70 +339,58 @@ class InventoryApp:
             return
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        try:
-            # Arquivo detalhado
-            caminho_detalhado = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_detalhado.csv'
-            )
-            with open(caminho_detalhado, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Local', 'Código', 'Quantidade'])
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        writer.writerow([local.upper(), codigo, qtd])
-
-            # Arquivo consolidado
-            caminho_consolidado = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_consolidado.csv'
-            )
-            with open(caminho_consolidado, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Código', 'Quantidade Total'])
-                
-                codigos_totais = {}
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        codigos_totais[codigo] = codigos_totais.get(codigo, 0) + qtd
-                
-                for codigo, qtd in sorted(codigos_totais.items()):
-                    writer.writerow([codigo, qtd])
-
-            # Lista completa
-            caminho_lista = os.path.join(
-                diretorio,
-                f'inventario_{timestamp}_lista_completa.csv'
-            )
-            with open(caminho_lista, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Código'])
-                for local in self.inventario:
-                    for codigo, qtd in self.inventario[local].items():
-                        for _ in range(qtd):
-                            writer.writerow([codigo])
-
-            self.mostrar_resumo(
-                caminho_detalhado,
-                caminho_consolidado,
-                caminho_lista
-            )
-            
-        except Exception as e:
-            messagebox.showerror(
-                "Erro",
-                "Ocorreu um erro ao salvar os arquivos do inventário!"
+
+        # O inventário gravado sai da tela: o leitor continua funcionando e as
+        # leituras feitas durante a gravação formam um inventário novo
+        inventario, historico = self.inventario, self.historico_codigos
+        self.inventario = {local: {} for local in inventario}
+        self.historico_codigos = []
+        self.atualizar_historico()
+        self.atualizar_totais()
+        self.definir_salvando(True)
+
+        self.tarefas.executar(
+            gravar_inventario,
+            inventario,
+            diretorio,
+            timestamp,
+            ao_concluir=lambda caminhos: self.mostrar_resumo(inventario, *caminhos),
+            ao_erro=lambda erro: self.inventario_falhou(inventario, historico),
+            ao_progresso=lambda feito, total: self.btn_finalizar.configure(
+                text=f"SALVANDO... {feito}/{total}"
             )
+        )
+
+    def definir_salvando(self, salvando):
+        """Bloqueia (ou libera) a finalização enquanto os arquivos são gravados"""
+        self.salvando = salvando
+        self.btn_finalizar.configure(
+            state="disabled" if salvando else "normal",
+            text="SALVANDO..." if salvando else "FINALIZAR INVENTÁRIO"
+        )
 
-    def mostrar_resumo(self, caminho_detalhado, caminho_consolidado, caminho_lista):
-        """Mostra o resumo do inventário"""
+    def inventario_falhou(self, inventario, historico):
+        """Devolve à tela o inventário não gravado, somado às leituras feitas durante a gravação"""
+        for local, itens in inventario.items():
+            for codigo, qtd in itens.items():
+                self.inventario[local][codigo] = self.inventario[local].get(codigo, 0) + qtd
+        self.historico_codigos = historico + self.historico_codigos
+        self.atualizar_historico()
+        self.atualizar_totais()
+        self.definir_salvando(False)
+        messagebox.showerror(
+            "Erro",
+            "Ocorreu um erro ao salvar os arquivos do inventário!"
+        )
+
+    def mostrar_resumo(self, inventario, caminho_detalhado, caminho_consolidado, caminho_lista):
+        """Mostra o resumo do inventário gravado nos arquivos"""
         total_geral = 0
         resumo = "Resumo do Inventário:\n\n"
         
-        for local in self.inventario:
-            total_local = sum(self.inventario[local].values())
-            qtd_itens = len(self.inventario[local])
+        for local in inventario:
+            total_local = sum(inventario[local].values())
+            qtd_itens = len(inventario[local])
             resumo += f"{local.upper()}:\n"
             resumo += f"Total de itens únicos: {qtd_itens}\n"
             resumo += f"Total de peças: {total_local}\n\n"
@@ -349,12 +402,23 @@ class InventoryApp:
         resumo += f"- {caminho_consolidado}\n"
         resumo += f"- {caminho_lista}"
 
+        self.definir_salvando(False)
+        # Leituras feitas durante a gravação: a janela continua com o inventário novo
+        continuar = any(self.inventario.values())
+        if continuar:
+            resumo += "\n\nAs leituras feitas durante a gravação continuam na tela como um novo inventário."
+
         messagebox.showinfo("Inventário Finalizado", resumo)
-        self.root.destroy()
+        if not continuar:
+            janelas.fechar(self.root)
 
     def run(self):
         """Inicia o loop principal da aplicação"""
-        self.root.mainloop()
+        janelas.executar(self.root)
+
+
+def create_app(master=None):
+    return InventoryApp(master)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,117 @@
+"""
+Janelas das ferramentas do Sistema Austral.
+
+Cada ferramenta pode rodar de dois jeitos:
+
+- independente: cria sua própria raiz ctk.CTk() e seu mainloop;
+- hospedada: abre em um CTkToplevel da raiz do launcher, compartilhando o
+  mesmo interpretador Tcl, tema, fontes e relógio. Ao ser fechada, a janela
+  hospedada é apenas escondida, para reabrir instantaneamente; ao reabrir,
+  as ferramentas com dados do banco recarregam o que exibem (ao_reexibir).
+"""
+
+from datetime import datetime
+
+import customtkinter as ctk
+
+
+def criar_janela(master=None):
+    """Cria a janela da ferramenta: CTk própria ou CTkToplevel do launcher"""
+    if master is None:
+        return ctk.CTk()
+    janela = ctk.CTkToplevel(master)
+    janela.hospedada = True
+    return janela
+
+
+class JanelaHospedavel:
+    """Base das ferramentas que herdam da própria janela (ctk.CTk ou CTkToplevel)."""
+
+    hospedada = False
+
+    def __init__(self, master=None):
+        if master is None:
+            super().__init__()
+        else:
+            super().__init__(master)
+            self.hospedada = True
+
+
+def hospedada(janela):
+    """Indica se a janela pertence ao launcher"""
+    return getattr(janela, "hospedada", False)
+
+
+def executar(janela):
+    """Roda o mainloop apenas se a janela for independente"""
+    if not hospedada(janela):
+        janela.mainloop()
+
+
+def fechar(janela):
+    """Esconde a janela hospedada (fica em cache) ou destrói a independente"""
+    if not hospedada(janela):
+        janela.destroy()
+        return
+    try:
+        janela.grab_release()
+    except Exception:
+        pass
+    janela.withdraw()
+
+
+def mostrar(janela):
+    """
+    Exibe novamente uma janela hospedada que estava escondida.
+
+    Enquanto escondida, outras ferramentas podem ter alterado as mesmas
+    tabelas: se a janela tiver ao_reexibir, ele é chamado para recarregar.
+    """
+    janela.deiconify()
+    janela.lift()
+    janela.focus_force()
+    atualizar = getattr(janela, "ao_reexibir", None)
+    if atualizar is not None:
+        atualizar()
+
+
+class Relogio:
+    """Um único laço de after() que atualiza todos os relógios de uma raiz."""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+        self.relogios = []
+        self._atualizar()
+
+    def registrar(self, label, formatar):
+        """Adiciona um label atualizado a cada segundo com formatar(datetime)"""
+        self.relogios.append((label, formatar))
+        label.configure(text=formatar(datetime.now()))
+
+    def _atualizar(self):
+        """Atualiza os relógios visíveis e descarta os de janelas destruídas"""
+        agora = datetime.now()
+        ativos = []
+        for label, formatar in self.relogios:
+            try:
+                if not label.winfo_exists():
+                    continue
+                # Janelas escondidas (em cache) não precisam ser redesenhadas
+                if label.winfo_viewable():
+                    label.configure(text=formatar(agora))
+            except Exception:
+                continue
+            ativos.append((label, formatar))
+        self.relogios = ativos
+
+        # Próxima atualização na virada do segundo
+        self.raiz.after(1000 - agora.microsecond // 1000, self._atualizar)
+
+
+def registrar_relogio(label, formatar):
+    """Registra o label no relógio compartilhado pela raiz do Tk"""
+    raiz = label._root()
+    relogio = getattr(raiz, "relogio_austral", None)
+    if relogio is None:
+        relogio = raiz.relogio_austral = Relogio(raiz)
+    relogio.registrar(label, formatar)
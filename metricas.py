@@ -0,0 +1,143 @@
+"""
+Medição de tempo dos caminhos críticos das ferramentas.
+
+As operações instrumentadas (consultas ao banco, atualização de tabelas,
+exportações, etiquetas, consulta de CEP...) registram sua duração em um
+buffer circular em memória. As medições são gravadas em lote no arquivo
+assets/metricas.log e podem ser resumidas com p50/p95/p99 pela tela de
+desempenho do launcher.
+
+Uso:
+    @metricas.medido
+    def carregar_dados(self): ...
+
+    with metricas.medir("defeitos.pesquisar"):
+        ...
+
+Defina AUSTRAL_METRICAS=0 no ambiente para desligar a coleta.
+"""
+
+import atexit
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "metricas.log")
+CAPACIDADE = 5000  # medições mantidas em memória
+LOTE_GRAVACAO = 200  # medições acumuladas antes de gravar no log
+ATIVO = os.environ.get("AUSTRAL_METRICAS", "1") != "0"
+
+_medicoes = deque(maxlen=CAPACIDADE)
+_pendentes = deque(maxlen=CAPACIDADE)
+_gravacao_lock = threading.Lock()
+
+
+def registrar(nome, duracao_ms):
+    """Registra uma medição e grava o lote no log quando ele enche"""
+    if not ATIVO:
+        return
+    medicao = (time.time(), nome, duracao_ms)
+    _medicoes.append(medicao)
+    _pendentes.append(medicao)
+    if len(_pendentes) >= LOTE_GRAVACAO:
+        descarregar()
+
+
+@contextmanager
+def medir(nome):
+    """Mede a duração do bloco with"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+
+def medido(funcao=None, nome=None):
+    """
+    Decorador que mede cada chamada da função.
+
+    Sem nome, usa 'módulo.Classe.função'.
+    """
+    if funcao is None:
+        return functools.partial(medido, nome=nome)
+
+    rotulo = nome or f"{funcao.__module__}.{funcao.__qualname__}"
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            registrar(rotulo, (time.perf_counter() - inicio) * 1000)
+
+    return envolvida
+
+
+def descarregar():
+    """Grava no arquivo de log as medições ainda não gravadas"""
+    with _gravacao_lock:
+        linhas = []
+        while _pendentes:
+            try:
+                momento, nome, duracao_ms = _pendentes.popleft()
+            except IndexError:
+                break
+            quando = datetime.fromtimestamp(momento).isoformat(timespec="milliseconds")
+            linhas.append(f"{quando}\t{nome}\t{duracao_ms:.3f}\n")
+        if not linhas:
+            return
+        try:
+            os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+            with open(LOG_PATH, "a", encoding="utf-8") as arquivo:
+                arquivo.writelines(linhas)
+        except OSError:
+            pass  # métricas nunca devem derrubar a ferramenta
+
+
+def _percentil(ordenados, p):
+    """Percentil pelo método do posto mais próximo"""
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def estatisticas():
+    """
+    Resume as medições em memória por operação.
+
+    Retorna uma lista de dicts (nome, quantidade, p50, p95, p99, max, total em
+    ms), das operações mais lentas (p95) para as mais rápidas.
+    """
+    por_nome = {}
+    for _, nome, duracao_ms in list(_medicoes):
+        por_nome.setdefault(nome, []).append(duracao_ms)
+
+    resumo = []
+    for nome, duracoes in por_nome.items():
+        duracoes.sort()
+        resumo.append({
+            "nome": nome,
+            "quantidade": len(duracoes),
+            "p50": _percentil(duracoes, 50),
+            "p95": _percentil(duracoes, 95),
+            "p99": _percentil(duracoes, 99),
+            "max": duracoes[-1],
+            "total": sum(duracoes)
+        })
+    resumo.sort(key=lambda item: item["p95"], reverse=True)
+    return resumo
+
+
+def limpar():
+    """Descarta as medições em memória (as já gravadas no log permanecem)"""
+    descarregar()
+    _medicoes.clear()
+
+
+atexit.register(descarregar)
@@ -0,0 +1,352 @@
+"""
+Migrações versionadas do banco assets/austral.db.
+
+Cada migração tem um número de versão, uma descrição e uma lista de passos
+(comandos SQL ou funções que recebem a conexão). A versão aplicada fica
+registrada na tabela schema_version, e cada migração roda em sua própria
+transação, então bancos antigos são atualizados em qualquer ordem de abertura
+das ferramentas.
+"""
+
+import sqlite3
+
+from datas import sql_converter_coluna
+
+
+def _criar_tabelas_base(conn):
+    """Cria as tabelas que antes eram criadas por cada ferramenta"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_faturamento TEXT,
+            responsavel_faturamento TEXT,
+            numero_pedido TEXT UNIQUE,
+            status TEXT DEFAULT 'Faturado',
+            data_envio TEXT,
+            responsavel_envio TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS defeitos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_defeito TEXT,
+            tipo_defeito TEXT,
+            codigo_produto TEXT,
+            tamanho TEXT,
+            nome_vendedor TEXT,
+            descricao_defeito TEXT,
+            observacoes TEXT,
+            loja TEXT,
+            status TEXT DEFAULT 'Pendente'
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS config_fundo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            valor_fundo REAL NOT NULL,
+            depositos_pendentes REAL NOT NULL,
+            reposicoes_pendentes REAL NOT NULL,
+            ultima_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS movimentacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            valor REAL NOT NULL,
+            responsavel TEXT,
+            descricao TEXT,
+            saldo REAL NOT NULL
+        )
+    ''')
+
+
+# Carimbo de alteração em UTC: não volta no horário de verão e ordena como texto
+AGORA_UTC = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Colunas que, alteradas, fazem a linha sair de novo na exportação de alterações
+COLUNAS_RASTREADAS = {
+    "pedidos": (
+        "data_faturamento", "responsavel_faturamento", "numero_pedido",
+        "status", "data_envio", "responsavel_envio"
+    ),
+    "defeitos": (
+        "data_defeito", "tipo_defeito", "codigo_produto", "tamanho", "nome_vendedor",
+        "descricao_defeito", "observacoes", "loja", "status"
+    ),
+}
+
+# Colunas indexadas na busca de texto dos defeitos
+COLUNAS_BUSCA_DEFEITOS = ("codigo_produto", "nome_vendedor", "descricao_defeito", "observacoes")
+
+
+def _rastrear_alteracoes(tabela, coluna_data):
+    """Passos que criam atualizado_em e os triggers que o mantêm"""
+    return [
+        f"ALTER TABLE {tabela} ADD COLUMN atualizado_em TEXT",
+        # Linhas antigas: a melhor aproximação é a última data conhecida
+        f"UPDATE {tabela} SET atualizado_em = COALESCE({coluna_data}, '')",
+        f"CREATE INDEX IF NOT EXISTS idx_{tabela}_atualizado_em ON {tabela}(atualizado_em)",
+        f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_atualizado_em_insert
+            AFTER INSERT ON {tabela}
+            WHEN NEW.atualizado_em IS NULL
+            BEGIN
+                UPDATE {tabela} SET atualizado_em = {AGORA_UTC} WHERE id = NEW.id;
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_atualizado_em_update
+            AFTER UPDATE OF {", ".join(COLUNAS_RASTREADAS[tabela])} ON {tabela}
+            BEGIN
+                UPDATE {tabela} SET atualizado_em = {AGORA_UTC} WHERE id = NEW.id;
+            END
+        ''',
+    ]
+
+
+def _somar_contagem(linha, delta):
+    """Comando de trigger que soma delta ao contador (loja, status) da linha NEW/OLD"""
+    return f'''
+        INSERT INTO defeitos_contagem (loja, status, quantidade)
+        VALUES (COALESCE({linha}.loja, ''), COALESCE({linha}.status, ''), {delta})
+        ON CONFLICT (loja, status) DO UPDATE SET quantidade = quantidade + {delta};
+    '''
+
+
+# Dimensões do resumo diário de defeitos (além do dia)
+DIMENSOES_DIARIO = ("loja", "tipo_defeito", "descricao_defeito", "codigo_produto", "status")
+
+
+def _somar_diario(linha, delta):
+    """Comando de trigger que soma delta ao resumo diário da linha NEW/OLD"""
+    return f'''
+        INSERT INTO defeitos_diario (dia, {", ".join(DIMENSOES_DIARIO)}, quantidade)
+        VALUES (
+            COALESCE(substr({linha}.data_defeito, 1, 10), ''),
+            {", ".join(f"COALESCE({linha}.{c}, '')" for c in DIMENSOES_DIARIO)},
+            {delta}
+        )
+        ON CONFLICT (dia, {", ".join(DIMENSOES_DIARIO)})
+        DO UPDATE SET quantidade = quantidade + {delta};
+    '''
+
+
+def _limpar_diario(linha):
+    """Comando de trigger que remove o resumo diário da linha NEW/OLD se zerou"""
+    return f'''
+        DELETE FROM defeitos_diario
+        WHERE dia = COALESCE(substr({linha}.data_defeito, 1, 10), '')
+          AND {" AND ".join(f"{c} = COALESCE({linha}.{c}, '')" for c in DIMENSOES_DIARIO)}
+          AND quantidade <= 0;
+    '''
+
+
+# Alguma coluna do resumo diário mudou entre OLD e NEW
+MUDOU_DIARIO = " OR ".join(
+    f"OLD.{c} IS NOT NEW.{c}" for c in ("data_defeito",) + DIMENSOES_DIARIO
+)
+
+
+# (versão, descrição, passos)
+MIGRACOES = [
+    (1, "Tabelas base de pedidos, defeitos e fundo fixo", [
+        _criar_tabelas_base,
+    ]),
+    (2, "Índices para os filtros e ordenações das ferramentas", [
+        "CREATE INDEX IF NOT EXISTS idx_defeitos_status ON defeitos(status)",
+        "CREATE INDEX IF NOT EXISTS idx_defeitos_loja_status ON defeitos(loja, status)",
+        "CREATE INDEX IF NOT EXISTS idx_defeitos_codigo_produto ON defeitos(codigo_produto)",
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_data_faturamento ON pedidos(data_faturamento)",
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_status ON pedidos(status)",
+        "CREATE INDEX IF NOT EXISTS idx_movimentacoes_data ON movimentacoes(data)",
+        "ANALYZE",
+    ]),
+    (3, "Datas em ISO-8601 (ordenáveis) no lugar de dd/mm/YYYY", [
+        sql_converter_coluna("pedidos", "data_faturamento"),
+        sql_converter_coluna("pedidos", "data_envio"),
+        sql_converter_coluna("defeitos", "data_defeito"),
+        sql_converter_coluna("movimentacoes", "data"),
+        "CREATE INDEX IF NOT EXISTS idx_defeitos_data ON defeitos(data_defeito)",
+        "ANALYZE",
+    ]),
+    (4, "Exportação de alterações: atualizado_em e marcas por perfil", [
+        *_rastrear_alteracoes("pedidos", "COALESCE(data_envio, data_faturamento)"),
+        *_rastrear_alteracoes("defeitos", "data_defeito"),
+        '''
+            CREATE TABLE IF NOT EXISTS marcas_exportacao (
+                perfil TEXT PRIMARY KEY,
+                atualizado_em TEXT NOT NULL,
+                ultimo_id INTEGER NOT NULL,
+                exportado_em TEXT NOT NULL
+            )
+        ''',
+    ]),
+    (5, "Busca de texto (FTS5) nos defeitos", [
+        # Conteúdo externo: o índice guarda só os termos, o texto fica em defeitos
+        f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS defeitos_fts USING fts5(
+                {", ".join(COLUNAS_BUSCA_DEFEITOS)},
+                content='defeitos',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_fts_insert AFTER INSERT ON defeitos BEGIN
+                INSERT INTO defeitos_fts (rowid, {", ".join(COLUNAS_BUSCA_DEFEITOS)})
+                VALUES (NEW.id, {", ".join("NEW." + c for c in COLUNAS_BUSCA_DEFEITOS)});
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_fts_delete AFTER DELETE ON defeitos BEGIN
+                INSERT INTO defeitos_fts (defeitos_fts, rowid, {", ".join(COLUNAS_BUSCA_DEFEITOS)})
+                VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in COLUNAS_BUSCA_DEFEITOS)});
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_fts_update
+            AFTER UPDATE OF {", ".join(COLUNAS_BUSCA_DEFEITOS)} ON defeitos BEGIN
+                INSERT INTO defeitos_fts (defeitos_fts, rowid, {", ".join(COLUNAS_BUSCA_DEFEITOS)})
+                VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in COLUNAS_BUSCA_DEFEITOS)});
+                INSERT INTO defeitos_fts (rowid, {", ".join(COLUNAS_BUSCA_DEFEITOS)})
+                VALUES (NEW.id, {", ".join("NEW." + c for c in COLUNAS_BUSCA_DEFEITOS)});
+            END
+        ''',
+        "INSERT INTO defeitos_fts (defeitos_fts) VALUES ('rebuild')",
+    ]),
+    (6, "Contadores de defeitos por loja e status mantidos por triggers", [
+        '''
+            CREATE TABLE IF NOT EXISTS defeitos_contagem (
+                loja TEXT NOT NULL,
+                status TEXT NOT NULL,
+                quantidade INTEGER NOT NULL,
+                PRIMARY KEY (loja, status)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            INSERT INTO defeitos_contagem (loja, status, quantidade)
+            SELECT COALESCE(loja, ''), COALESCE(status, ''), COUNT(*)
+            FROM defeitos
+            GROUP BY 1, 2
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_contagem_insert AFTER INSERT ON defeitos BEGIN
+                {_somar_contagem("NEW", 1)}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_contagem_delete AFTER DELETE ON defeitos BEGIN
+                {_somar_contagem("OLD", -1)}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_contagem_update
+            AFTER UPDATE OF loja, status ON defeitos
+            WHEN OLD.loja IS NOT NEW.loja OR OLD.status IS NOT NEW.status
+            BEGIN
+                {_somar_contagem("OLD", -1)}
+                {_somar_contagem("NEW", 1)}
+            END
+        ''',
+    ]),
+    (7, "Resumo diário de defeitos para a análise de Pareto", [
+        f'''
+            CREATE TABLE IF NOT EXISTS defeitos_diario (
+                dia TEXT NOT NULL,
+                {" TEXT NOT NULL, ".join(DIMENSOES_DIARIO)} TEXT NOT NULL,
+                quantidade INTEGER NOT NULL,
+                PRIMARY KEY (dia, {", ".join(DIMENSOES_DIARIO)})
+            ) WITHOUT ROWID
+        ''',
+        f'''
+            INSERT INTO defeitos_diario (dia, {", ".join(DIMENSOES_DIARIO)}, quantidade)
+            SELECT COALESCE(substr(data_defeito, 1, 10), ''),
+                   {", ".join(f"COALESCE({c}, '')" for c in DIMENSOES_DIARIO)},
+                   COUNT(*)
+            FROM defeitos
+            GROUP BY {", ".join(str(i) for i in range(1, len(DIMENSOES_DIARIO) + 2))}
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_diario_insert AFTER INSERT ON defeitos BEGIN
+                {_somar_diario("NEW", 1)}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_diario_delete AFTER DELETE ON defeitos BEGIN
+                {_somar_diario("OLD", -1)}
+                {_limpar_diario("OLD")}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS defeitos_diario_update
+            AFTER UPDATE OF data_defeito, {", ".join(DIMENSOES_DIARIO)} ON defeitos
+            WHEN {MUDOU_DIARIO}
+            BEGIN
+                {_somar_diario("OLD", -1)}
+                {_limpar_diario("OLD")}
+                {_somar_diario("NEW", 1)}
+            END
+        ''',
+    ]),
+    (8, "Checkpoints do recálculo de saldos do fundo fixo", [
+        '''
+            CREATE TABLE IF NOT EXISTS fundo_checkpoints (
+                movimentacao_id INTEGER PRIMARY KEY,
+                valor_fundo REAL NOT NULL,
+                saldo_atual REAL NOT NULL,
+                depositos_pendentes REAL NOT NULL,
+                reposicoes_pendentes REAL NOT NULL
+            )
+        ''',
+    ]),
+]
+
+
+def versao_atual(conn):
+    """Retorna a última versão aplicada ao banco (0 se nenhuma)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica, em ordem, as migrações ainda não registradas em schema_version.
+
+    A conexão deve estar em modo autocommit (isolation_level=None). Retorna a
+    lista de versões aplicadas nesta chamada.
+    """
+    aplicadas = []
+    if versao_atual(conn) >= MIGRACOES[-1][0]:
+        return aplicadas
+
+    for versao, descricao, passos in MIGRACOES:
+        # Relê a versão a cada passo: outra ferramenta pode ter migrado antes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao <= versao_atual(conn):
+                conn.rollback()
+                continue
+            for passo in passos:
+                if callable(passo):
+                    passo(conn)
+                else:
+                    conn.execute(passo)
+            conn.execute(
+                "INSERT INTO schema_version (versao, descricao) VALUES (?, ?)",
+                (versao, descricao)
+            )
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        conn.commit()
+        aplicadas.append(versao)
+    return aplicadas
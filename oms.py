@@ -1,17 +1,242 @@
+import csv
+import json
 import os
+import re
 import sqlite3
 from datetime import datetime
-import pandas as pd
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 
+import banco
+import datas
+import exportacao
+import janelas
+import metricas
+from migracoes import AGORA_UTC
+from tabela_virtual import FonteConsulta, TabelaVirtual
+from tarefas import ExecutorTarefas
+
+LOTE_EXPEDICAO = 50  # leituras confirmadas acumuladas antes de gravar no banco
+INTERVALO_EXPEDICAO_MS = 2000  # gravação periódica das leituras pendentes
+PERFIL_EXPORTACAO = "pedidos"  # marca da exportação de alterações
+
+
+def fonte_pedidos():
+    """Fonte paginada da listagem de pedidos, dos mais recentes para os mais antigos"""
+    return FonteConsulta('''
+        SELECT id, data_faturamento, responsavel_faturamento, numero_pedido,
+               status, data_envio, responsavel_envio
+        FROM pedidos
+    ''', chave=("data_faturamento", "id"))
+
+
+# Cabeçalhos reconhecidos como a coluna do número do pedido na importação
+COLUNAS_PEDIDO = (
+    "numero_pedido", "numero pedido", "número pedido", "numero do pedido",
+    "número do pedido", "pedido", "order", "order id", "order_id"
+)
+
+
+def normalizar_numero(valor):
+    """Normaliza um número de pedido lido de arquivo ou texto"""
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # o Excel devolve 12345 como 12345.0
+    return str(valor).strip().upper()
+
+
+def _coluna_pedido(linhas):
+    """Extrai a coluna do pedido: pelo cabeçalho, se houver, ou a primeira"""
+    indice = 0
+    for n, linha in enumerate(linhas):
+        if not linha:
+            continue
+        if n == 0:
+            cabecalho = [str(c).strip().lower() if c is not None else "" for c in linha]
+            encontrados = [i for i, c in enumerate(cabecalho) if c in COLUNAS_PEDIDO]
+            if encontrados:
+                indice = encontrados[0]
+                continue
+        if indice < len(linha):
+            yield linha[indice]
+
+
+def ler_numeros_texto(texto):
+    """Separa um bloco colado em números (quebras de linha, espaços, vírgulas ou ;)"""
+    return [n for n in re.split(r"[\s,;]+", texto) if n]
+
+
+def ler_numeros_arquivo(caminho):
+    """Lê os números de pedido de um arquivo CSV/TXT ou XLSX"""
+    if os.path.splitext(caminho)[1].lower() in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        livro = load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            return list(_coluna_pedido(livro.worksheets[0].iter_rows(values_only=True)))
+        finally:
+            livro.close()
+
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        return list(_coluna_pedido(csv.reader(arquivo, dialeto)))
+
+
+@metricas.medido
+def importar_pedidos(numeros, responsavel, data_faturamento=None):
+    """
+    Grava vários pedidos em uma única transação, ignorando os já existentes.
+
+    Retorna (inseridos, duplicados); repetições dentro da própria lista
+    contam como duplicadas.
+    """
+    data_faturamento = data_faturamento or datas.hoje_iso()
+    lidos = [n for n in map(normalizar_numero, numeros) if n]
+    unicos = dict.fromkeys(lidos)
+
+    with banco.transacao() as conn:
+        # atualizado_em já preenchido: dispensa o trigger de inserção por linha
+        inseridos = conn.executemany(f'''
+            INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, atualizado_em)
+            VALUES (?, ?, ?, {AGORA_UTC})
+            ON CONFLICT(numero_pedido) DO NOTHING
+        ''', ((data_faturamento, responsavel, numero) for numero in unicos)).rowcount
+
+    return inseridos, len(lidos) - inseridos
+
+
+@metricas.medido
+def marcar_enviados(ids, data_envio, responsavel_envio):
+    """Marca vários pedidos como enviados em um único UPDATE; retorna quantos mudaram"""
+    with banco.transacao() as conn:
+        return conn.execute('''
+            UPDATE pedidos
+            SET status='Enviado', data_envio=?, responsavel_envio=?
+            WHERE id IN (SELECT value FROM json_each(?))
+        ''', (data_envio, responsavel_envio, json.dumps([int(i) for i in ids]))).rowcount
+
+
+@metricas.medido
+def excluir_pedidos(ids):
+    """Exclui vários pedidos em um único DELETE; retorna quantos foram excluídos"""
+    with banco.transacao() as conn:
+        return conn.execute(
+            'DELETE FROM pedidos WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps([int(i) for i in ids]),)
+        ).rowcount
+
+
+@metricas.medido
+def carregar_pendentes():
+    """Retorna {numero_pedido: id} dos pedidos ainda não enviados"""
+    return dict(banco.consultar(
+        "SELECT numero_pedido, id FROM pedidos WHERE status = 'Faturado'"
+    ))
+
+
+class Expedicao:
+    """
+    Conferência contínua de envios pelo leitor de código de barras.
+
+    Os pedidos pendentes ficam em memória; cada leitura é conferida no dict
+    e as confirmadas são gravadas no banco em lotes, não uma a uma.
+    """
+
+    def __init__(self, responsavel_envio, data_envio=None):
+        self.responsavel_envio = responsavel_envio
+        self.data_envio = data_envio or datas.hoje_iso()
+        self.pendentes = carregar_pendentes()
+        self.lidos = set()
+        self.buffer = []
+        self.confirmados = 0
+
+    def registrar(self, numero):
+        """Confere uma leitura: 'ok', 'repetido', 'enviado' ou 'desconhecido'"""
+        numero = normalizar_numero(numero)
+        pedido_id = self.pendentes.pop(numero, None)
+        if pedido_id is not None:
+            self.lidos.add(numero)
+            self.buffer.append(pedido_id)
+            self.confirmados += 1
+            return "ok"
+        if numero in self.lidos:
+            return "repetido"
+        # Só as leituras inválidas consultam o banco (índice único do número)
+        if banco.consultar_um("SELECT 1 FROM pedidos WHERE numero_pedido = ?", (numero,)):
+            return "enviado"
+        return "desconhecido"
+
+    @property
+    def lote_cheio(self):
+        return len(self.buffer) >= LOTE_EXPEDICAO
+
+    def gravar(self):
+        """Grava as leituras pendentes em um único UPDATE; retorna os ids gravados"""
+        if not self.buffer:
+            return []
+        ids, self.buffer = self.buffer, []
+        try:
+            marcar_enviados(ids, self.data_envio, self.responsavel_envio)
+        except sqlite3.Error:
+            self.buffer = ids + self.buffer  # tenta de novo no próximo lote
+            raise
+        return ids
+
+
+def importar_texto_pedidos(tarefa, texto, responsavel):
+    """Importa os pedidos de um bloco de texto colado (executada fora da thread da interface)"""
+    numeros = ler_numeros_texto(texto)
+    tarefa.verificar()
+    return importar_pedidos(numeros, responsavel)
+
+
+def importar_arquivo_pedidos(tarefa, caminho, responsavel):
+    """Importa os pedidos de um arquivo (executada fora da thread da interface)"""
+    numeros = ler_numeros_arquivo(caminho)
+    tarefa.verificar()
+    return importar_pedidos(numeros, responsavel)
+
+
+def exportar_pedidos(tarefa, caminho, inicio=None, fim=None, alteracoes=False):
+    """
+    Exporta os pedidos faturados no período (limites ISO, fim exclusivo).
+
+    Com alteracoes=True, só os inseridos ou alterados desde a última exportação.
+    """
+    desde = exportacao.ler_marca(PERFIL_EXPORTACAO) if alteracoes else None
+    where, params = exportacao.montar_filtro("data_faturamento", inicio, fim, desde)
+    sql = f'''
+        SELECT
+            strftime('%d/%m/%Y', data_faturamento) as "Data Faturamento",
+            responsavel_faturamento as "Responsável Faturamento",
+            numero_pedido as "Número Pedido",
+            status as "Status",
+            strftime('%d/%m/%Y', data_envio) as "Data Envio",
+            responsavel_envio as "Responsável Envio"
+        FROM pedidos{where}
+        ORDER BY data_faturamento DESC, id DESC
+    '''
+    # Só uma exportação sem período cobre tudo até agora e pode avançar a marca
+    return exportacao.exportar(
+        tarefa, caminho, sql, params,
+        perfil=None if inicio or fim else PERFIL_EXPORTACAO,
+        sql_marca=f"SELECT atualizado_em, id FROM pedidos{where} "
+                  "ORDER BY atualizado_em DESC, id DESC LIMIT 1"
+    )
+
+
 # Configuração do tema e aparência
 ctk.set_appearance_mode("dark")  # Modo escuro
 ctk.set_default_color_theme("blue")  # Tema azul
 
 class PedidoSinOMSApp:
-    def __init__(self):
-        self.root = ctk.CTk()
+    def __init__(self, master=None):
+        self.root = janelas.criar_janela(master)
         self.root.title("SISTEMA AUSTRAL - CONTROLE DE ENVIO DE PEDIDOS SINOMS")
         self.root.geometry("1400x700")
         self.root.resizable(False, False)
@@ -34,15 +259,12 @@ class PedidoSinOMSApp:
             font=("Helvetica", 20, "bold")
         ).grid(row=0, column=0, pady=(10, 20))
 
-        # Caminho para a pasta assets
-        self.assets_path = os.path.join(os.path.dirname(__file__), "assets")
-
-        # Verifica se a pasta assets existe, se não, cria
-        if not os.path.exists(self.assets_path):
-            os.makedirs(self.assets_path)
-
-        # Caminho completo para o banco de dados
-        self.db_path = os.path.join(self.assets_path, "austral.db")
+        # Trabalhos demorados (exportação) rodam fora da thread da interface
+        self.tarefas = ExecutorTarefas(self.root)
+        self.tarefa_exportacao = None
+        self.janela_importacao = None
+        self.expedicao = None
+        self.janela_expedicao = None
 
         self.setup_database()
         self.setup_ui()
@@ -60,21 +282,7 @@ class PedidoSinOMSApp:
 
     def setup_database(self):
         """Configura o banco de dados SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pedidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data_faturamento TEXT,
-                responsavel_faturamento TEXT,
-                numero_pedido TEXT UNIQUE,
-                status TEXT DEFAULT 'Faturado',
-                data_envio TEXT,
-                responsavel_envio TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        banco.inicializar()
 
     def setup_ui(self):
         """Configura a interface gráfica"""
@@ -102,7 +310,20 @@ class PedidoSinOMSApp:
             width=250,
             fg_color="#00AEEF",
             hover_color="#1976D2"
-        ).grid(row=1, column=0, columnspan=4, pady=20)
+        ).grid(row=1, column=0, columnspan=2, pady=20)
+
+        # Botão Importar (vários pedidos de uma vez)
+        self.btn_importar = ctk.CTkButton(
+            entry_frame,
+            text="IMPORTAR PEDIDOS",
+            font=("Arial Bold", 14),
+            command=self.abrir_importacao,
+            height=45,
+            width=250,
+            fg_color="#00AEEF",
+            hover_color="#1976D2"
+        )
+        self.btn_importar.grid(row=1, column=2, columnspan=2, pady=20)
 
         # Frame para a tabela
         table_frame = ctk.CTkFrame(self.main_frame, corner_radius=10)
@@ -140,7 +361,15 @@ class PedidoSinOMSApp:
         # Scrollbar
         scrollbar = ctk.CTkScrollbar(table_frame, command=self.tree.yview)
         scrollbar.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Tabela virtual: carrega as linhas por página conforme a rolagem
+        # iid de cada linha = pedidos.id, para atualizar só as linhas alteradas
+        self.tabela = TabelaVirtual(
+            self.tree,
+            scrollbar,
+            formatar=self.formatar_linha,
+            iid=lambda row: row[0]
+        )
 
         # Frame inferior para botões de ação
         action_frame = ctk.CTkFrame(self.main_frame, corner_radius=10)
@@ -167,7 +396,7 @@ class PedidoSinOMSApp:
             hover_color="#CC3333"
         ).grid(row=0, column=1, padx=10, pady=10)
 
-        ctk.CTkButton(
+        self.btn_exportar = ctk.CTkButton(
             action_frame,
             text="EXPORTAR PARA EXCEL",
             font=("Arial Bold", 14),
@@ -175,7 +404,18 @@ class PedidoSinOMSApp:
             width=200,
             fg_color="green",
             hover_color="#45a049"
-        ).grid(row=0, column=2, padx=10, pady=10)
+        )
+        self.btn_exportar.grid(row=0, column=2, padx=10, pady=10)
+
+        ctk.CTkButton(
+            action_frame,
+            text="MODO EXPEDIÇÃO",
+            font=("Arial Bold", 14),
+            command=self.abrir_expedicao,
+            width=200,
+            fg_color="#00AEEF",
+            hover_color="#1976D2"
+        ).grid(row=0, column=3, padx=10, pady=10)
 
         # Footer com botão SAIR e créditos
         self.footer = ctk.CTkFrame(self.main_frame, fg_color="black")
@@ -189,7 +429,7 @@ class PedidoSinOMSApp:
             height=28,
             corner_radius=6,
             font=ctk.CTkFont(size=11, weight="bold"),
-            command=self.root.destroy,
+            command=lambda: janelas.fechar(self.root),
             fg_color="red"
         )
         self.btn_sair.pack(side="right", padx=10)
@@ -206,7 +446,7 @@ class PedidoSinOMSApp:
 
     def adicionar_pedido(self):
         """Adiciona um novo pedido ao banco de dados"""
-        data_faturamento = datetime.now().strftime('%d/%m/%Y')
+        data_faturamento = datas.hoje_iso()
         responsavel = self.responsavel_entry.get().strip().upper()
         numero_pedido = self.numero_pedido_entry.get().strip().upper()
 
@@ -214,51 +454,138 @@ class PedidoSinOMSApp:
             messagebox.showwarning("Atenção", "Preencha todos os campos.")
             return
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         try:
-            cursor.execute('''
-                INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido)
-                VALUES (?, ?, ?)
-            ''', (data_faturamento, responsavel, numero_pedido))
-            conn.commit()
-            self.carregar_dados()
+            with metricas.medir("oms.PedidoSinOMSApp.adicionar_pedido"):
+                cursor = banco.executar('''
+                    INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido)
+                    VALUES (?, ?, ?)
+                ''', (data_faturamento, responsavel, numero_pedido))
+                # O pedido novo é o mais recente: entra no topo, sem recarregar a tabela
+                self.tabela.inserir((
+                    cursor.lastrowid, data_faturamento, responsavel, numero_pedido,
+                    "Faturado", None, None
+                ))
             self.numero_pedido_entry.delete(0, 'end')
         except sqlite3.IntegrityError:
             messagebox.showwarning("Erro", "Número de pedido já existe.")
-        finally:
-            conn.close()
 
+    def abrir_importacao(self):
+        """Abre a janela de importação de pedidos (texto colado ou arquivo)"""
+        responsavel = self.responsavel_entry.get().strip().upper()
+        if not responsavel:
+            messagebox.showwarning("Atenção", "Preencha o responsável antes de importar.")
+            return
+
+        self.janela_importacao = ctk.CTkToplevel(self.root)
+        self.janela_importacao.title(f"Importar pedidos - {responsavel}")
+        self.janela_importacao.geometry("420x480")
+        self.janela_importacao.transient(self.root)
+        self.janela_importacao.grab_set()
+
+        ctk.CTkLabel(
+            self.janela_importacao,
+            text="COLE OS NÚMEROS DOS PEDIDOS:",
+            font=("Arial Bold", 14)
+        ).pack(padx=20, pady=(20, 5))
+
+        self.texto_importacao = ctk.CTkTextbox(self.janela_importacao, font=("Arial", 14))
+        self.texto_importacao.pack(padx=20, pady=5, fill="both", expand=True)
+
+        ctk.CTkButton(
+            self.janela_importacao,
+            text="IMPORTAR TEXTO",
+            font=("Arial Bold", 14),
+            command=lambda: self.importar_texto(responsavel),
+            fg_color="#00AEEF",
+            hover_color="#1976D2"
+        ).pack(padx=20, pady=(10, 5), fill="x")
+
+        ctk.CTkButton(
+            self.janela_importacao,
+            text="IMPORTAR ARQUIVO (CSV/XLSX)",
+            font=("Arial Bold", 14),
+            command=lambda: self.importar_arquivo(responsavel),
+            fg_color="green",
+            hover_color="#45a049"
+        ).pack(padx=20, pady=(5, 20), fill="x")
+
+    def importar_texto(self, responsavel):
+        """Importa os números colados na janela de importação em segundo plano"""
+        texto = self.texto_importacao.get("1.0", "end")
+        if not texto.strip():
+            messagebox.showwarning("Atenção", "Nenhum número de pedido informado.",
+                                   parent=self.janela_importacao)
+            return
+        self.btn_importar.configure(state="disabled", text="IMPORTANDO...")
+        self.janela_importacao.withdraw()
+        self.tarefas.executar(
+            importar_texto_pedidos,
+            texto,
+            responsavel,
+            ao_concluir=self.importacao_concluida,
+            ao_erro=self.importacao_falhou
+        )
+
+    def importar_arquivo(self, responsavel):
+        """Importa os pedidos de um arquivo CSV ou XLSX em segundo plano"""
+        caminho = filedialog.askopenfilename(
+            title="Importar pedidos",
+            parent=self.janela_importacao,
+            filetypes=[("Planilhas", "*.csv *.txt *.xlsx"), ("Todos os arquivos", "*.*")]
+        )
+        if not caminho:
+            return
+        self.btn_importar.configure(state="disabled", text="IMPORTANDO...")
+        self.janela_importacao.withdraw()
+        self.tarefas.executar(
+            importar_arquivo_pedidos,
+            caminho,
+            responsavel,
+            ao_concluir=self.importacao_concluida,
+            ao_erro=self.importacao_falhou
+        )
+
+    def importacao_concluida(self, resultado):
+        """Recarrega a tabela uma única vez e mostra o resumo da importação"""
+        inseridos, duplicados = resultado
+        self.finalizar_importacao()
+        self.carregar_dados()
+        messagebox.showinfo(
+            "Importação concluída",
+            f"{inseridos} pedido(s) inserido(s)\n{duplicados} duplicado(s) ignorado(s)"
+        )
+
+    def importacao_falhou(self, erro):
+        """Finaliza a importação com erro"""
+        self.finalizar_importacao()
+        messagebox.showerror("Erro", f"Erro ao importar pedidos: {erro}")
+
+    def finalizar_importacao(self):
+        """Fecha a janela de importação e restaura o botão"""
+        self.btn_importar.configure(state="normal", text="IMPORTAR PEDIDOS")
+        if self.janela_importacao is not None:
+            self.janela_importacao.destroy()
+            self.janela_importacao = None
+
+    @metricas.medido
     def carregar_dados(self):
         """Carrega os dados do banco para a tabela"""
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT data_faturamento, responsavel_faturamento, numero_pedido, 
-                   status, data_envio, responsavel_envio 
-            FROM pedidos
-            ORDER BY data_faturamento DESC
-        ''')
-
-        for row in cursor.fetchall():
-            valores = list(row)
-            # Formatação de datas
-            for i in [0, 4]:  # índices das colunas de data
-                if valores[i]:
-                    try:
-                        data = datetime.strptime(valores[i], '%Y-%m-%d').strftime('%d/%m/%Y')
-                        valores[i] = data
-                    except ValueError:
-                        pass
-
-            self.tree.insert("", "end", values=[str(v).upper() if v is not None else "" for v in valores])
-        conn.close()
+        self.tabela.carregar(fonte_pedidos())
+
+    def ao_reexibir(self):
+        """Ao reabrir a janela hospedada, recarrega os pedidos"""
+        self.carregar_dados()
+
+    def formatar_linha(self, row):
+        """Formata uma linha do banco para exibição na tabela"""
+        valores = list(row)[1:]
+        # Formatação de datas (gravadas em ISO no banco)
+        for i in [0, 4]:  # índices das colunas de data
+            valores[i] = datas.para_br(valores[i])
+        return [str(v).upper() if v is not None else "" for v in valores]
 
     def marcar_como_enviado(self):
-        """Marca um pedido como enviado"""
+        """Marca os pedidos selecionados como enviados"""
         selected_items = self.tree.selection()
         if not selected_items:
             messagebox.showwarning("Atenção", "Selecione um ou mais pedidos.")
@@ -272,80 +599,240 @@ class PedidoSinOMSApp:
         responsavel_envio = responsavel_envio_dialog.get_input()
 
         if responsavel_envio:
-            data_envio = datetime.now().strftime("%d/%m/%Y")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            for item in selected_items:
-                pedido = self.tree.item(item)["values"][2]
-                cursor.execute('''
-                    UPDATE pedidos 
-                    SET status="Enviado", data_envio=?, responsavel_envio=? 
-                    WHERE numero_pedido=?
-                ''', (data_envio, responsavel_envio.upper(), pedido))
-            conn.commit()
-            conn.close()
-            self.carregar_dados()
+            data_envio = datas.hoje_iso()
+            responsavel_envio = responsavel_envio.upper()
+            try:
+                # Mede só a gravação e a tabela, sem o tempo do usuário nos diálogos
+                with metricas.medir("oms.PedidoSinOMSApp.marcar_como_enviado"):
+                    marcar_enviados(selected_items, data_envio, responsavel_envio)
+                    # Atualiza só as colunas alteradas das linhas selecionadas
+                    self.tabela.atualizar_linhas(selected_items, {
+                        "STATUS": "ENVIADO",
+                        "ENVIO": datas.para_br(data_envio),
+                        "RESPONSÁVEL ENVIO": responsavel_envio
+                    })
+            except sqlite3.Error as e:
+                messagebox.showerror("Erro", f"Erro ao marcar pedido(s): {str(e)}")
+                return
+
             messagebox.showinfo("Sucesso", "Pedido(s) marcado(s) como enviado(s)!")
 
     def excluir_pedido(self):
-        """Exclui um pedido selecionado"""
+        """Exclui os pedidos selecionados"""
         selected_items = self.tree.selection()
         if not selected_items:
             messagebox.showwarning("Atenção", "Selecione um ou mais pedidos para excluir.")
             return
 
         if messagebox.askyesno("Confirmar Exclusão", f"Deseja realmente excluir os {len(selected_items)} pedidos selecionados?"):
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
             try:
-                for item in selected_items:
-                    pedido = self.tree.item(item)["values"][2]
-                    cursor.execute('DELETE FROM pedidos WHERE numero_pedido=?', (pedido,))
-                conn.commit()
+                with metricas.medir("oms.PedidoSinOMSApp.excluir_pedido"):
+                    excluir_pedidos(selected_items)
+                    self.tabela.remover(selected_items)
                 messagebox.showinfo("Sucesso", "Pedido(s) excluído(s) com sucesso!")
-                self.carregar_dados()
             except sqlite3.Error as e:
                 messagebox.showerror("Erro", f"Erro ao excluir pedido(s): {str(e)}")
-            finally:
-                conn.close()
+
+    def abrir_expedicao(self):
+        """Abre o modo expedição, conferindo os pedidos lidos pelo leitor"""
+        if self.expedicao is not None:
+            self.janela_expedicao.lift()
+            return
+
+        responsavel_envio_dialog = ctk.CTkInputDialog(
+            text="Digite o nome do responsável pelo envio:",
+            title="Responsável pelo Envio"
+        )
+        responsavel_envio_dialog.geometry("450x200+600+300")
+        responsavel_envio = responsavel_envio_dialog.get_input()
+        if not responsavel_envio:
+            return
+
+        try:
+            self.expedicao = Expedicao(responsavel_envio.strip().upper())
+        except sqlite3.Error as e:
+            messagebox.showerror("Erro", f"Erro ao carregar pedidos pendentes: {str(e)}")
+            return
+
+        self.janela_expedicao = ctk.CTkToplevel(self.root)
+        self.janela_expedicao.title(f"Modo expedição - {self.expedicao.responsavel_envio}")
+        self.janela_expedicao.geometry("500x320")
+        self.janela_expedicao.transient(self.root)
+        self.janela_expedicao.protocol("WM_DELETE_WINDOW", self.fechar_expedicao)
+
+        ctk.CTkLabel(
+            self.janela_expedicao,
+            text="LEIA O CÓDIGO DO PEDIDO:",
+            font=("Arial Bold", 16)
+        ).pack(padx=20, pady=(20, 5))
+
+        self.leitura_entry = ctk.CTkEntry(self.janela_expedicao, font=("Arial", 18), height=45)
+        self.leitura_entry.pack(padx=20, pady=5, fill="x")
+        self.leitura_entry.bind("<Return>", lambda e: self.registrar_leitura())
+        self.leitura_entry.focus_set()
+
+        self.resultado_leitura = ctk.CTkLabel(
+            self.janela_expedicao,
+            text="",
+            font=("Arial Bold", 20),
+            height=60,
+            corner_radius=8
+        )
+        self.resultado_leitura.pack(padx=20, pady=10, fill="x")
+
+        self.contagem_expedicao = ctk.CTkLabel(self.janela_expedicao, font=("Arial", 14))
+        self.contagem_expedicao.pack(padx=20, pady=5)
+        self.atualizar_contagem_expedicao()
+
+        ctk.CTkButton(
+            self.janela_expedicao,
+            text="ENCERRAR EXPEDIÇÃO",
+            font=("Arial Bold", 14),
+            command=self.fechar_expedicao,
+            fg_color="red",
+            hover_color="#CC3333"
+        ).pack(padx=20, pady=(10, 20))
+
+        self.agendar_gravacao_expedicao()
+
+    def registrar_leitura(self):
+        """Confere a leitura em memória e dá o retorno imediatamente"""
+        numero = self.leitura_entry.get()
+        self.leitura_entry.delete(0, 'end')
+        if not numero.strip():
+            return
+
+        resultado = self.expedicao.registrar(numero)
+        mensagens = {
+            "ok": ("#2E7D32", "ENVIADO"),
+            "repetido": ("#F9A825", "JÁ LIDO"),
+            "enviado": ("#F9A825", "JÁ ENVIADO"),
+            "desconhecido": ("#C62828", "NÃO ENCONTRADO")
+        }
+        cor, texto = mensagens[resultado]
+        self.resultado_leitura.configure(
+            text=f"{normalizar_numero(numero)} - {texto}", fg_color=cor
+        )
+        if resultado != "ok":
+            self.janela_expedicao.bell()
+
+        if self.expedicao.lote_cheio:
+            self.gravar_expedicao()
+        self.atualizar_contagem_expedicao()
+
+    def atualizar_contagem_expedicao(self):
+        """Mostra quantos pedidos foram conferidos e quantos ainda faltam gravar"""
+        self.contagem_expedicao.configure(
+            text=f"Conferidos: {self.expedicao.confirmados}   "
+                 f"Aguardando gravação: {len(self.expedicao.buffer)}   "
+                 f"Pendentes: {len(self.expedicao.pendentes)}"
+        )
+
+    def gravar_expedicao(self):
+        """Grava o lote de leituras e atualiza só as linhas correspondentes"""
+        try:
+            ids = self.expedicao.gravar()
+        except sqlite3.Error as e:
+            messagebox.showerror("Erro", f"Erro ao gravar envios: {str(e)}",
+                                 parent=self.janela_expedicao)
+            return False
+
+        self.tabela.atualizar_linhas(ids, {
+            "STATUS": "ENVIADO",
+            "ENVIO": datas.para_br(self.expedicao.data_envio),
+            "RESPONSÁVEL ENVIO": self.expedicao.responsavel_envio
+        })
+        return True
+
+    def agendar_gravacao_expedicao(self):
+        """Grava periodicamente as leituras que não chegaram a encher um lote"""
+        if self.expedicao is None:
+            return
+        self.gravar_expedicao()
+        self.atualizar_contagem_expedicao()
+        self.gravacao_agendada = self.janela_expedicao.after(
+            INTERVALO_EXPEDICAO_MS, self.agendar_gravacao_expedicao
+        )
+
+    def fechar_expedicao(self):
+        """Grava as leituras restantes e encerra o modo expedição"""
+        if not self.gravar_expedicao():
+            return
+        confirmados = self.expedicao.confirmados
+        self.janela_expedicao.after_cancel(self.gravacao_agendada)
+        self.expedicao = None
+        self.janela_expedicao.destroy()
+        self.janela_expedicao = None
+        messagebox.showinfo("Expedição encerrada", f"{confirmados} pedido(s) marcado(s) como enviado(s)!")
 
     def exportar_excel(self):
-        """Exporta os dados para um arquivo Excel"""
+        """Exporta os pedidos para Excel ou CSV, opcionalmente por período"""
+        # Com uma exportação em andamento, o botão passa a cancelá-la
+        if self.tarefa_exportacao is not None:
+            self.tarefa_exportacao.cancelar()
+            return
+
+        opcoes = exportacao.pedir_opcoes(self.root)
+        if opcoes is None:
+            return
+
         data_atual = datetime.now().strftime("%d%m%Y")
         nome_arquivo = f"sinoms_{data_atual}.xlsx"
 
         export_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
             initialfile=nome_arquivo,
-            title="Salvar arquivo Excel",
-            filetypes=[("Excel files", "*.xlsx")]
+            title="Salvar exportação",
+            filetypes=exportacao.TIPOS_ARQUIVO
         )
 
         if export_path:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                df = pd.read_sql_query('''
-                    SELECT 
-                        data_faturamento as "Data Faturamento",
-                        responsavel_faturamento as "Responsável Faturamento",
-                        numero_pedido as "Número Pedido",
-                        status as "Status",
-                        data_envio as "Data Envio",
-                        responsavel_envio as "Responsável Envio"
-                    FROM pedidos
-                    ORDER BY data_faturamento DESC
-                ''', conn)
-
-                df.to_excel(export_path, index=False)
-                messagebox.showinfo("Sucesso", f"Dados exportados para {export_path}")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao exportar dados: {str(e)}")
-            finally:
-                conn.close()
+            self.btn_exportar.configure(text="CANCELAR EXPORTAÇÃO")
+            self.tarefa_exportacao = self.tarefas.executar(
+                exportar_pedidos,
+                export_path,
+                opcoes["inicio"],
+                opcoes["fim"],
+                opcoes["alteracoes"],
+                ao_concluir=self.exportacao_concluida,
+                ao_erro=self.exportacao_falhou,
+                ao_progresso=self.exportacao_progresso,
+                ao_cancelar=self.exportacao_cancelada
+            )
+
+    def exportacao_progresso(self, feito, total):
+        """Mostra o andamento da exportação no botão"""
+        if total:
+            self.btn_exportar.configure(text=f"CANCELAR ({feito * 100 // total}%)")
+
+    def exportacao_concluida(self, export_path):
+        """Finaliza a exportação com sucesso"""
+        self.finalizar_exportacao()
+        messagebox.showinfo("Sucesso", f"Dados exportados para {export_path}")
+
+    def exportacao_falhou(self, erro):
+        """Finaliza a exportação com erro"""
+        self.finalizar_exportacao()
+        messagebox.showerror("Erro", f"Erro ao exportar dados: {str(erro)}")
+
+    def exportacao_cancelada(self):
+        """Finaliza a exportação cancelada pelo usuário"""
+        self.finalizar_exportacao()
+        messagebox.showinfo("Exportação", "Exportação cancelada.")
+
+    def finalizar_exportacao(self):
+        """Restaura o botão de exportação"""
+        self.tarefa_exportacao = None
+        self.btn_exportar.configure(text="EXPORTAR PARA EXCEL")
 
     def run(self):
         """Inicia a aplicação"""
-        self.root.mainloop()
+        janelas.executar(self.root)
+
+
+def create_app(master=None):
+    return PedidoSinOMSApp(master)
+
 
 if __name__ == "__main__":
     app = PedidoSinOMSApp()
@@ -8,6 +8,8 @@ import customtkinter as ctk
 from dataclasses import dataclass
 from typing import List, Dict, Optional
 
+import metricas
+
 # Configurações básicas de fonte
 FONT_TITLE = ("Arial", 19, "bold")
 FONT_LABEL = ("Arial", 12)
@@ -62,6 +64,40 @@ class Venda:
             data=data['data']
         )
 
+@metricas.medido
+def ler_vendas(caminho: str) -> List[Venda]:
+    """Lê as vendas de um arquivo de backup JSON"""
+    with open(caminho, 'r', encoding='utf-8') as file:
+        return [Venda.from_dict(venda_dict) for venda_dict in json.load(file)]
+
+def acumular_venda(venda: Venda, resumo_pagamentos: dict, resumo_bandeiras: dict, trocas: list):
+    """Soma uma venda aos resumos por pagamento e bandeira"""
+    key_pagamento = venda.tipo_pagamento
+    if venda.detalhes_pagamento and venda.tipo_pagamento not in ["Dinheiro", "PIX", "Troca"]:
+        key_pagamento += f" - {venda.detalhes_pagamento}"
+
+    resumo_pagamentos[key_pagamento] = resumo_pagamentos.get(key_pagamento, Decimal('0.00')) + venda.valor
+
+    if venda.bandeira:
+        resumo_bandeiras[venda.bandeira] = resumo_bandeiras.get(venda.bandeira, Decimal('0.00')) + venda.valor
+
+    if venda.troca:
+        trocas.append(venda)
+
+@metricas.medido
+def resumir_vendas(vendas: List[Venda]) -> tuple:
+    """Retorna (total geral, resumo por tipo, resumo por bandeira, trocas)"""
+    total_geral = Decimal('0.00')
+    resumo_por_tipo = {}
+    resumo_por_bandeira = {}
+    trocas = []
+
+    for venda in vendas:
+        acumular_venda(venda, resumo_por_tipo, resumo_por_bandeira, trocas)
+        total_geral += venda.valor
+
+    return total_geral, resumo_por_tipo, resumo_por_bandeira, trocas
+
 class SistemaCaixa:
     """Sistema de gerenciamento de vendas com interface gráfica"""
 
@@ -268,11 +304,12 @@ class SistemaCaixa:
             if not dados_venda:
                 return
 
-            venda = Venda(**dados_venda)
-            self.vendas.append(venda)
-            self._adicionar_venda_treeview(venda)
-            self.atualizar_resumo()
-            self.salvar_vendas()
+            with metricas.medir("sistema_jessica.SistemaCaixa.adicionar_venda"):
+                venda = Venda(**dados_venda)
+                self.vendas.append(venda)
+                self._adicionar_venda_treeview(venda)
+                self.atualizar_resumo()
+                self.salvar_vendas()
             self.limpar_campos()
 
             messagebox.showinfo("Sucesso", "Venda registrada com sucesso!")
@@ -363,6 +400,7 @@ class SistemaCaixa:
         self.boleta_entry.delete(0, tk.END)
         self.vendedor_cb.focus_set()
 
+    @metricas.medido
     def gerar_relatorio(self):
         if not self.vendas:
             messagebox.showinfo("Relatório", "Nenhuma venda registrada.")
@@ -436,17 +474,7 @@ class SistemaCaixa:
         text_area.insert(tk.END, f"\nTOTAL GERAL DE VENDAS: R$ {total_geral:.2f}\n")
 
     def _atualizar_resumos(self, venda: Venda, resumo_pagamentos: dict, resumo_bandeiras: dict, trocas: list):
-        key_pagamento = venda.tipo_pagamento
-        if venda.detalhes_pagamento and venda.tipo_pagamento not in ["Dinheiro", "PIX", "Troca"]:
-            key_pagamento += f" - {venda.detalhes_pagamento}"
-
-        resumo_pagamentos[key_pagamento] = resumo_pagamentos.get(key_pagamento, Decimal('0.00')) + venda.valor
-
-        if venda.bandeira:
-            resumo_bandeiras[venda.bandeira] = resumo_bandeiras.get(venda.bandeira, Decimal('0.00')) + venda.valor
-
-        if venda.troca:
-            trocas.append(venda)
+        acumular_venda(venda, resumo_pagamentos, resumo_bandeiras, trocas)
 
     def _inserir_detalhes_venda(self, text_area: ctk.CTkTextbox, venda: Venda):
         text_area.insert(tk.END, f"Data/Hora: {venda.data}\n")
@@ -491,6 +519,7 @@ class SistemaCaixa:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar relatório: {str(e)}")
 
+    @metricas.medido
     def atualizar_resumo(self):
         """Atualiza o resumo de vendas na interface"""
         self.resumo_text.configure(state='normal')
@@ -501,15 +530,7 @@ class SistemaCaixa:
             self.resumo_text.configure(state='disabled')
             return
 
-        total_geral = Decimal('0.00')
-        resumo_por_tipo = {}
-        resumo_por_bandeira = {}
-        trocas = []
-
-        for venda in self.vendas:
-            self._atualizar_resumos(venda, resumo_por_tipo, resumo_por_bandeira, trocas)
-            total_geral += venda.valor
-
+        total_geral, resumo_por_tipo, resumo_por_bandeira, trocas = resumir_vendas(self.vendas)
         self._inserir_resumo_geral(total_geral, resumo_por_tipo, resumo_por_bandeira, trocas)
         self.resumo_text.configure(state='disabled')
 
@@ -534,14 +555,13 @@ class SistemaCaixa:
         """Carrega vendas salvas do arquivo de backup do dia atual"""
         try:
             if os.path.exists(self.ARQUIVO_BACKUP):
-                with open(self.ARQUIVO_BACKUP, 'r', encoding='utf-8') as file:
-                    dados = json.load(file)
-                    self.vendas = [Venda.from_dict(venda_dict) for venda_dict in dados]
-                    for venda in self.vendas:
-                        self._adicionar_venda_treeview(venda)
+                self.vendas = ler_vendas(self.ARQUIVO_BACKUP)
+                for venda in self.vendas:
+                    self._adicionar_venda_treeview(venda)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao carregar vendas: {str(e)}")
 
+    @metricas.medido
     def salvar_vendas(self):
         """Salva as vendas no arquivo de backup do dia atual"""
         try:
@@ -0,0 +1,335 @@
+"""
+Tabela virtual compartilhada pelas ferramentas do Sistema Austral.
+
+Em vez de apagar e reinserir todas as linhas no ttk.Treeview, a TabelaVirtual
+insere apenas uma página por vez e busca a próxima quando a rolagem se
+aproxima do fim. As linhas vêm de uma "fonte":
+
+- FonteConsulta: paginação por keyset direto do SQLite (não usa OFFSET, então
+  cada página custa o mesmo independentemente do tamanho da tabela);
+- FonteLista: fatias de uma lista já carregada em memória.
+
+Com um ExecutorTarefas, as páginas de uma FonteConsulta são lidas no pool de
+threads (interrompíveis) e exibidas quando chegam, sem travar a interface.
+"""
+
+import copy
+import os
+import sqlite3
+from tkinter import messagebox
+
+import banco
+import metricas
+
+# Linhas buscadas por página; ajustável com AUSTRAL_TAMANHO_PAGINA no ambiente
+TAMANHO_PAGINA = int(os.environ.get("AUSTRAL_TAMANHO_PAGINA", "200"))
+LIMIAR_ROLAGEM = 0.9  # fração da rolagem a partir da qual a próxima página é buscada
+
+
+class FonteConsulta:
+    """Fonte paginada por keyset sobre uma consulta SQLite."""
+
+    def __init__(self, sql, params=(), chave=("id",), decrescente=True):
+        """
+        sql: SELECT sem ORDER BY/LIMIT que inclua as colunas da chave.
+        chave: colunas (únicas em conjunto) que definem a ordem das páginas.
+        Só a primeira pode ter NULL (ex.: data); as demais, como o id, não.
+        """
+        self.sql = sql
+        self.params = tuple(params)
+        self.chave = tuple(chave)
+        self.decrescente = decrescente
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volta para a primeira página"""
+        self._ultima_chave = None
+        self.esgotada = False
+
+    def _comparar(self, colunas, valores):
+        """Condição 'depois de valores' na ordem da fonte, por comparação de row values"""
+        operador = "<" if self.decrescente else ">"
+        marcadores = ", ".join("?" for _ in colunas)
+        return f"({', '.join(colunas)}) {operador} ({marcadores})", list(valores)
+
+    def _condicoes(self):
+        """
+        Condições que, em sequência, trazem as linhas após a última chave lida.
+
+        Comparar row values com NULL não é verdadeiro nem falso, então as
+        linhas com a primeira coluna NULL (primeiras na ordem crescente,
+        últimas na decrescente) são lidas à parte, sem perder o índice.
+        """
+        if self._ultima_chave is None:
+            return [(None, [])]
+
+        primeira, resto = self.chave[0], self.chave[1:]
+        if self._ultima_chave[0] is not None:
+            condicoes = [self._comparar(self.chave, self._ultima_chave)]
+            if self.decrescente:
+                condicoes.append((f"{primeira} IS NULL", []))
+            return condicoes
+
+        # Ainda no grupo de NULLs: continua pelas demais colunas da chave
+        condicoes = []
+        if resto:
+            sql, params = self._comparar(resto, self._ultima_chave[1:])
+            condicoes.append((f"{primeira} IS NULL AND {sql}", params))
+        if not self.decrescente:
+            condicoes.append((f"{primeira} IS NOT NULL", []))
+        return condicoes
+
+    def _montar_sql(self, condicao, params_condicao, limite):
+        """Monta a consulta de uma página com a condição de keyset"""
+        direcao = "DESC" if self.decrescente else "ASC"
+        sql = f"SELECT * FROM ({self.sql})"
+        params = list(self.params)
+        if condicao:
+            sql += f" WHERE {condicao}"
+            params.extend(params_condicao)
+        sql += " ORDER BY " + ", ".join(f"{c} {direcao}" for c in self.chave)
+        sql += " LIMIT ?"
+        params.append(limite)
+        return sql, params
+
+    @metricas.medido
+    def proxima_pagina(self, limite, conn=None):
+        """
+        Retorna até `limite` linhas (sqlite3.Row) após a última página lida.
+
+        conn: conexão já emprestada do pool (padrão: empresta uma só para a página).
+        """
+        if self.esgotada:
+            return []
+
+        if conn is None:
+            with banco.conexao() as conn:
+                linhas = self._ler_pagina(conn, limite)
+        else:
+            linhas = self._ler_pagina(conn, limite)
+
+        if len(linhas) < limite:
+            self.esgotada = True
+        if linhas:
+            self._ultima_chave = tuple(linhas[-1][c] for c in self.chave)
+        return linhas
+
+    def _ler_pagina(self, conn, limite):
+        """Lê a página, passando ao grupo de NULLs (ou saindo dele) se preciso"""
+        linhas = []
+        for condicao, params_condicao in self._condicoes():
+            sql, params = self._montar_sql(condicao, params_condicao, limite - len(linhas))
+            linhas.extend(self._ler(conn, sql, params))
+            if len(linhas) >= limite:
+                break
+        return linhas
+
+    @staticmethod
+    def _ler(conn, sql, params):
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor.execute(sql, params).fetchall()
+
+
+@metricas.medido
+def ler_pagina(tarefa, fonte, limite):
+    """Lê a próxima página da fonte fora da thread da interface, interrompível"""
+    with banco.conexao() as conn, tarefa.interrompivel(conn):
+        return fonte.proxima_pagina(limite, conn)
+
+
+class FonteLista:
+    """Fonte que fatia uma lista em memória, opcionalmente do fim para o início."""
+
+    def __init__(self, linhas, invertida=False):
+        self.linhas = linhas
+        self.invertida = invertida
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volta para a primeira página"""
+        self._posicao = 0
+
+    @property
+    def esgotada(self):
+        return self._posicao >= len(self.linhas)
+
+    def proxima_pagina(self, limite):
+        """Retorna a próxima fatia de até `limite` linhas"""
+        inicio = self._posicao
+        fim = min(inicio + limite, len(self.linhas))
+        self._posicao = fim
+        if self.invertida:
+            total = len(self.linhas)
+            return [self.linhas[total - 1 - i] for i in range(inicio, fim)]
+        return self.linhas[inicio:fim]
+
+
+class TabelaVirtual:
+    """Preenche um ttk.Treeview sob demanda, uma página por vez."""
+
+    def __init__(self, tree, scrollbar=None, formatar=None, iid=None,
+                 tamanho_pagina=TAMANHO_PAGINA, ao_carregar=None, tarefas=None):
+        """
+        formatar: função linha -> valores exibidos (padrão: a própria linha).
+        iid: função linha -> iid do item no Treeview (padrão: gerado pelo Tk).
+        ao_carregar: chamada sem argumentos após cada página exibida.
+        tarefas: ExecutorTarefas para ler as páginas de FonteConsulta em
+        segundo plano (padrão: lê na thread da interface).
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.formatar = formatar or tuple
+        self.iid = iid
+        self.tamanho_pagina = tamanho_pagina
+        self.ao_carregar = ao_carregar
+        self.tarefas = tarefas
+        self.fonte = None
+        self.tarefa_pagina = None
+        self._carga_agendada = False
+
+        self.tree.configure(yscrollcommand=self._ao_rolar)
+
+    def carregar(self, fonte):
+        """Troca a fonte de dados e exibe a primeira página"""
+        self.cancelar_carga()
+        self.limpar()
+        self.fonte = fonte
+        fonte.reiniciar()
+        self.carregar_mais()
+
+    def limpar(self):
+        """Remove todas as linhas exibidas"""
+        filhos = self.tree.get_children()
+        if filhos:
+            self.tree.delete(*filhos)
+
+    @metricas.medido
+    def carregar_mais(self):
+        """
+        Busca a próxima página da fonte e a adiciona ao fim da tabela.
+
+        Retorna quantas linhas foram adicionadas; com tarefas, a página de
+        uma FonteConsulta é lida em segundo plano e exibida ao chegar
+        (retorna 0).
+        """
+        if self.fonte is None or self.fonte.esgotada or self.tarefa_pagina is not None:
+            return 0
+
+        if self.tarefas is not None and isinstance(self.fonte, FonteConsulta):
+            # A tarefa avança uma cópia: página cancelada não desloca a fonte exibida
+            fonte = copy.copy(self.fonte)
+            tarefa = self.tarefas.executar(
+                ler_pagina,
+                fonte,
+                self.tamanho_pagina,
+                ao_concluir=lambda linhas: self._pagina_lida(tarefa, fonte, linhas),
+                ao_erro=lambda erro: self._pagina_falhou(tarefa, erro),
+                ao_cancelar=lambda: self._pagina_falhou(tarefa),
+                descricao="página"
+            )
+            self.tarefa_pagina = tarefa
+            return 0
+
+        linhas = self.fonte.proxima_pagina(self.tamanho_pagina)
+        self._adicionar(linhas)
+        if self.ao_carregar:
+            self.ao_carregar()
+        return len(linhas)
+
+    def _pagina_lida(self, tarefa, fonte, linhas):
+        """Exibe a página lida em segundo plano, se ainda for a esperada"""
+        if tarefa is not self.tarefa_pagina:
+            return
+        self.tarefa_pagina = None
+        self.fonte = fonte
+        self._adicionar(linhas)
+        if self.ao_carregar:
+            self.ao_carregar()
+
+    def _pagina_falhou(self, tarefa, erro=None):
+        """Libera a próxima carga após erro ou cancelamento da página esperada"""
+        if tarefa is not self.tarefa_pagina:
+            return
+        self.tarefa_pagina = None
+        if erro is not None:
+            messagebox.showerror("Erro", f"Erro ao carregar registros: {str(erro)}")
+
+    def cancelar_carga(self):
+        """Interrompe a página sendo lida em segundo plano, se houver"""
+        if self.tarefa_pagina is not None:
+            self.tarefa_pagina.cancelar()
+            self.tarefa_pagina = None
+
+    def exibir(self, fonte, linhas):
+        """Troca a fonte exibindo a primeira página já lida (ex.: em segundo plano)"""
+        self.cancelar_carga()
+        self.limpar()
+        self.fonte = fonte
+        self._adicionar(linhas)
+        if self.ao_carregar:
+            self.ao_carregar()
+
+    def _adicionar(self, linhas):
+        """Adiciona as linhas ao fim da tabela"""
+        for linha in linhas:
+            iid = self.iid(linha) if self.iid else None
+            # Linha já inserida diretamente por inserir(): não duplica
+            if iid is not None and self.tree.exists(iid):
+                continue
+            self.tree.insert("", "end", iid=iid, values=self.formatar(linha))
+
+    def inserir(self, linha, indice=0):
+        """Insere uma única linha (por padrão no topo) sem recarregar a tabela"""
+        iid = self.iid(linha) if self.iid else None
+        return self.tree.insert("", indice, iid=iid, values=self.formatar(linha))
+
+    def atualizar_colunas(self, iid, valores):
+        """Altera apenas as colunas informadas ({coluna: valor}) de uma linha exibida"""
+        if not self.tree.exists(iid):
+            return False
+        for coluna, valor in valores.items():
+            self.tree.set(iid, coluna, valor)
+        return True
+
+    def substituir(self, linha):
+        """Reexibe uma linha já exibida a partir do registro atualizado (mesmo iid)"""
+        iid = self.iid(linha)
+        if not self.tree.exists(iid):
+            return False
+        self.tree.item(iid, values=self.formatar(linha))
+        return True
+
+    def atualizar_linhas(self, iids, valores):
+        """Aplica as mesmas colunas ({coluna: valor}) a várias linhas; retorna quantas existiam"""
+        return sum(self.atualizar_colunas(iid, valores) for iid in iids)
+
+    def remover(self, iids):
+        """Remove da tabela as linhas exibidas com os iids informados"""
+        existentes = [iid for iid in iids if self.tree.exists(iid)]
+        if existentes:
+            self.tree.delete(*existentes)
+
+    @property
+    def exibidas(self):
+        """Quantidade de linhas exibidas na tabela"""
+        return len(self.tree.get_children())
+
+    @property
+    def completa(self):
+        """Indica se todas as linhas da fonte já estão na tabela"""
+        return self.fonte is None or self.fonte.esgotada
+
+    def _ao_rolar(self, primeiro, ultimo):
+        """Repasse do yscrollcommand: atualiza a barra e busca mais linhas perto do fim"""
+        if self.scrollbar is not None:
+            self.scrollbar.set(primeiro, ultimo)
+
+        if float(ultimo) >= LIMIAR_ROLAGEM and not self.completa and not self._carga_agendada:
+            self._carga_agendada = True
+            self.tree.after_idle(self._carregar_agendado)
+
+    def _carregar_agendado(self):
+        """Carrega a próxima página fora do callback de rolagem"""
+        self._carga_agendada = False
+        self.carregar_mais()
@@ -0,0 +1,195 @@
+"""
+Execução de tarefas demoradas fora da thread da interface.
+
+As ferramentas enviam trabalhos de E/S (exportações, consultas na internet,
+gravação de arquivos) para um pool de threads compartilhado. O resultado,
+o progresso e os erros voltam por uma fila que é lida com after(), então os
+callbacks sempre rodam na thread do Tk e a janela continua respondendo
+(inclusive ao leitor de código de barras) enquanto o trabalho acontece.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from tkinter import TclError, messagebox
+
+MAX_TRABALHADORES = 4
+INTERVALO_FILA_MS = 50
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool de threads compartilhado pelas ferramentas"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=MAX_TRABALHADORES,
+                thread_name_prefix="austral-tarefa"
+            )
+        return _pool
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o cancelamento é solicitado."""
+
+
+class Tarefa:
+    """Tarefa em execução no pool, com progresso e cancelamento."""
+
+    def __init__(self, fila, descricao=""):
+        self.descricao = descricao
+        self._fila = fila
+        self._cancelada = threading.Event()
+        self._conexao = None
+        self._conexao_lock = threading.Lock()
+        self.concluida = False
+
+    def cancelar(self):
+        """Solicita o cancelamento; a tarefa para no próximo ponto de verificação"""
+        self._cancelada.set()
+        with self._conexao_lock:
+            if self._conexao is not None:
+                self._conexao.interrupt()
+
+    @contextmanager
+    def interrompivel(self, conn):
+        """
+        Durante o bloco, cancelar() também interrompe a consulta em andamento
+        em conn; a consulta interrompida vira TarefaCancelada.
+        """
+        with self._conexao_lock:
+            self._conexao = conn
+        try:
+            self.verificar()
+            yield conn
+        except sqlite3.OperationalError:
+            if self.cancelada:
+                raise TarefaCancelada() from None
+            raise
+        finally:
+            # Desvincula antes de a conexão voltar ao pool
+            with self._conexao_lock:
+                self._conexao = None
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def verificar(self):
+        """Ponto de verificação: levanta TarefaCancelada se a tarefa foi cancelada"""
+        if self._cancelada.is_set():
+            raise TarefaCancelada()
+
+    def progresso(self, feito, total=None):
+        """Informa o progresso à interface (chamado de dentro da tarefa)"""
+        self._fila.put(("progresso", self, (feito, total)))
+        self.verificar()
+
+
+class ExecutorTarefas:
+    """Envia funções ao pool e entrega os resultados na thread do Tk."""
+
+    def __init__(self, widget, intervalo_ms=INTERVALO_FILA_MS):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self._fila = queue.Queue()
+        self._callbacks = {}
+        self._agendado = False
+
+    def executar(self, funcao, *args, ao_concluir=None, ao_erro=None,
+                 ao_progresso=None, ao_cancelar=None, descricao="", **kwargs):
+        """
+        Executa funcao(tarefa, *args, **kwargs) no pool e retorna a Tarefa.
+
+        Os callbacks rodam na thread do Tk: ao_concluir(resultado),
+        ao_erro(exceção), ao_progresso(feito, total) e ao_cancelar().
+        Sem ao_erro, o erro é exibido em uma caixa de mensagem.
+        """
+        tarefa = Tarefa(self._fila, descricao)
+        self._callbacks[tarefa] = (ao_concluir, ao_erro, ao_progresso, ao_cancelar)
+        obter_pool().submit(self._rodar, tarefa, funcao, args, kwargs)
+        self._agendar()
+        return tarefa
+
+    def _rodar(self, tarefa, funcao, args, kwargs):
+        """Corpo executado na thread do pool"""
+        try:
+            resultado = funcao(tarefa, *args, **kwargs)
+        except TarefaCancelada:
+            self._fila.put(("cancelada", tarefa, None))
+        except Exception as e:
+            self._fila.put(("erro", tarefa, e))
+        else:
+            if tarefa.cancelada:
+                self._fila.put(("cancelada", tarefa, None))
+            else:
+                self._fila.put(("concluida", tarefa, resultado))
+
+    @property
+    def ocupado(self):
+        """Indica se há tarefas ainda não entregues à interface"""
+        return bool(self._callbacks)
+
+    def cancelar_todas(self):
+        """Solicita o cancelamento de todas as tarefas pendentes"""
+        for tarefa in list(self._callbacks):
+            tarefa.cancelar()
+
+    def encerrar(self):
+        """Cancela as tarefas pendentes e descarta seus callbacks"""
+        self.cancelar_todas()
+        self._callbacks.clear()
+
+    def _agendar(self):
+        """Agenda a próxima leitura da fila, se ainda não houver uma"""
+        if self._agendado:
+            return
+        try:
+            self.widget.after(self.intervalo_ms, self._processar_fila)
+            self._agendado = True
+        except TclError:
+            # Janela já destruída: não há mais para quem entregar resultados
+            self.encerrar()
+
+    def _processar_fila(self):
+        """Entrega na thread do Tk os eventos enviados pelas tarefas"""
+        self._agendado = False
+        while True:
+            try:
+                evento, tarefa, dados = self._fila.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self._callbacks.get(tarefa)
+            if callbacks is None:
+                continue
+            ao_concluir, ao_erro, ao_progresso, ao_cancelar = callbacks
+
+            if evento == "progresso":
+                if ao_progresso and not tarefa.cancelada:
+                    ao_progresso(*dados)
+                continue
+
+            del self._callbacks[tarefa]
+            tarefa.concluida = True
+            # Cancelada depois de o resultado entrar na fila: não entrega o resultado
+            if tarefa.cancelada:
+                evento = "cancelada"
+            if evento == "concluida":
+                if ao_concluir:
+                    ao_concluir(dados)
+            elif evento == "erro":
+                if ao_erro:
+                    ao_erro(dados)
+                else:
+                    messagebox.showerror("Erro", str(dados), parent=self.widget)
+            elif ao_cancelar:
+                ao_cancelar()
+
+        if self._callbacks:
+            self._agendar()
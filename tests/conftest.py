@@ -0,0 +1,27 @@
+"""
+Configuração comum dos testes.
+
+Os testes usam um banco SQLite novo em um diretório temporário (nunca o
+assets/austral.db) e rodam com as métricas desligadas.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("AUSTRAL_METRICAS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import banco
+
+
+@pytest.fixture
+def banco_temp(tmp_path):
+    """Aponta o pool compartilhado para um banco novo, já migrado"""
+    original = banco.DB_PATH
+    caminho = str(tmp_path / "austral.db")
+    banco.definir_caminho(caminho)
+    banco.inicializar()
+    yield caminho
+    banco.definir_caminho(original)
@@ -0,0 +1,49 @@
+"""Contadores de defeitos por loja e status mantidos pelos triggers."""
+
+import banco
+import defeitos
+
+
+def _contagem_real():
+    return sorted(banco.consultar('''
+        SELECT COALESCE(loja, ''), COALESCE(status, ''), COUNT(*)
+        FROM defeitos GROUP BY 1, 2
+    '''))
+
+
+def _contagem_mantida():
+    return sorted(banco.consultar(
+        "SELECT loja, status, quantidade FROM defeitos_contagem WHERE quantidade > 0"
+    ))
+
+
+def _inserir(loja, status="Pendente"):
+    return banco.executar(
+        "INSERT INTO defeitos (data_defeito, codigo_produto, loja, status) VALUES (?, ?, ?, ?)",
+        ("2024-05-01", "AU001", loja, status)
+    ).lastrowid
+
+
+def test_insercao_alteracao_e_exclusao(banco_temp):
+    ids = [_inserir(loja) for loja in ("MATRIZ", "MATRIZ", "FILIAL 1", None)]
+    assert _contagem_mantida() == _contagem_real()
+
+    defeitos.resolver_defeitos(ids[:2])
+    banco.executar("UPDATE defeitos SET loja = 'FILIAL 2' WHERE id = ?", (ids[2],))
+    # Alteração de outra coluna não mexe nos contadores
+    banco.executar("UPDATE defeitos SET observacoes = 'x' WHERE id = ?", (ids[3],))
+    assert _contagem_mantida() == _contagem_real()
+
+    defeitos.excluir_defeitos(ids[1:3])
+    assert _contagem_mantida() == _contagem_real()
+
+
+def test_totais_a_partir_dos_contadores(banco_temp):
+    _inserir("MATRIZ")
+    _inserir("MATRIZ", "Resolvido")
+    _inserir("FILIAL 1")
+
+    contagem = defeitos.contagem_por_loja()
+    assert defeitos.totalizar(contagem) == (3, 2, 1)
+    assert defeitos.total_filtrado(contagem, "Pendentes", "Matriz") == 1
+    assert defeitos.total_filtrado(contagem, "Todos", "Todas") == 3
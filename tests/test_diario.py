@@ -0,0 +1,71 @@
+"""Resumo diário de defeitos e ranking de Pareto."""
+
+import banco
+import defeitos
+from migracoes import DIMENSOES_DIARIO
+
+COLUNAS = ", ".join(f"COALESCE({c}, '')" for c in DIMENSOES_DIARIO)
+
+
+def _resumo_real():
+    return sorted(banco.consultar(f'''
+        SELECT COALESCE(substr(data_defeito, 1, 10), ''), {COLUNAS}, COUNT(*)
+        FROM defeitos
+        GROUP BY {", ".join(str(i) for i in range(1, len(DIMENSOES_DIARIO) + 2))}
+    '''))
+
+
+def _resumo_mantido():
+    return sorted(banco.consultar(
+        f"SELECT dia, {', '.join(DIMENSOES_DIARIO)}, quantidade FROM defeitos_diario"
+    ))
+
+
+def _inserir(dia, codigo, descricao="COSTURA", loja="MATRIZ"):
+    return banco.executar('''
+        INSERT INTO defeitos (data_defeito, tipo_defeito, codigo_produto, descricao_defeito, loja, status)
+        VALUES (?, 'PRODUTO', ?, ?, ?, 'Pendente')
+    ''', (dia, codigo, descricao, loja)).lastrowid
+
+
+def test_resumo_acompanha_insercao_alteracao_e_exclusao(banco_temp):
+    ids = [
+        _inserir("2024-05-01 10:00", "AU001"),
+        _inserir("2024-05-01 11:00", "AU001"),
+        _inserir("2024-05-02 09:00", "AU002", "MANCHA"),
+    ]
+    assert _resumo_mantido() == _resumo_real()
+
+    banco.executar("UPDATE defeitos SET data_defeito = '2024-05-03 08:00' WHERE id = ?", (ids[0],))
+    banco.executar("UPDATE defeitos SET codigo_produto = 'AU003' WHERE id = ?", (ids[2],))
+    defeitos.resolver_defeitos([ids[1]])
+    assert _resumo_mantido() == _resumo_real()
+
+    defeitos.excluir_defeitos(ids)
+    assert _resumo_mantido() == _resumo_real() == []
+
+
+def test_alteracao_fora_das_dimensoes_nao_mexe_no_resumo(banco_temp):
+    defeito_id = _inserir("2024-05-01 10:00", "AU001")
+    antes = _resumo_mantido()
+
+    banco.executar(
+        "UPDATE defeitos SET observacoes = 'x', loja = loja, status = status WHERE id = ?",
+        (defeito_id,)
+    )
+
+    assert _resumo_mantido() == antes
+    assert banco.consultar_um("SELECT COUNT(*) FROM defeitos_diario WHERE quantidade <= 0")[0] == 0
+
+
+def test_ranking_por_produto(banco_temp):
+    for _ in range(3):
+        _inserir("2024-05-01 10:00", "AU001")
+    _inserir("2024-05-02 10:00", "AU002")
+    _inserir("2024-06-01 10:00", "AU002")
+
+    total, ranking = defeitos.ranking_defeitos("Produto", "2024-05-01", "2024-06-01")
+
+    assert total == 4
+    assert ranking == [("AU001", 3, 75.0, 75.0), ("AU002", 1, 25.0, 100.0)]
+    assert defeitos.ranking_defeitos("Produto", status_filtro="Resolvidos") == (0, [])
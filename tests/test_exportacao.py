@@ -0,0 +1,74 @@
+"""Exportação de alterações a partir da marca (atualizado_em, id)."""
+
+import csv
+import queue
+import time
+
+import pytest
+
+import banco
+import exportacao
+import oms
+from tarefas import Tarefa, TarefaCancelada
+
+
+def _exportar(tmp_path, nome, **opcoes):
+    """Exporta os pedidos para um CSV e retorna os números exportados"""
+    caminho = str(tmp_path / nome)
+    oms.exportar_pedidos(Tarefa(queue.Queue()), caminho, **opcoes)
+    with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+        linhas = list(csv.reader(arquivo, delimiter=";"))
+    assert linhas[0][2] == "Número Pedido"
+    return sorted(linha[2] for linha in linhas[1:])
+
+
+@pytest.fixture
+def pedidos(banco_temp):
+    banco.executar_varios(
+        "INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, status) "
+        "VALUES (?, 'ANA', ?, 'Faturado')",
+        [("2024-01-05", "1001"), ("2024-01-06", "1002"), ("2024-01-07", "1003")]
+    )
+    return banco_temp
+
+
+def test_alteracoes_desde_a_marca(pedidos, tmp_path):
+    assert exportacao.ler_marca(oms.PERFIL_EXPORTACAO) is None
+
+    # Sem marca, a exportação de alterações traz tudo e grava a marca
+    assert _exportar(tmp_path, "1.csv", alteracoes=True) == ["1001", "1002", "1003"]
+    marca = exportacao.ler_marca(oms.PERFIL_EXPORTACAO)
+    assert marca == tuple(banco.consultar_um(
+        "SELECT atualizado_em, id FROM pedidos ORDER BY atualizado_em DESC, id DESC LIMIT 1"
+    ))
+
+    # Nada mudou: só o cabeçalho, e a marca continua a mesma
+    assert _exportar(tmp_path, "2.csv", alteracoes=True) == []
+    assert exportacao.ler_marca(oms.PERFIL_EXPORTACAO) == marca
+
+    time.sleep(0.01)  # atualizado_em tem resolução de milissegundos
+    banco.executar("UPDATE pedidos SET status = 'Enviado' WHERE numero_pedido = '1001'")
+    banco.executar(
+        "INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, status) "
+        "VALUES ('2024-01-08', 'ANA', '1004', 'Faturado')"
+    )
+    assert _exportar(tmp_path, "3.csv", alteracoes=True) == ["1001", "1004"]
+    assert exportacao.ler_marca(oms.PERFIL_EXPORTACAO) > marca
+
+
+def test_exportacao_por_periodo_nao_avanca_a_marca(pedidos, tmp_path):
+    assert _exportar(tmp_path, "periodo.csv", inicio="2024-01-06", fim="2024-01-07") == ["1002"]
+    assert exportacao.ler_marca(oms.PERFIL_EXPORTACAO) is None
+
+
+def test_cancelada_nao_grava_arquivo_nem_marca(pedidos, tmp_path):
+    tarefa = Tarefa(queue.Queue())
+    tarefa.cancelar()
+    caminho = str(tmp_path / "cancelada.csv")
+
+    with pytest.raises(TarefaCancelada):
+        oms.exportar_pedidos(tarefa, caminho, alteracoes=True)
+
+    assert not (tmp_path / "cancelada.csv").exists()
+    assert not (tmp_path / "cancelada.csv.parcial").exists()
+    assert exportacao.ler_marca(oms.PERFIL_EXPORTACAO) is None
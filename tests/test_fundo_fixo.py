@@ -0,0 +1,121 @@
+"""Recálculo do fundo fixo a partir de checkpoints."""
+
+import random
+
+import pytest
+
+import banco
+import fundo_fixo
+
+VALOR_FUNDO = 1000.0
+
+
+def _dados():
+    return {
+        "valor_fundo": VALOR_FUNDO,
+        "saldo_atual": VALOR_FUNDO,
+        "depositos_pendentes": 0.0,
+        "reposicoes_pendentes": 0.0,
+    }
+
+
+def _saldos_gravados():
+    return banco.consultar("SELECT id, saldo FROM movimentacoes ORDER BY id")
+
+
+def _replay_completo():
+    """Saldos e pendências recalculados do início, sem nenhum checkpoint"""
+    banco.executar("DELETE FROM fundo_checkpoints")
+    dados = _dados()
+    fundo_fixo.recalcular(dados)
+    return dados, _saldos_gravados()
+
+
+@pytest.fixture
+def fundo(banco_temp, monkeypatch):
+    monkeypatch.setattr(fundo_fixo, "INTERVALO_CHECKPOINT", 7)
+    sorteio = random.Random(7)
+    with banco.transacao() as conn:
+        conn.execute(
+            "INSERT INTO config_fundo (valor_fundo, depositos_pendentes, reposicoes_pendentes) "
+            "VALUES (?, 0, 0)", (VALOR_FUNDO,)
+        )
+        conn.executemany(
+            "INSERT INTO movimentacoes (data, tipo, valor, responsavel, descricao, saldo) "
+            "VALUES ('2024-03-01 08:00', ?, ?, 'ANA', 'TESTE', 0)",
+            [
+                (sorteio.choice(("Entrada", "Saída")), float(sorteio.randint(1, 300)))
+                for _ in range(50)
+            ]
+        )
+    dados = _dados()
+    fundo_fixo.recalcular(dados)
+    return dados
+
+
+def test_checkpoints_a_cada_intervalo(fundo):
+    assert [r[0] for r in banco.consultar(
+        "SELECT movimentacao_id FROM fundo_checkpoints ORDER BY movimentacao_id"
+    )] == [7, 14, 21, 28, 35, 42, 49]
+
+
+def test_recalcular_desde_id_igual_ao_replay_completo(fundo):
+    banco.executar("UPDATE movimentacoes SET valor = 999.0, tipo = 'Saída' WHERE id = 30")
+
+    saldos = fundo_fixo.recalcular(fundo, desde_id=30)
+
+    # Parte do checkpoint anterior à linha alterada
+    assert min(saldos) == 29
+    gravados = _saldos_gravados()
+    esperado, saldos_esperados = _replay_completo()
+    assert gravados == saldos_esperados
+    assert fundo == esperado
+
+
+def test_excluir_igual_ao_replay_completo(fundo):
+    saldos = fundo_fixo.excluir(fundo, 15)
+
+    assert 15 not in saldos
+    gravados = _saldos_gravados()
+    esperado, saldos_esperados = _replay_completo()
+    assert gravados == saldos_esperados
+    assert fundo == esperado
+    config = banco.consultar_um(
+        "SELECT depositos_pendentes, reposicoes_pendentes FROM config_fundo"
+    )
+    assert tuple(config) == (esperado["depositos_pendentes"], esperado["reposicoes_pendentes"])
+
+
+def test_carregar_saldos_sem_checkpoint_recalcula(fundo):
+    banco.executar("DELETE FROM fundo_checkpoints")
+    banco.executar("UPDATE movimentacoes SET saldo = 0")
+
+    dados = _dados()
+    assert fundo_fixo.carregar_saldos(dados) is True
+    assert dados["saldo_atual"] == fundo["saldo_atual"]
+
+    # Com checkpoints, só lê o saldo da última movimentação
+    dados = _dados()
+    assert fundo_fixo.carregar_saldos(dados) is False
+    assert dados["saldo_atual"] == fundo["saldo_atual"]
+
+
+def test_fundo_pequeno_recalcula_so_na_primeira_abertura(fundo, monkeypatch):
+    # Menos movimentações que o intervalo: o replay não grava checkpoint nenhum
+    monkeypatch.setattr(fundo_fixo, "INTERVALO_CHECKPOINT", 500)
+    banco.executar("DELETE FROM fundo_checkpoints")
+
+    assert fundo_fixo.carregar_saldos(_dados()) is True
+    assert [r[0] for r in banco.consultar("SELECT movimentacao_id FROM fundo_checkpoints")] == [50]
+
+    # Ajuste manual da configuração entre duas aberturas
+    banco.executar("UPDATE config_fundo SET depositos_pendentes = 123.0")
+
+    def replay(*args):
+        raise AssertionError("carregar_saldos não deve percorrer o histórico de novo")
+
+    monkeypatch.setattr(fundo_fixo, "_reaplicar", replay)
+    dados = _dados()
+    assert fundo_fixo.carregar_saldos(dados) is False
+    assert dados["saldo_atual"] == fundo["saldo_atual"]
+    assert banco.consultar_um("SELECT depositos_pendentes FROM config_fundo")[0] == 123.0
@@ -0,0 +1,77 @@
+"""Migrações aplicadas sobre um banco no formato anterior a elas."""
+
+import sqlite3
+
+import migracoes
+
+
+def _banco_antigo(caminho):
+    """Banco como as ferramentas criavam antes das migrações (datas dd/mm/YYYY)"""
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    migracoes._criar_tabelas_base(conn)
+    conn.executemany(
+        "INSERT INTO pedidos (data_faturamento, responsavel_faturamento, numero_pedido, status) "
+        "VALUES (?, ?, ?, ?)",
+        [("05/01/2024", "ANA", "1001", "Faturado"), ("06/01/2024", "ANA", "1002", "Enviado")]
+    )
+    conn.executemany(
+        "INSERT INTO defeitos (data_defeito, tipo_defeito, codigo_produto, nome_vendedor, "
+        "descricao_defeito, loja, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("10/02/2024 09:30", "PRODUTO", "AU001", "JOÃO", "COSTURA", "MATRIZ", "Pendente"),
+            ("11/02/2024 10:00", "PRODUTO", "AU001", "MARIA", "MANCHA", "MATRIZ", "Resolvido"),
+            ("11/02/2024 11:00", "CLIENTE", "AU002", "JOÃO", "COSTURA", "FILIAL 1", "Pendente"),
+        ]
+    )
+    conn.execute(
+        "INSERT INTO movimentacoes (data, tipo, valor, responsavel, descricao, saldo) "
+        "VALUES ('01/03/2024 08:00', 'Entrada', 50.0, 'ANA', 'TROCO', 1050.0)"
+    )
+    return conn
+
+
+def test_aplica_todas_as_versoes(tmp_path):
+    conn = _banco_antigo(str(tmp_path / "antigo.db"))
+
+    aplicadas = migracoes.aplicar_migracoes(conn)
+
+    assert aplicadas == [versao for versao, _, _ in migracoes.MIGRACOES]
+    assert migracoes.versao_atual(conn) == migracoes.MIGRACOES[-1][0]
+    # Reaplicar não faz nada
+    assert migracoes.aplicar_migracoes(conn) == []
+
+
+def test_converte_datas_para_iso(tmp_path):
+    conn = _banco_antigo(str(tmp_path / "antigo.db"))
+    migracoes.aplicar_migracoes(conn)
+
+    assert [r[0] for r in conn.execute("SELECT data_faturamento FROM pedidos ORDER BY id")] == [
+        "2024-01-05", "2024-01-06"
+    ]
+    assert conn.execute("SELECT data_defeito FROM defeitos WHERE id = 1").fetchone()[0] == (
+        "2024-02-10 09:30"
+    )
+    assert conn.execute("SELECT data FROM movimentacoes").fetchone()[0] == "2024-03-01 08:00"
+
+
+def test_preenche_estruturas_derivadas(tmp_path):
+    conn = _banco_antigo(str(tmp_path / "antigo.db"))
+    migracoes.aplicar_migracoes(conn)
+
+    # atualizado_em das linhas antigas
+    assert conn.execute("SELECT COUNT(*) FROM pedidos WHERE atualizado_em IS NULL").fetchone()[0] == 0
+
+    # Índice de busca com acentos removidos
+    encontrados = conn.execute(
+        "SELECT rowid FROM defeitos_fts WHERE defeitos_fts MATCH 'joao' ORDER BY rowid"
+    ).fetchall()
+    assert [r[0] for r in encontrados] == [1, 3]
+
+    # Contadores e resumo diário iguais ao GROUP BY da tabela
+    assert sorted(conn.execute("SELECT loja, status, quantidade FROM defeitos_contagem")) == [
+        ("FILIAL 1", "Pendente", 1), ("MATRIZ", "Pendente", 1), ("MATRIZ", "Resolvido", 1)
+    ]
+    assert conn.execute("SELECT SUM(quantidade) FROM defeitos_diario").fetchone()[0] == 3
+    assert sorted(conn.execute(
+        "SELECT dia, codigo_produto, quantidade FROM defeitos_diario WHERE descricao_defeito = 'COSTURA'"
+    )) == [("2024-02-10", "AU001", 1), ("2024-02-11", "AU002", 1)]
@@ -0,0 +1,159 @@
+"""Paginação por keyset da FonteConsulta e fatias da FonteLista."""
+
+import threading
+import time
+
+import pytest
+
+import banco
+import tabela_virtual
+from tabela_virtual import FonteConsulta, FonteLista, TabelaVirtual
+from tarefas import ExecutorTarefas
+
+
+def _ler_tudo(fonte, limite):
+    linhas = []
+    while not fonte.esgotada:
+        linhas.extend(tuple(linha) for linha in fonte.proxima_pagina(limite))
+    return linhas
+
+
+@pytest.fixture
+def tabela_chaves(banco_temp):
+    """Tabela com empates e NULLs na primeira coluna da chave"""
+    valores = [None, "2024-01-02", "2024-01-01", None, "2024-01-02", "2024-01-03", "2024-01-01", None]
+    with banco.transacao() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, data TEXT)")
+        conn.execute("CREATE INDEX idx_t_data ON t(data)")
+        conn.executemany("INSERT INTO t (data) VALUES (?)", [(v,) for v in valores * 5])
+    return banco_temp
+
+
+@pytest.mark.parametrize("decrescente", [True, False])
+@pytest.mark.parametrize("limite", [1, 3, 7, 40, 100])
+def test_paginas_seguem_a_ordem_completa(tabela_chaves, decrescente, limite):
+    direcao = "DESC" if decrescente else "ASC"
+    esperado = [tuple(r) for r in banco.consultar(
+        f"SELECT id, data FROM t ORDER BY data {direcao}, id {direcao}"
+    )]
+
+    fonte = FonteConsulta("SELECT id, data FROM t", chave=("data", "id"), decrescente=decrescente)
+
+    assert _ler_tudo(fonte, limite) == esperado
+
+
+def test_chave_simples_e_reinicio(tabela_chaves):
+    fonte = FonteConsulta("SELECT id, data FROM t WHERE data IS NOT NULL")
+    primeira = fonte.proxima_pagina(5)
+    assert [r["id"] for r in primeira] == [39, 38, 37, 35, 34]
+
+    fonte.reiniciar()
+    assert fonte.proxima_pagina(5) == primeira
+    assert len(_ler_tudo(fonte, 5)) == 25 - 5
+
+
+def test_fonte_vazia_fica_esgotada(banco_temp):
+    fonte = FonteConsulta("SELECT id FROM pedidos")
+    assert fonte.proxima_pagina(10) == []
+    assert fonte.esgotada
+
+
+def test_fonte_lista_invertida():
+    fonte = FonteLista(list(range(5)), invertida=True)
+    assert fonte.proxima_pagina(2) == [4, 3]
+    assert fonte.proxima_pagina(10) == [2, 1, 0]
+    assert fonte.esgotada
+
+
+class TreeFalsa:
+    """Treeview mínimo em memória; seus after() ficam guardados para o teste rodar"""
+
+    def __init__(self):
+        self.itens = []
+        self.agendados = []
+
+    def configure(self, **opcoes):
+        pass
+
+    def get_children(self):
+        return tuple(self.itens)
+
+    def delete(self, *iids):
+        self.itens = [i for i in self.itens if i not in iids]
+
+    def exists(self, iid):
+        return str(iid) in self.itens
+
+    def insert(self, pai, indice, iid=None, values=()):
+        self.itens.append(str(iid))
+        return str(iid)
+
+    def after(self, ms, funcao):
+        self.agendados.append(funcao)
+
+    def after_idle(self, funcao):
+        self.agendados.append(funcao)
+
+
+def _bombear(tarefas, tree):
+    prazo = time.monotonic() + 5
+    while tarefas.ocupado:
+        assert time.monotonic() < prazo, "página não foi entregue"
+        agendados, tree.agendados = tree.agendados, []
+        for funcao in agendados:
+            funcao()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def tabela_assincrona(tabela_chaves):
+    tree = TreeFalsa()
+    tarefas = ExecutorTarefas(tree)
+    tabela = TabelaVirtual(tree, iid=lambda linha: linha["id"], tamanho_pagina=15, tarefas=tarefas)
+    return tabela, tarefas, tree
+
+
+def test_paginas_em_segundo_plano(tabela_assincrona):
+    tabela, tarefas, tree = tabela_assincrona
+
+    tabela.carregar(FonteConsulta("SELECT id, data FROM t"))
+    assert tabela.exibidas == 0 and tabela.tarefa_pagina is not None
+    _bombear(tarefas, tree)
+    assert tree.itens == [str(i) for i in range(40, 25, -1)]
+
+    while not tabela.completa:
+        assert tabela.carregar_mais() == 0
+        _bombear(tarefas, tree)
+    assert tree.itens == [str(i) for i in range(40, 0, -1)]
+
+
+def test_pagina_cancelada_nao_avanca_a_fonte(tabela_assincrona, monkeypatch):
+    tabela, tarefas, tree = tabela_assincrona
+    tabela.carregar(FonteConsulta("SELECT id, data FROM t"))
+    _bombear(tarefas, tree)
+    fonte = tabela.fonte
+
+    # Página seguinte presa na leitura até o teste cancelar
+    ler = tabela_virtual.ler_pagina
+    liberar = threading.Event()
+
+    def ler_devagar(tarefa, fonte, limite):
+        liberar.wait(5)
+        return ler(tarefa, fonte, limite)
+
+    monkeypatch.setattr(tabela_virtual, "ler_pagina", ler_devagar)
+    tabela.carregar_mais()
+    # Só uma página por vez
+    tarefa = tabela.tarefa_pagina
+    tabela.carregar_mais()
+    assert tabela.tarefa_pagina is tarefa
+
+    tabela.cancelar_carga()
+    liberar.set()
+    _bombear(tarefas, tree)
+
+    assert tabela.fonte is fonte and tabela.exibidas == 15
+    monkeypatch.setattr(tabela_virtual, "ler_pagina", ler)
+    tabela.carregar_mais()
+    _bombear(tarefas, tree)
+    assert tree.itens[15:] == [str(i) for i in range(25, 10, -1)]
@@ -0,0 +1,157 @@
+"""Entrega de resultados e cancelamento no ExecutorTarefas."""
+
+import threading
+import time
+
+import pytest
+
+import banco
+from tarefas import ExecutorTarefas, TarefaCancelada
+
+LIMITE_S = 5
+
+
+class WidgetFalso:
+    """Faz o papel do widget Tk: guarda os after() para rodar no teste"""
+
+    def __init__(self):
+        self.agendados = []
+
+    def after(self, ms, funcao):
+        self.agendados.append(funcao)
+
+
+@pytest.fixture
+def executor():
+    return ExecutorTarefas(WidgetFalso())
+
+
+def _bombear(executor):
+    """Roda os after() agendados até todas as tarefas serem entregues"""
+    prazo = time.monotonic() + LIMITE_S
+    while executor.ocupado:
+        assert time.monotonic() < prazo, "tarefa não foi entregue"
+        agendados, executor.widget.agendados = executor.widget.agendados, []
+        for funcao in agendados:
+            funcao()
+        time.sleep(0.005)
+
+
+def _esperar(condicao):
+    prazo = time.monotonic() + LIMITE_S
+    while not condicao():
+        assert time.monotonic() < prazo
+        time.sleep(0.005)
+
+
+def _registrar(executor, funcao, *args):
+    eventos = []
+    tarefa = executor.executar(
+        funcao, *args,
+        ao_concluir=lambda resultado: eventos.append(("concluida", resultado)),
+        ao_erro=lambda erro: eventos.append(("erro", erro)),
+        ao_progresso=lambda feito, total: eventos.append(("progresso", feito, total)),
+        ao_cancelar=lambda: eventos.append(("cancelada",)),
+    )
+    return tarefa, eventos
+
+
+def test_entrega_progresso_e_resultado(executor):
+    def trabalho(tarefa, n):
+        for i in range(1, n + 1):
+            tarefa.progresso(i, n)
+        return n * 2
+
+    tarefa, eventos = _registrar(executor, trabalho, 3)
+    _bombear(executor)
+
+    assert eventos == [("progresso", 1, 3), ("progresso", 2, 3), ("progresso", 3, 3), ("concluida", 6)]
+    assert tarefa.concluida
+
+
+def test_erro_vai_para_ao_erro(executor):
+    def trabalho(tarefa):
+        raise ValueError("falhou")
+
+    _, eventos = _registrar(executor, trabalho)
+    _bombear(executor)
+
+    assert len(eventos) == 1
+    assert eventos[0][0] == "erro" and str(eventos[0][1]) == "falhou"
+
+
+def test_cancelada_dentro_da_tarefa(executor):
+    iniciou, liberar = threading.Event(), threading.Event()
+
+    def trabalho(tarefa):
+        iniciou.set()
+        liberar.wait(LIMITE_S)
+        tarefa.verificar()
+        return "não deveria sair"
+
+    tarefa, eventos = _registrar(executor, trabalho)
+    iniciou.wait(LIMITE_S)
+    tarefa.cancelar()
+    liberar.set()
+    _bombear(executor)
+
+    assert eventos == [("cancelada",)]
+
+
+def test_cancelada_depois_do_resultado_na_fila(executor):
+    tarefa, eventos = _registrar(executor, lambda tarefa: "pronto")
+    # O resultado já está na fila, mas ainda não foi entregue à interface
+    _esperar(lambda: executor._fila.qsize() > 0)
+    tarefa.cancelar()
+    _bombear(executor)
+
+    assert eventos == [("cancelada",)]
+
+
+def test_progresso_descartado_depois_do_cancelamento(executor):
+    informou, liberar = threading.Event(), threading.Event()
+
+    def trabalho(tarefa):
+        tarefa.progresso(1, 2)
+        informou.set()
+        liberar.wait(LIMITE_S)
+        return "pronto"
+
+    tarefa, eventos = _registrar(executor, trabalho)
+    informou.wait(LIMITE_S)
+    tarefa.cancelar()
+    liberar.set()
+    _bombear(executor)
+
+    assert eventos == [("cancelada",)]
+
+
+def test_cancelar_interrompe_consulta(banco_temp, executor):
+    iniciou = threading.Event()
+
+    def trabalho(tarefa):
+        with banco.conexao() as conn, tarefa.interrompivel(conn):
+            iniciou.set()
+            return conn.execute('''
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)
+                SELECT COUNT(*) FROM n
+            ''').fetchone()
+
+    tarefa, eventos = _registrar(executor, trabalho)
+    iniciou.wait(LIMITE_S)
+    time.sleep(0.05)
+    tarefa.cancelar()
+    _bombear(executor)
+
+    assert eventos == [("cancelada",)]
+    # A conexão interrompida volta ao pool utilizável
+    assert banco.consultar_um("SELECT 1")[0] == 1
+
+
+def test_verificar_levanta_depois_de_cancelar(executor):
+    tarefa, _ = _registrar(executor, lambda tarefa: None)
+    _bombear(executor)
+    tarefa.cancelar()
+
+    with pytest.raises(TarefaCancelada):
+        tarefa.verificar()